@@ -10,7 +10,9 @@ DEFAULT_SETTINGS = {
     "current_theme": "dark_default",
     "show_line_numbers": True,
     "font_size": 13,
-    "font_family": "Fira Mono"
+    "font_family": "Fira Mono",
+    "fsync_on_save": False,
+    "memory_budget_mb": 1024
 }
 
 DEFAULT_THEMES = [
@@ -0,0 +1,172 @@
+import re
+import weakref
+from bisect import bisect_left, insort
+from highlight_manager import registry as language_registry
+
+# Suggestions offered at once
+MAX_COMPLETIONS = 50
+# Entries taken from each source before ranking
+MAX_CANDIDATES = 200
+# Identifier characters typed before suggestions show up on their own
+MIN_COMPLETION_PREFIX = 2
+
+IDENTIFIER_RE = re.compile(r'[^\W\d]\w*')
+# Identifier the cursor is at the end of
+PREFIX_RE = re.compile(r'(?<!\w)[^\W\d]\w*\Z')
+
+# Language file -> category shown with its words
+PACK_CATEGORIES = {'keywords': 'keyword', 'functions': 'function', 'imports': 'import'}
+
+# Every live BufferWords, so suggestions cover all open buffers
+_buffers = weakref.WeakSet()
+# lang -> (entries dict it was built from, PackIndex)
+_pack_indexes = {}
+
+class PackIndex:
+    """Words of a language pack sorted by their lowercase form, for prefix range lookups.
+
+    A flat sorted list does what a trie would here: one bisect finds the first word with
+    the prefix and the matches follow in order, without a node object per character.
+    """
+    def __init__(self, entries):
+        rows = {}
+        for word, detail, category in entries:
+            if word and isinstance(word, str) and word not in rows:
+                rows[word] = (word.lower(), word, detail, category)
+        self.rows = sorted(rows.values())
+        self.keys = [row[0] for row in self.rows]
+
+    def lookup(self, prefix, limit=MAX_CANDIDATES):
+        """(word, detail, category) of up to limit words starting with prefix, any case"""
+        prefix = prefix.lower()
+        out = []
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and len(out) < limit and self.keys[i].startswith(prefix):
+            out.append(self.rows[i][1:])
+            i += 1
+        return out
+
+def get_pack_index(lang, extra=()):
+    """Process-wide PackIndex of a language, rebuilt only when its data files change.
+
+    extra is (word, category) pairs always offered on top of the files, such as the
+    keywords the highlighter knows about.
+    """
+    packs = language_registry.get_language_entries(lang)
+    cached = _pack_indexes.get(lang)
+    if cached is not None and cached[0] is packs:
+        return cached[1]
+    entries = []
+    for category, items in packs.items():
+        category = PACK_CATEGORIES.get(category, category)
+        entries.extend((word, comment, category) for word, comment in items)
+    # After the files, so a word in both keeps the comment the files give it
+    entries.extend((word, '', category) for word, category in extra)
+    index = PackIndex(entries)
+    _pack_indexes[lang] = (packs, index)
+    return index
+
+class BufferWords:
+    """Identifiers of one document, counted per block.
+
+    Only the blocks an edit touches are read again: the words of every block are kept,
+    so the ones an edit removed can be taken off the counts without a rescan.
+    """
+    def __init__(self, document):
+        self.document = document
+        self._block_words = []  # per block, the distinct identifiers in it
+        self._counts = {}
+        self._keys = []  # sorted (lowercase, word) of the identifiers present
+        self._block_count = 0
+        self.reset()
+        document.contentsChange.connect(self.on_contents_change)
+        _buffers.add(self)
+
+    def reset(self):
+        self._counts = {}
+        self._keys = []
+        self._block_words = []
+        block = self.document.begin()
+        while block.isValid():
+            words = self.block_words(block)
+            self._block_words.append(words)
+            self.add(words)
+            block = block.next()
+        self._block_count = self.document.blockCount()
+
+    def block_words(self, block):
+        return tuple(set(IDENTIFIER_RE.findall(block.text())))
+
+    def add(self, words):
+        counts = self._counts
+        for word in words:
+            count = counts.get(word)
+            if count is None:
+                counts[word] = 1
+                insort(self._keys, (word.lower(), word))
+            else:
+                counts[word] = count + 1
+
+    def remove(self, words):
+        counts = self._counts
+        for word in words:
+            count = counts[word] - 1
+            if count:
+                counts[word] = count
+            else:
+                del counts[word]
+                key = (word.lower(), word)
+                del self._keys[bisect_left(self._keys, key)]
+
+    def on_contents_change(self, position, removed, added):
+        document = self.document
+        block_count = document.blockCount()
+        first = document.findBlock(position)
+        last = document.findBlock(position + added)
+        if not last.isValid():
+            last = document.lastBlock()
+        start = first.blockNumber()
+        new_blocks = last.blockNumber() - start + 1
+        # Blocks the changed range covered before the edit
+        old_blocks = new_blocks - (block_count - self._block_count)
+        if start < 0 or old_blocks < 1 or start + old_blocks > len(self._block_words):
+            self.reset()  # out of step, which an edit should never cause
+            return
+        words = []
+        block = first
+        for _ in range(new_blocks):
+            words.append(self.block_words(block))
+            block = block.next()
+        for old in self._block_words[start:start + old_blocks]:
+            self.remove(old)
+        for new in words:
+            self.add(new)
+        self._block_words[start:start + old_blocks] = words
+        self._block_count = block_count
+
+    def lookup(self, prefix, limit=MAX_CANDIDATES):
+        """Identifiers starting with prefix, any case"""
+        prefix = prefix.lower()
+        keys = self._keys
+        out = []
+        i = bisect_left(keys, (prefix,))
+        while i < len(keys) and len(out) < limit and keys[i][0].startswith(prefix):
+            out.append(keys[i][1])
+            i += 1
+        return out
+
+def complete(prefix, pack=None):
+    """Ranked (word, detail, category) for prefix from the pack and every open buffer"""
+    found = {}
+    if pack is not None:
+        for word, detail, category in pack.lookup(prefix):
+            found[word] = (word, detail, category)
+    for buffer in list(_buffers):
+        for word in buffer.lookup(prefix):
+            if word not in found:
+                found[word] = (word, '', 'buffer')
+    # Nothing to add to what is typed already
+    found.pop(prefix, None)
+    # Same case as typed first, then the shortest
+    ranked = sorted(found.values(), key=lambda c: (not c[0].startswith(prefix), len(c[0]), c[0].lower()))
+    return ranked[:MAX_COMPLETIONS]
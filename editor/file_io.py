@@ -0,0 +1,323 @@
+import gzip
+import io
+import os
+import queue
+import shutil
+import tempfile
+import time
+from PyQt6.QtCore import QObject, QThread, QSemaphore, QTimer, pyqtSignal
+
+# Characters read per chunk handed to the GUI thread
+LOAD_CHUNK_SIZE = 256 * 1024
+# Chunks the reader may run ahead of the GUI thread
+LOAD_CHUNKS_IN_FLIGHT = 2
+
+# Documents with more characters than this are streamed to disk block by block
+STREAMING_SAVE_CHARS = 4 * 1024 * 1024
+# Characters per chunk handed to the saver, and chunks it may lag behind
+SAVE_CHUNK_SIZE = 256 * 1024
+SAVE_CHUNKS_IN_FLIGHT = 4
+# Time the GUI thread spends producing chunks per event loop turn
+STREAM_SLICE_MS = 10
+
+_END_OF_STREAM = object()
+
+# Scratch files favour speed over size; they only live until the tab is shown again
+SCRATCH_COMPRESS_LEVEL = 1
+
+# Permissions for newly created files, as open() would give them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Worker threads still running, so they can be stopped before the app exits
+_running_threads = set()
+# Scratch files not yet read back, removed when the app exits
+_scratch_files = set()
+
+def start_worker(thread):
+    """Start a worker thread and keep it alive until it finishes"""
+    _running_threads.add(thread)
+    thread.finished.connect(lambda: _running_threads.discard(thread))
+    thread.finished.connect(thread.deleteLater)
+    thread.start()
+
+def stop_all_workers():
+    for thread in list(_running_threads):
+        if hasattr(thread, 'flush'):
+            # Saves are finished rather than thrown away
+            thread.flush()
+            continue
+        thread.requestInterruption()
+        if hasattr(thread, 'cancel'):
+            thread.cancel()
+    for thread in list(_running_threads):
+        thread.wait()
+
+class FileLoader(QThread):
+    """Reads a text file on a worker thread and hands it to the GUI thread in chunks.
+
+    The receiver must call chunk_consumed() once it has inserted a chunk; the reader
+    never runs more than LOAD_CHUNKS_IN_FLIGHT chunks ahead of it.
+    """
+    chunkLoaded = pyqtSignal(str)
+    progressChanged = pyqtSignal(int)
+    loadFailed = pyqtSignal(str)
+    loadFinished = pyqtSignal()
+
+    def __init__(self, file_path, compressed=False, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.compressed = compressed
+        self._slots = QSemaphore(LOAD_CHUNKS_IN_FLIGHT)
+
+    def chunk_consumed(self):
+        self._slots.release()
+
+    def cancel(self):
+        self.requestInterruption()
+        # Wake the reader up if it is waiting for the GUI thread
+        self._slots.release(LOAD_CHUNKS_IN_FLIGHT)
+
+    def run(self):
+        try:
+            total = os.path.getsize(self.file_path)
+            raw = open(self.file_path, 'rb')
+            if self.compressed:
+                text = gzip.GzipFile(fileobj=raw, mode='rb')
+            else:
+                text = raw
+            # Progress follows the bytes read from disk, compressed or not
+            with raw, io.TextIOWrapper(text, encoding='utf-8', errors='ignore') as f:
+                while not self.isInterruptionRequested():
+                    chunk = f.read(LOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    while not self._slots.tryAcquire(1, 100):
+                        if self.isInterruptionRequested():
+                            return
+                    if self.isInterruptionRequested():
+                        return
+                    self.chunkLoaded.emit(chunk)
+                    if total:
+                        self.progressChanged.emit(min(100, raw.tell() * 100 // total))
+        except Exception as e:
+            if not self.isInterruptionRequested():
+                self.loadFailed.emit(str(e))
+            return
+        if not self.isInterruptionRequested():
+            self.loadFinished.emit()
+
+def write_atomic(file_path, chunks, fsync=False):
+    """Write text chunks to a temp file next to file_path, then rename it over file_path.
+
+    A crash mid-write leaves the original file untouched. With fsync the data (and on
+    POSIX the directory entry) is flushed to disk before returning.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(file_path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if fsync and os.name == 'posix':
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def write_scratch(chunks):
+    """Write text chunks to a new gzip-compressed scratch file and return its path"""
+    fd, path = tempfile.mkstemp(prefix='syn-scratch-', suffix='.gz')
+    _scratch_files.add(path)
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=SCRATCH_COMPRESS_LEVEL) as gz:
+                with io.TextIOWrapper(gz, encoding='utf-8', newline='') as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+    except BaseException:
+        remove_scratch(path)
+        raise
+    return path
+
+def remove_scratch(path):
+    _scratch_files.discard(path)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def remove_all_scratch():
+    for path in list(_scratch_files):
+        remove_scratch(path)
+
+def iter_document_chunks(document, chunk_size=SAVE_CHUNK_SIZE):
+    """Yield the text of a QTextDocument block by block, joined into chunks of about chunk_size characters"""
+    parts = []
+    size = 0
+    block = document.firstBlock()
+    while block.isValid():
+        text = block.text()
+        block = block.next()
+        if block.isValid():
+            text += '\n'
+        parts.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            yield ''.join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield ''.join(parts)
+
+class DocumentStreamer(QObject):
+    """Hands a document to a FileSaver chunk by chunk from the GUI thread.
+
+    Chunks are produced in short slices of the event loop and at most
+    SAVE_CHUNKS_IN_FLIGHT of them wait for the saver, so a save never holds more
+    than a few chunks of the document in memory. The document must not change
+    until streamFinished is emitted.
+    """
+    streamFinished = pyqtSignal()
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self._chunks = iter_document_chunks(document)
+        self._queue = queue.Queue(SAVE_CHUNKS_IN_FLIGHT)
+        self._next = None
+        # Set by the saver thread once it stops reading
+        self._closed = False
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.feed)
+
+    def start(self):
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._chunks = iter(())
+
+    def is_streaming(self):
+        return self._timer.isActive()
+
+    def feed(self, block=False):
+        """Queue chunks until the time slice is used up or the saver falls behind"""
+        deadline = time.perf_counter() + STREAM_SLICE_MS / 1000
+        while block or time.perf_counter() < deadline:
+            if self._next is None:
+                self._next = next(self._chunks, _END_OF_STREAM)
+            try:
+                self._queue.put(self._next, timeout=0.1 if block else None, block=block)
+            except queue.Full:
+                if self._closed:
+                    self.stop()
+                elif block:
+                    continue
+                return
+            if self._next is _END_OF_STREAM:
+                self._timer.stop()
+                self.streamFinished.emit()
+                return
+            self._next = None
+
+    def flush(self):
+        """Hand the rest of the document over now, waiting for the saver as needed"""
+        if self._timer.isActive():
+            self.feed(block=True)
+
+    def iter_chunks(self, should_stop):
+        """Chunks for the saver thread; raises if should_stop() turns true while waiting"""
+        try:
+            while True:
+                try:
+                    chunk = self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    if should_stop():
+                        raise RuntimeError('save was cancelled')
+                    continue
+                if chunk is _END_OF_STREAM:
+                    return
+                yield chunk
+        finally:
+            self._closed = True
+
+class FileSaver(QThread):
+    """Writes a document to disk on a worker thread with write_atomic.
+
+    text is either a snapshot string or a DocumentStreamer feeding the document
+    block by block.
+    """
+    saveFinished = pyqtSignal(str)
+    saveFailed = pyqtSignal(str)
+
+    def __init__(self, file_path, text, fsync=False, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.text = text
+        self.fsync = fsync
+
+    def flush(self):
+        if isinstance(self.text, DocumentStreamer):
+            self.text.flush()
+
+    def run(self):
+        if isinstance(self.text, DocumentStreamer):
+            chunks = self.text.iter_chunks(self.isInterruptionRequested)
+        else:
+            chunks = [self.text]
+        try:
+            write_atomic(self.file_path, chunks, self.fsync)
+        except Exception as e:
+            self.saveFailed.emit(str(e))
+            return
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+        self.saveFinished.emit(self.file_path)
+
+class ScratchWriter(QThread):
+    """Spills a document to a compressed scratch file on a worker thread with write_scratch.
+
+    The document is fed block by block by a DocumentStreamer, as for a streaming save.
+    """
+    spillFinished = pyqtSignal(str)
+    spillFailed = pyqtSignal(str)
+
+    def __init__(self, streamer, parent=None):
+        super().__init__(parent)
+        self.streamer = streamer
+
+    def flush(self):
+        if not self.isInterruptionRequested():
+            self.streamer.flush()
+
+    def cancel(self):
+        self.requestInterruption()
+        self.streamer.stop()
+
+    def run(self):
+        chunks = self.streamer.iter_chunks(self.isInterruptionRequested)
+        try:
+            path = write_scratch(chunks)
+        except Exception as e:
+            self.spillFailed.emit(str(e))
+            return
+        finally:
+            chunks.close()
+        self.spillFinished.emit(path)
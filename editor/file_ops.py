@@ -0,0 +1,193 @@
+import os
+import errno
+import shutil
+import tempfile
+from collections import deque
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from .file_io import start_worker
+
+# Files between progress reports
+PROGRESS_EVERY_FILES = 16
+
+class OperationCancelled(Exception):
+    pass
+
+def count_files(path):
+    """Files an operation on path will touch, for progress; a plain file counts as one"""
+    if not os.path.isdir(path) or os.path.islink(path):
+        return 1
+    return sum(len(files) + 1 for _, _, files in os.walk(path))
+
+def backup_path(path):
+    """Fresh place in the temp folder to keep a deleted item for undo"""
+    return os.path.join(tempfile.mkdtemp(prefix='deleted_'), os.path.basename(path))
+
+class FileOperationJob(QThread):
+    """Runs one batch of file operations on a worker thread.
+
+    ops are (kind, src, dst) with kind 'copy', 'move', 'remove' (dst unused) or
+    'restore' (a move out of a backup_path folder, which is then removed).
+    Each op stands alone: a failure is recorded and the rest of the batch goes on.
+    A cancelled copy, or a move that had to copy across drives, leaves nothing half
+    written behind.
+    """
+    progressChanged = pyqtSignal(int, int, str)  # files done, files total, current path
+    # completed ops, errors as (path, message), cancelled
+    jobFinished = pyqtSignal(list, list, bool)
+
+    def __init__(self, ops, parent=None):
+        super().__init__(parent)
+        self.ops = ops
+        self._done = 0
+        self._total = 0
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def run(self):
+        completed = []
+        errors = []
+        cancelled = False
+        counts = [count_files(src) if os.path.lexists(src) else 0 for _, src, _ in self.ops]
+        self._total = sum(counts)
+        self.progressChanged.emit(0, self._total, '')
+        for (kind, src, dst), count in zip(self.ops, counts):
+            if self.isInterruptionRequested():
+                cancelled = True
+                break
+            start = self._done
+            try:
+                if kind == 'copy':
+                    self.copy(src, dst)
+                elif kind == 'move':
+                    self.move(src, dst)
+                elif kind == 'remove':
+                    self.remove(src)
+                elif kind == 'restore':
+                    self.restore(src, dst)
+                completed.append((kind, src, dst))
+            except OperationCancelled:
+                cancelled = True
+                break
+            except OSError as e:
+                errors.append((src, e.strerror or str(e)))
+            self._done = start + count
+            self.progressChanged.emit(self._done, self._total, src)
+        self.progressChanged.emit(self._done, self._total, '')
+        self.jobFinished.emit(completed, errors, cancelled)
+
+    def step(self, path):
+        if self.isInterruptionRequested():
+            raise OperationCancelled()
+        self._done += 1
+        if self._done % PROGRESS_EVERY_FILES == 0:
+            self.progressChanged.emit(self._done, self._total, path)
+
+    def check_target(self, src, dst):
+        if dst.startswith(src.rstrip(os.sep) + os.sep):
+            raise OSError(errno.EINVAL, 'A folder cannot be put inside itself')
+        if os.path.lexists(dst):
+            raise FileExistsError(errno.EEXIST, f'{os.path.basename(dst)} already exists in the destination')
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+
+    def copy(self, src, dst):
+        self.check_target(src, dst)
+        try:
+            self.copy_tree(src, dst)
+        except BaseException:
+            # Half a copy is worse than none
+            self.discard(dst)
+            raise
+
+    def copy_tree(self, src, dst):
+        if os.path.islink(src) or not os.path.isdir(src):
+            self.step(src)
+            shutil.copy2(src, dst, follow_symlinks=False)
+            return
+        for dir_path, dir_names, file_names in os.walk(src):
+            target = os.path.join(dst, os.path.relpath(dir_path, src))
+            os.makedirs(target, exist_ok=True)
+            self.step(dir_path)
+            for name in file_names + [d for d in dir_names if os.path.islink(os.path.join(dir_path, d))]:
+                self.step(name)
+                shutil.copy2(os.path.join(dir_path, name), os.path.join(target, name), follow_symlinks=False)
+            shutil.copystat(dir_path, target)
+
+    def move(self, src, dst):
+        self.check_target(src, dst)
+        try:
+            os.rename(src, dst)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        # Another drive: copy, and only drop the source once the copy is complete
+        self.copy(src, dst)
+        self.remove(src)
+
+    def restore(self, backup, path):
+        """Move a deleted item back; its backup folder goes only once it is empty"""
+        self.move(backup, path)
+        try:
+            os.rmdir(os.path.dirname(backup))
+        except OSError:
+            pass
+
+    def remove(self, path):
+        if os.path.islink(path) or not os.path.isdir(path):
+            os.remove(path)
+        else:
+            shutil.rmtree(path)
+
+    def discard(self, path):
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.lexists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+class FileOperationQueue(QObject):
+    """Batches of file operations, run one after another off the GUI thread"""
+    jobStarted = pyqtSignal(str)
+    progressChanged = pyqtSignal(int, int, str)
+    # description, completed ops, errors, cancelled, context given to submit
+    jobFinished = pyqtSignal(str, list, list, bool, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._jobs = deque()
+        self._current = None
+
+    def submit(self, description, ops, context=None):
+        """Queue a batch; context comes back with jobFinished"""
+        if ops:
+            self._jobs.append((description, ops, context))
+            self.start_next()
+
+    def is_busy(self):
+        return self._current is not None
+
+    def cancel(self):
+        """Stop the running batch and drop the queued ones"""
+        self._jobs.clear()
+        if self._current is not None:
+            self._current[0].cancel()
+
+    def start_next(self):
+        if self._current is not None or not self._jobs:
+            return
+        description, ops, context = self._jobs.popleft()
+        job = FileOperationJob(ops)
+        self._current = (job, description, context)
+        job.progressChanged.connect(self.progressChanged)
+        job.jobFinished.connect(self.on_job_finished)
+        self.jobStarted.emit(description)
+        start_worker(job)
+
+    def on_job_finished(self, completed, errors, cancelled):
+        _, description, context = self._current
+        self._current = None
+        self.jobFinished.emit(description, completed, errors, cancelled, context)
+        self.start_next()
@@ -0,0 +1,370 @@
+import os
+import queue
+import sqlite3
+import hashlib
+import time
+import threading
+import concurrent.futures
+from PyQt6.QtCore import QThread, pyqtSignal
+from config_manager import CONFIG_DIR
+from .workspace_index import SKIPPED_DIRS
+from .ignore_rules import IgnoreRules, IGNORE_FILE
+from .text_search import get_pool, discard_pool, SEARCH_PROCESSES, SEARCH_BATCH_FILES, SEARCH_TASKS_IN_FLIGHT
+
+# Databases kept per workspace root
+INDEX_DIR = os.path.join(CONFIG_DIR, 'index')
+# Directories compared with the database between checks for new commands
+SYNC_SLICE_DIRS = 32
+# Seconds between full comparisons, which catch what watchers miss: files edited in
+# place and folders past MAX_WATCHED_DIRS
+RESYNC_INTERVAL = 300
+
+def index_path(root, suffix='.db'):
+    """Database file for a workspace root"""
+    key = os.path.normcase(os.path.realpath(root)).encode('utf-8', 'surrogateescape')
+    return os.path.join(INDEX_DIR, hashlib.sha1(key).hexdigest()[:16] + suffix)
+
+class FolderIndexer(QThread):
+    """Keeps a per-workspace database of file facts in line with the files on disk.
+
+    Opening a root compares every directory with the files table; after that only the
+    directories and files it is told about are looked at again. What the .gitignore
+    files exclude is left out, as in the file tree, and every RESYNC_INTERVAL the
+    whole folder is compared again. Changed files go in batches for `task` to the
+    process pool shared with find in files, and all writes happen on this thread.
+
+    task is a module-level function run in a worker, giving (path, mtime_ns, size,
+    payload) per file; write_indexed stores {relative path: (mtime_ns, size, payload)},
+    where payload None means gone. Subclasses pass both in and provide the schema.
+
+    Readers on other threads can trust the database for a root once synced_root is
+    that root, apart from the files unwritten() names.
+    """
+    readyChanged = pyqtSignal(str, bool)  # root, ready
+    # A batch of files has been written
+    indexChanged = pyqtSignal()
+
+    # Bumped by subclasses when their layout changes; older databases are rebuilt
+    INDEX_VERSION = 1
+    SCHEMA = ''
+    TABLES = ()
+    DB_SUFFIX = '.db'
+    # Cost of the collected results above which they are written out
+    WRITE_COST = 1
+
+    def __init__(self, task, write_indexed, parent=None):
+        super().__init__(parent)
+        self.task = task
+        self.write_indexed = write_indexed
+        self._commands = queue.Queue()
+        self._root = None
+        self._rules = None
+        self._db = None
+        self._ready = False
+        self._pending_dirs = []
+        self._full_sync = False
+        self._seen_dirs = set()
+        self._pending_files = {}  # relative path -> None, in arrival order
+        self._in_flight = {}  # future -> its batch of relative paths
+        # Files whose batch was lost to a broken pool once; a second loss drops them
+        self._retried = set()
+        self._indexed = {}  # relative path -> (mtime_ns, size, payload) not yet written
+        self._indexed_cost = 0
+        self._next_resync = float('inf')
+        # Relative paths queued and not written yet; update_file adds to it from other threads
+        self._unwritten = set()
+        self._unwritten_lock = threading.Lock()
+        # Root whose first full comparison has finished
+        self.synced_root = None
+
+    def wants(self, name):
+        """Whether a file name belongs in the index"""
+        return True
+
+    def result_cost(self, payload):
+        return 1
+
+    def set_root(self, root):
+        self._commands.put(('root', root))
+
+    def rescan(self, directory):
+        self._commands.put(('dir', directory))
+
+    def update_file(self, file_path):
+        rel = self.relative(file_path)
+        if rel is not None:
+            with self._unwritten_lock:
+                self._unwritten.add(rel)
+        self._commands.put(('file', file_path))
+
+    def unwritten(self):
+        """Relative paths whose database rows may be out of date; safe on any thread"""
+        with self._unwritten_lock:
+            return set(self._unwritten)
+
+    def queue_file(self, rel):
+        self._pending_files[rel] = None
+        with self._unwritten_lock:
+            self._unwritten.add(rel)
+
+    def forget_unwritten(self, rels):
+        with self._unwritten_lock:
+            self._unwritten.difference_update(rels)
+
+    def request_resync(self):
+        self._commands.put(('resync',))
+
+    def cancel(self):
+        self._commands.put(None)
+
+    def has_work(self):
+        return bool(self._pending_dirs or self._pending_files or self._in_flight or self._indexed)
+
+    def run(self):
+        try:
+            while not self.isInterruptionRequested():
+                try:
+                    command = self._commands.get(timeout=0 if self.has_work() else 0.1)
+                except queue.Empty:
+                    if self._pending_dirs:
+                        self.sync_slice()
+                    elif self._pending_files or self._in_flight:
+                        self.index_step()
+                    elif self._indexed:
+                        self.flush_indexed()
+                    elif self._db is not None and time.monotonic() >= self._next_resync:
+                        self.resync()
+                    self.set_ready(self._db is not None and not self.has_work())
+                    continue
+                if command is None:
+                    return
+                kind = command[0]
+                if kind == 'root':
+                    self.open_root(command[1])
+                elif self._db is None:
+                    continue
+                elif kind == 'resync':
+                    if not self._full_sync:
+                        self.resync()
+                elif kind == 'dir':
+                    rel_dir = self.relative(command[1])
+                    if rel_dir is not None and not self.is_excluded(rel_dir, True):
+                        self.sync_dir(rel_dir)
+                elif kind == 'file':
+                    rel = self.relative(command[1])
+                    if rel is None:
+                        continue
+                    excluded = self.is_excluded(rel, False)
+                    if not excluded and rel.rpartition('/')[2] == IGNORE_FILE:
+                        self.sync_dir(rel.rpartition('/')[0])
+                    if not excluded and self.wants(rel.rpartition('/')[2]):
+                        self.queue_file(rel)
+                    elif rel not in self._pending_files:
+                        self.forget_unwritten([rel])
+                self.set_ready(self._db is not None and not self.has_work())
+        finally:
+            for future in self._in_flight:
+                future.cancel()
+            if self._db is not None:
+                self._db.close()
+
+    def set_ready(self, ready):
+        if ready != self._ready:
+            self._ready = ready
+            self.readyChanged.emit(self._root or '', ready)
+
+    def open_root(self, root):
+        for future in self._in_flight:
+            future.cancel()
+        self._in_flight = {}
+        self._retried = set()
+        self._pending_files = {}
+        self._pending_dirs = []
+        self._indexed = {}
+        self._indexed_cost = 0
+        with self._unwritten_lock:
+            self._unwritten = set()
+        self.synced_root = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        self._root = root
+        self._rules = IgnoreRules(root) if root else None
+        self.set_ready(False)
+        if not root:
+            return
+        try:
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            self._db = self.connect(index_path(root, self.DB_SUFFIX))
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error opening index: {e}")
+            return
+        self.resync()
+
+    def resync(self):
+        """Compare every directory with the database again; files deleted meanwhile go at the end"""
+        self._pending_dirs = ['']
+        self._full_sync = True
+        self._seen_dirs = set()
+
+    def connect(self, db_path):
+        db = sqlite3.connect(db_path)
+        if db.execute('PRAGMA user_version').fetchone()[0] != self.INDEX_VERSION:
+            db.executescript(''.join(f'DROP TABLE IF EXISTS {table};' for table in self.TABLES))
+        # Readers query while this thread writes
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.executescript(self.SCHEMA)
+        db.execute(f'PRAGMA user_version = {self.INDEX_VERSION}')
+        db.commit()
+        return db
+
+    def relative(self, path):
+        if not self._root:
+            return None
+        rel = os.path.relpath(path, self._root)
+        if rel == '..' or rel.startswith('..' + os.sep):
+            return None
+        return '' if rel == '.' else rel.replace(os.sep, '/')
+
+    def is_ignored(self, rel, is_dir):
+        return self._rules.is_ignored(self._rules.root + '/' + rel, is_dir)
+
+    def is_excluded(self, rel, is_dir):
+        """Whether rel is left out of the index, itself or through a folder it is in"""
+        if not rel:
+            return False
+        folder, _, name = rel.rpartition('/')
+        if self.is_excluded(folder, True):
+            return True
+        return (is_dir and name in SKIPPED_DIRS) or self.is_ignored(rel, is_dir)
+
+    def sync_slice(self):
+        for _ in range(SYNC_SLICE_DIRS):
+            if not self._pending_dirs:
+                break
+            self.sync_dir(self._pending_dirs.pop())
+        if not self._pending_dirs and self._full_sync:
+            self._full_sync = False
+            self._next_resync = time.monotonic() + RESYNC_INTERVAL
+            gone = [d for d, in self._db.execute('SELECT DISTINCT dir FROM files') if d not in self._seen_dirs]
+            for rel_dir in gone:
+                self.delete_files('dir = ?', (rel_dir,))
+            self._seen_dirs = set()
+            self._db.commit()
+            self.synced_root = self._root
+
+    def sync_dir(self, rel_dir):
+        """Queue the changed files of one directory and forget the removed ones"""
+        path = os.path.join(self._root, rel_dir) if rel_dir else self._root
+        if self._rules.invalidate(path):
+            # An edited .gitignore may change what belongs anywhere below
+            self.resync()
+            return
+        files = {}
+        dirs = set()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    rel = rel_dir + '/' + entry.name if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIPPED_DIRS and not self.is_ignored(rel, True):
+                                dirs.add(rel)
+                        elif self.wants(entry.name) and entry.is_file() and not self.is_ignored(rel, False):
+                            st = entry.stat()
+                            files[rel] = (st.st_mtime_ns, st.st_size)
+                    except OSError:
+                        pass
+        except OSError:
+            dirs = None
+        if self._full_sync:
+            self._seen_dirs.add(rel_dir)
+        if dirs is None:
+            # The directory is gone, and everything below it
+            self.delete_files('dir = ?', (rel_dir,))
+            self.delete_below(rel_dir)
+            self._db.commit()
+            return
+        known = {p: (m, s) for p, m, s in self._db.execute('SELECT path, mtime_ns, size FROM files WHERE dir = ?', (rel_dir,))}
+        for rel in known.keys() - files.keys():
+            self.delete_files('path = ?', (rel,))
+        for rel, stat in files.items():
+            if known.get(rel) != stat:
+                self.queue_file(rel)
+        if self._full_sync:
+            self._pending_dirs.extend(dirs)
+        else:
+            prefix = rel_dir + '/' if rel_dir else ''
+            known_dirs = {prefix + d[len(prefix):].split('/', 1)[0]
+                          for d, in self._db.execute('SELECT DISTINCT dir FROM files WHERE dir >= ? AND dir < ?', self.below(rel_dir))}
+            for sub in known_dirs - dirs:
+                self.delete_files('dir = ?', (sub,))
+                self.delete_below(sub)
+            # New folders have no watcher yet, so they are compared here
+            self._pending_dirs.extend(dirs - known_dirs)
+        self._db.commit()
+
+    def below(self, rel_dir):
+        """Range of dir values strictly inside rel_dir"""
+        if not rel_dir:
+            return '\x01', '\U0010ffff'
+        # '0' follows '/', so this covers every 'rel_dir/...' and nothing else
+        return rel_dir + '/', rel_dir + '0'
+
+    def delete_below(self, rel_dir):
+        self.delete_files('dir >= ? AND dir < ?', self.below(rel_dir))
+
+    def delete_files(self, where, args):
+        self._db.execute(f'DELETE FROM files WHERE {where}', args)
+
+    def index_step(self):
+        """Hand pending files to the pool and collect what comes back"""
+        pool = get_pool()
+        try:
+            while self._pending_files and len(self._in_flight) < SEARCH_PROCESSES * SEARCH_TASKS_IN_FLIGHT:
+                batch = []
+                while self._pending_files and len(batch) < SEARCH_BATCH_FILES:
+                    rel = next(iter(self._pending_files))
+                    del self._pending_files[rel]
+                    batch.append(rel)
+                self._in_flight[pool.submit(self.task, [os.path.join(self._root, rel) for rel in batch])] = batch
+        except concurrent.futures.BrokenExecutor:
+            self.pool_broke(pool, batch)
+        done, _ = concurrent.futures.wait(self._in_flight, timeout=0.05, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            batch = self._in_flight.pop(future)
+            try:
+                results = future.result()
+            except concurrent.futures.CancelledError:
+                continue
+            except concurrent.futures.BrokenExecutor:
+                self.pool_broke(pool, batch)
+                continue
+            for file_path, mtime_ns, size, payload in results:
+                rel = self.relative(file_path)
+                if rel is not None:
+                    self._indexed[rel] = (mtime_ns, size, payload)
+                    self._indexed_cost += self.result_cost(payload)
+        if self._indexed_cost >= self.WRITE_COST:
+            self.flush_indexed()
+
+    def pool_broke(self, pool, batch):
+        """A worker died: start over on a new pool and queue the batch again, once"""
+        discard_pool(pool)
+        for rel in batch:
+            if rel in self._retried:
+                print(f"Error indexing {rel}: the worker process died twice")
+                self.forget_unwritten([rel])
+            else:
+                self._retried.add(rel)
+                self._pending_files[rel] = None
+
+    def flush_indexed(self):
+        indexed = self._indexed
+        self._indexed = {}
+        self._indexed_cost = 0
+        self.write_indexed(indexed)
+        # Files queued again meanwhile stay unwritten
+        self.forget_unwritten([rel for rel in indexed if rel not in self._pending_files])
+        self.indexChanged.emit()
@@ -0,0 +1,188 @@
+import os
+import re
+from PyQt6.QtCore import QSortFilterProxyModel
+
+# Never shown, whatever the ignore files say
+ALWAYS_IGNORED = {'.git', '.hg', '.svn'}
+IGNORE_FILE = '.gitignore'
+
+def glob_to_regex(glob):
+    """Regex source for a gitignore glob; '*' and '?' stay within one path component"""
+    out = []
+    i = 0
+    n = len(glob)
+    while i < n:
+        c = glob[i]
+        if c == '*':
+            if glob.startswith('**', i) and (i == 0 or glob[i - 1] == '/'):
+                if glob[i + 2:i + 3] == '/':
+                    out.append('(?:.*/)?')  # leading or inner '**/': any number of folders
+                    i += 3
+                    continue
+                if i + 2 == n:
+                    out.append('.*')  # trailing '/**': everything inside
+                    i += 2
+                    continue
+            while i + 1 < n and glob[i + 1] == '*':
+                i += 1
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = i + 1
+            if j < n and glob[j] in '!^':
+                j += 1
+            if j < n and glob[j] == ']':
+                j += 1
+            j = glob.find(']', j)
+            if j < 0:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:j]
+                if body[:1] in ('!', '^'):
+                    body = '^' + body[1:]
+                out.append('[' + body + ']')
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+def compile_pattern(line):
+    """(match, negated, dir_only, anchored) for one line of an ignore file, or None"""
+    line = line.rstrip('\r\n')
+    if not line or line.startswith('#'):
+        return None
+    # Trailing spaces are dropped unless escaped
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '
+    line = stripped
+    negated = line.startswith('!')
+    if negated:
+        line = line[1:]
+    elif line.startswith(('\\!', '\\#')):
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    # A slash anywhere but at the end ties the pattern to the ignore file's folder
+    anchored = '/' in line
+    try:
+        match = re.compile(glob_to_regex(line.lstrip('/')) + r'\Z').match
+    except re.error:
+        return None
+    return match, negated, dir_only, anchored
+
+def read_patterns(file_path):
+    try:
+        with open(file_path, encoding='utf-8', errors='replace') as f:
+            return [p for p in map(compile_pattern, f) if p is not None]
+    except OSError:
+        return []
+
+def file_stamp(file_path):
+    try:
+        st = os.stat(file_path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+class IgnoreRules:
+    """The .gitignore rules of a workspace, read lazily per folder with answers cached per folder.
+
+    Paths use '/' separators, as QFileSystemModel reports them. Folders that are ignored
+    are never looked into, so their own ignore files are never read.
+    """
+    def __init__(self, root):
+        self.root = root.replace(os.sep, '/').rstrip('/')
+        self._patterns = {}  # folder -> (stamp of its ignore file, patterns)
+        self._chains = {}  # folder -> [(folder, patterns)] from the root down, non-empty only
+        self._results = {}  # folder -> {name or name/: ignored}
+
+    def patterns(self, folder):
+        entry = self._patterns.get(folder)
+        if entry is None:
+            ignore_file = folder + '/' + IGNORE_FILE
+            patterns = read_patterns(ignore_file)
+            if folder == self.root:
+                patterns = read_patterns(folder + '/.git/info/exclude') + patterns
+            entry = self._patterns[folder] = (file_stamp(ignore_file), patterns)
+        return entry[1]
+
+    def chain(self, folder):
+        chain = self._chains.get(folder)
+        if chain is None:
+            if folder == self.root:
+                chain = []
+            else:
+                chain = list(self.chain(folder.rsplit('/', 1)[0]))
+            patterns = self.patterns(folder)
+            if patterns:
+                chain.append((folder, patterns))
+            self._chains[folder] = chain
+        return chain
+
+    def contains(self, path):
+        return path.startswith(self.root + '/')
+
+    def is_ignored(self, path, is_dir):
+        """Whether path, somewhere below the root, is excluded from the tree"""
+        folder, _, name = path.rpartition('/')
+        results = self._results.get(folder)
+        if results is None:
+            results = self._results[folder] = {}
+        key = name + '/' if is_dir else name
+        ignored = results.get(key)
+        if ignored is None:
+            ignored = results[key] = self.match(folder, name, is_dir)
+        return ignored
+
+    def match(self, folder, name, is_dir):
+        if name in ALWAYS_IGNORED:
+            return True
+        # Deeper ignore files win, and within one file the last matching line wins
+        for base, patterns in reversed(self.chain(folder)):
+            rel = (folder + '/' + name)[len(base) + 1:]
+            for match, negated, dir_only, anchored in reversed(patterns):
+                if dir_only and not is_dir:
+                    continue
+                if match(rel if anchored else name):
+                    return not negated
+        return False
+
+    def invalidate(self, folder):
+        """Forget what depends on folder's ignore file if it changed; True if it did"""
+        folder = folder.replace(os.sep, '/').rstrip('/')
+        entry = self._patterns.get(folder)
+        if entry is None or entry[0] == file_stamp(folder + '/' + IGNORE_FILE):
+            return False
+        prefix = folder + '/'
+        for cache in (self._patterns, self._chains, self._results):
+            for key in [k for k in cache if k == folder or k.startswith(prefix)]:
+                del cache[key]
+        return True
+
+class IgnoreFilterModel(QSortFilterProxyModel):
+    """Hides the ignored entries of a QFileSystemModel; the view never expands into them"""
+    def __init__(self, rules, parent=None):
+        super().__init__(parent)
+        self.rules = rules
+
+    def set_rules(self, rules):
+        self.rules = rules
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.rules is None:
+            return True
+        model = self.sourceModel()
+        index = model.index(source_row, 0, source_parent)
+        path = model.filePath(index)
+        if not self.rules.contains(path):
+            return True  # the root and the folders above it
+        return not self.rules.is_ignored(path, model.isDir(index))
@@ -0,0 +1,231 @@
+import ast
+import re
+import hashlib
+import multiprocessing
+import concurrent.futures
+from collections import OrderedDict
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# Outlines kept per content hash on the GUI side, and parsed chunks kept by the worker
+OUTLINE_CACHE = 64
+CHUNK_CACHE = 20000
+PYTHON_EXTENSIONS = {'.py', '.pyw', '.pyi'}
+
+# Chunks glued to the next ones when they do not parse alone, e.g. a call spread over lines
+MAX_CHUNK_MERGE = 8
+
+_DEF_RE = re.compile(r'^([ \t]*)(?:async[ \t]+)?(def|class)[ \t]+([A-Za-z_]\w*)', re.MULTILINE)
+# Lines at column 0 that start a statement, rather than continue the one above
+_STATEMENT_RE = re.compile(r'\n(?![ \t\r\n#)\]}]|(?:else|elif|except|finally)\b)')
+
+_pool = None
+_chunk_cache = OrderedDict()  # lives in the worker process
+
+def string_spans(text):
+    """(start, end) of the triple-quoted strings, found with plain str.find for speed"""
+    spans = []
+    found = {q: text.find(q) for q in ('"""', "'''")}
+    while True:
+        quote = min((q for q in found if found[q] >= 0), key=found.get, default=None)
+        if quote is None:
+            return spans
+        start = found[quote]
+        end = text.find(quote, start + 3)
+        if end < 0:
+            spans.append((start, len(text)))
+            return spans
+        spans.append((start, end + 3))
+        for q in found:
+            if 0 <= found[q] < end + 3:
+                found[q] = text.find(q, end + 3)
+
+def split_chunks(text):
+    """(first line index, source) of each top-level statement, decorators included"""
+    strings = string_spans(text)
+    chunks = []
+    start = 0
+    line = 0
+    inside = 0
+    previous = 0
+    for match in _STATEMENT_RE.finditer(text):
+        pos = match.start() + 1
+        if pos >= len(text):
+            break
+        while inside < len(strings) and strings[inside][1] <= pos:
+            inside += 1
+        if inside < len(strings) and strings[inside][0] < pos:
+            continue
+        # A decorator and the definition below it stay together
+        decorated = text[previous] == '@'
+        previous = pos
+        if decorated:
+            continue
+        chunks.append((line, text[start:pos]))
+        line += text.count('\n', start, pos)
+        start = pos
+    if start < len(text):
+        chunks.append((line, text[start:]))
+    return chunks
+
+def collect_defs(body, depth, in_class, out):
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            out.append(('method' if in_class else 'function', node.name, node.lineno, depth))
+            collect_defs(node.body, depth + 1, False, out)
+        elif isinstance(node, ast.ClassDef):
+            out.append(('class', node.name, node.lineno, depth))
+            collect_defs(node.body, depth + 1, True, out)
+        else:
+            # Definitions under if/try/with/for still count; expressions are never entered
+            for field in ('body', 'orelse', 'finalbody', 'handlers', 'cases'):
+                children = getattr(node, field, None)
+                if children:
+                    collect_defs(children, depth, in_class, out)
+
+def regex_outline(source):
+    """Outline from def/class lines alone, for code that does not parse"""
+    out = []
+    indents = []  # (indent, kind) of the enclosing definitions
+    for match in _DEF_RE.finditer(source):
+        indent = len(match.group(1).expandtabs())
+        while indents and indents[-1][0] >= indent:
+            indents.pop()
+        in_class = bool(indents) and indents[-1][1] == 'class'
+        kind = match.group(2)
+        if kind == 'def':
+            kind = 'method' if in_class else 'function'
+        line = source.count('\n', 0, match.start()) + 1
+        out.append((kind, match.group(3), line, len(indents)))
+        indents.append((indent, kind))
+    return out
+
+def chunk_outline(source):
+    """Outline of one chunk, or None if it does not parse"""
+    try:
+        tree = compile(source, '<outline>', 'exec', ast.PyCF_ONLY_AST)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return None
+    out = []
+    collect_defs(tree.body, 0, False, out)
+    return out
+
+def parse_outline(text):
+    """Outline of a whole file parsed in one go, for files read once such as by the symbol index"""
+    entries = chunk_outline(text)
+    return regex_outline(text) if entries is None else entries
+
+def cached_chunk_outline(source):
+    key = hashlib.blake2b(source.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    entries = _chunk_cache.get(key, _chunk_cache)
+    if entries is _chunk_cache:
+        entries = _chunk_cache[key] = chunk_outline(source)
+        if len(_chunk_cache) > CHUNK_CACHE:
+            _chunk_cache.popitem(last=False)
+    else:
+        _chunk_cache.move_to_end(key)
+    return entries
+
+def python_outline(text):
+    """Task run in the outline process: [(kind, name, line, depth)] for Python source.
+
+    Only top-level statements that changed since the last call are parsed again; the
+    rest come from a cache of chunk outlines, so typing in a huge module stays cheap.
+    """
+    outline = []
+    chunks = split_chunks(text)
+    i = 0
+    while i < len(chunks):
+        first, source = chunks[i]
+        entries = cached_chunk_outline(source)
+        end = i + 1
+        if entries is None:
+            # Try the statement together with the next few, then settle for def/class lines
+            merged = source
+            while entries is None and end < len(chunks) and end - i <= MAX_CHUNK_MERGE:
+                merged += chunks[end][1]
+                end += 1
+                entries = cached_chunk_outline(merged)
+            if entries is None:
+                entries = regex_outline(source)
+                end = i + 1
+        outline.extend((kind, name, line + first, depth) for kind, name, line, depth in entries)
+        i = end
+    return outline
+
+def get_outline_pool():
+    """A single worker process of its own, so outlines never wait behind searches"""
+    global _pool
+    if _pool is None:
+        _pool = concurrent.futures.ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+def shutdown_outline_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def submit_outline(text):
+    """Hand text to the outline worker, starting a new one if the last one died"""
+    try:
+        return get_outline_pool().submit(python_outline, text)
+    except concurrent.futures.BrokenExecutor:
+        shutdown_outline_pool()
+        return get_outline_pool().submit(python_outline, text)
+
+class OutlineParser(QObject):
+    """Parses buffers for the outline off the GUI thread; only the newest request is answered"""
+    outlineReady = pyqtSignal(int, list)  # request id, outline
+    # Emitted from the pool's callback thread and delivered on the GUI thread
+    _parsed = pyqtSignal(int, bytes, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._request_id = 0
+        self._future = None
+        self._cache = OrderedDict()  # content hash -> outline
+        self._parsed.connect(self.on_parsed)
+
+    def parse(self, text):
+        """Start parsing text; the answer comes through outlineReady with the returned id"""
+        self.cancel()
+        self._request_id += 1
+        request_id = self._request_id
+        key = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        outline = self._cache.get(key)
+        if outline is not None:
+            self._cache.move_to_end(key)
+            self.outlineReady.emit(request_id, outline)
+            return request_id
+        try:
+            self._future = submit_outline(text)
+        except RuntimeError:
+            return request_id  # the interpreter is shutting down
+        self._future.add_done_callback(lambda f: self.on_future_done(f, request_id, key))
+        return request_id
+
+    def cancel(self):
+        """Drop the running request; a parse already underway is finished and ignored"""
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+        self._request_id += 1
+
+    def on_future_done(self, future, request_id, key):
+        if future.cancelled():
+            return
+        try:
+            outline = future.result()
+        except Exception:
+            outline = None
+        self._parsed.emit(request_id, key, outline)
+
+    def on_parsed(self, request_id, key, outline):
+        if outline is None:
+            return
+        self._cache[key] = outline
+        if len(self._cache) > OUTLINE_CACHE:
+            self._cache.popitem(last=False)
+        if request_id == self._request_id:
+            self._future = None
+            self.outlineReady.emit(request_id, outline)
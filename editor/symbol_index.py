@@ -0,0 +1,145 @@
+import os
+import sqlite3
+from PyQt6.QtCore import QObject, pyqtSignal
+from .file_io import start_worker
+from .folder_index import FolderIndexer, index_path
+from .outline import parse_outline, PYTHON_EXTENSIONS
+from .text_search import MAX_SEARCH_FILE_SIZE
+
+# Bumped when the layout of the database changes; older databases are rebuilt
+SYMBOL_INDEX_VERSION = 1
+SYMBOL_DB_SUFFIX = '.symbols.db'
+# Files whose symbols are collected before they are written in one transaction
+SYMBOL_WRITE_FILES = 256
+# Symbols returned per lookup
+SYMBOL_RESULTS = 50
+
+# Symbols are found by prefix on key, their lowercased name without leading underscores.
+# Files get a new id whenever they are reindexed and their old symbols go with the old id.
+SYMBOL_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT UNIQUE NOT NULL,
+    dir TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE TABLE IF NOT EXISTS symbols (
+    file INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    container TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS symbols_key ON symbols(key);
+CREATE INDEX IF NOT EXISTS symbols_file ON symbols(file);
+'''
+
+def symbol_key(name):
+    return name.lstrip('_').lower() or name.lower()
+
+def file_symbols(file_paths):
+    """Task run in a worker process: (path, mtime_ns, size, [(name, kind, line, container)]) per file"""
+    results = []
+    for file_path in file_paths:
+        try:
+            st = os.stat(file_path)
+            symbols = []
+            if st.st_size <= MAX_SEARCH_FILE_SIZE:
+                with open(file_path, 'rb') as f:
+                    text = f.read().decode('utf-8', errors='replace')
+                containers = []
+                for kind, name, line, depth in parse_outline(text):
+                    del containers[depth:]
+                    symbols.append((name, kind, line, '.'.join(containers)))
+                    containers.append(name)
+            results.append((file_path, st.st_mtime_ns, st.st_size, symbols))
+        except OSError:
+            results.append((file_path, None, None, None))
+    return results
+
+def prefix_range(key):
+    """Bounds of the keys starting with key"""
+    return key, key[:-1] + chr(ord(key[-1]) + 1)
+
+class SymbolIndexer(FolderIndexer):
+    """Keeps the class and function definitions of a workspace's Python files in a database"""
+    SCHEMA = SYMBOL_SCHEMA
+    TABLES = ('files', 'symbols')
+    INDEX_VERSION = SYMBOL_INDEX_VERSION
+    DB_SUFFIX = SYMBOL_DB_SUFFIX
+    WRITE_COST = SYMBOL_WRITE_FILES
+
+    def __init__(self, parent=None):
+        super().__init__(file_symbols, self.write_symbols, parent)
+
+    def wants(self, name):
+        return os.path.splitext(name)[1].lower() in PYTHON_EXTENSIONS
+
+    def delete_files(self, where, args):
+        self._db.execute(f'DELETE FROM symbols WHERE file IN (SELECT id FROM files WHERE {where})', args)
+        super().delete_files(where, args)
+
+    def write_symbols(self, indexed):
+        db = self._db
+        rows = []
+        for rel, (mtime_ns, size, symbols) in indexed.items():
+            self.delete_files('path = ?', (rel,))
+            if symbols is None:
+                continue  # gone or unreadable
+            file_id = db.execute('INSERT INTO files (path, dir, mtime_ns, size) VALUES (?, ?, ?, ?)',
+                                 (rel, rel.rpartition('/')[0], mtime_ns, size)).lastrowid
+            rows.extend((file_id, symbol_key(name), name, kind, line, container)
+                        for name, kind, line, container in symbols)
+        db.executemany('INSERT INTO symbols (file, key, name, kind, line, container) VALUES (?, ?, ?, ?, ?, ?)', rows)
+        db.commit()
+
+class SymbolIndex(QObject):
+    """GUI-side handle on the symbol indexer; lookups read the database directly"""
+    # More symbols have been written
+    indexChanged = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = None
+        self._db = None
+        self._indexer = SymbolIndexer()
+        self._indexer.indexChanged.connect(self.indexChanged)
+        start_worker(self._indexer)
+
+    def set_root(self, root):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        self.root = root
+        self._indexer.set_root(root)
+
+    def rescan(self, directory):
+        self._indexer.rescan(directory)
+
+    def update_file(self, file_path):
+        self._indexer.update_file(file_path)
+
+    def refresh(self):
+        """Compare the whole folder with the index soon, for edits no watcher reported"""
+        self._indexer.request_resync()
+
+    def lookup(self, text):
+        """[(name, kind, path, line, container)] of the symbols whose name starts with text"""
+        key = symbol_key(text.strip())
+        if not key or not self.root:
+            return []
+        if self._db is None:
+            db_path = index_path(self.root, SYMBOL_DB_SUFFIX)
+            if not os.path.exists(db_path):
+                return []  # the indexer has not created it yet
+            self._db = sqlite3.connect(db_path)
+        try:
+            rows = self._db.execute(
+                'SELECT s.name, s.kind, f.path, s.line, s.container FROM symbols s JOIN files f ON f.id = s.file '
+                'WHERE s.key >= ? AND s.key < ? ORDER BY s.key LIMIT ?', (*prefix_range(key), SYMBOL_RESULTS)).fetchall()
+        except sqlite3.Error:
+            return []
+        return [(name, kind, os.path.join(self.root, path), line, container) for name, kind, path, line, container in rows]
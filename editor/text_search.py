@@ -0,0 +1,157 @@
+import os
+import re
+import concurrent.futures
+import multiprocessing
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+from .workspace_index import SKIPPED_DIRS
+from .ignore_rules import IgnoreRules
+
+# Worker processes grepping files; one core is left for the GUI
+SEARCH_PROCESSES = max(1, (os.cpu_count() or 2) - 1)
+# Files handed to a worker process per task
+SEARCH_BATCH_FILES = 32
+# Tasks queued per worker process before the walk waits for results
+SEARCH_TASKS_IN_FLIGHT = 4
+# Matches kept per file, and for a whole search
+MAX_MATCHES_PER_FILE = 100
+MAX_MATCHES = 20000
+# Longer files are skipped, as are files with a NUL byte in their first block
+MAX_SEARCH_FILE_SIZE = 16 * 1024 * 1024
+BINARY_SNIFF_BYTES = 8192
+# Characters of a matching line kept for display
+PREVIEW_CHARS = 200
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """The shared process pool, started on first use; searches and the trigram index both use it"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, not forked: forking a process with Qt threads running is not safe
+            _pool = concurrent.futures.ProcessPoolExecutor(SEARCH_PROCESSES, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+def discard_pool(pool):
+    """Drop a pool that broke, e.g. after a worker crashed; the next get_pool() starts a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def compile_query(text, regex=False, case_sensitive=False):
+    """Pattern for a search; raises re.error for an invalid regex"""
+    return re.compile(text if regex else re.escape(text), 0 if case_sensitive else re.IGNORECASE)
+
+def search_file(file_path, pattern):
+    """(line number, column, preview) of the matches in one text file, up to MAX_MATCHES_PER_FILE"""
+    matches = []
+    try:
+        if os.path.getsize(file_path) > MAX_SEARCH_FILE_SIZE:
+            return matches
+        with open(file_path, 'rb') as f:
+            if b'\0' in f.read(BINARY_SNIFF_BYTES):
+                return matches
+            f.seek(0)
+            for line_number, raw in enumerate(f, 1):
+                line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+                match = pattern.search(line)
+                if match:
+                    matches.append((line_number, match.start(), line[:PREVIEW_CHARS]))
+                    if len(matches) >= MAX_MATCHES_PER_FILE:
+                        break
+    except OSError:
+        pass
+    return matches
+
+def search_files(file_paths, pattern_source, flags):
+    """Task run in a worker process: [(file path, matches)] for the files that matched"""
+    pattern = re.compile(pattern_source, flags)
+    results = []
+    for file_path in file_paths:
+        matches = search_file(file_path, pattern)
+        if matches:
+            results.append((file_path, matches))
+    return results
+
+def iter_search_files(root):
+    """Files under root, leaving out what the .gitignore files exclude, as the file tree does"""
+    rules = IgnoreRules(root)
+    for dir_path, dir_names, file_names in os.walk(root):
+        folder = dir_path.replace(os.sep, '/').rstrip('/')
+        dir_names[:] = [d for d in dir_names if d not in SKIPPED_DIRS and not rules.is_ignored(folder + '/' + d, True)]
+        for name in file_names:
+            if not rules.is_ignored(folder + '/' + name, False):
+                yield os.path.join(dir_path, name)
+
+class TextSearch(QThread):
+    """Greps every file under root with the shared process pool, streaming results back.
+
+    The walk runs on this thread and hands files to the pool in batches; only a few
+    batches per process are queued at a time, so stopping a search is quick and
+    nothing piles up in memory.
+    """
+    resultsFound = pyqtSignal(list)
+    searchFinished = pyqtSignal(int, int)  # files searched, matches found
+
+    def __init__(self, root, pattern, index=None, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.pattern = pattern
+        # Trigram index narrowing the files to read
+        self.index = index
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def run(self):
+        pool = get_pool()
+        in_flight = set()
+        batch = []
+        searched = 0
+        found = 0
+        candidates = self.index.candidates(self.root, self.pattern) if self.index is not None else None
+        files = iter(candidates) if candidates is not None else iter_search_files(self.root)
+        try:
+            while not self.isInterruptionRequested() and found < MAX_MATCHES:
+                if len(in_flight) < SEARCH_PROCESSES * SEARCH_TASKS_IN_FLIGHT and files is not None:
+                    file_path = next(files, None)
+                    if file_path is not None:
+                        batch.append(file_path)
+                        if len(batch) < SEARCH_BATCH_FILES:
+                            continue
+                    else:
+                        files = None
+                    if batch:
+                        in_flight.add(pool.submit(search_files, batch, self.pattern.pattern, self.pattern.flags))
+                        searched += len(batch)
+                        batch = []
+                    continue
+                if not in_flight:
+                    break
+                done, in_flight = concurrent.futures.wait(in_flight, timeout=0.1, return_when=concurrent.futures.FIRST_COMPLETED)
+                results = []
+                for future in done:
+                    results.extend(future.result())
+                if results and not self.isInterruptionRequested():
+                    found += sum(len(matches) for _, matches in results)
+                    self.resultsFound.emit(results)
+        except concurrent.futures.BrokenExecutor as e:
+            # A worker died, on a huge file or a crash; the search ends with what it has
+            print(f"Error searching files: {e}")
+            discard_pool(pool)
+        finally:
+            for future in in_flight:
+                future.cancel()
+        if not self.isInterruptionRequested():
+            self.searchFinished.emit(searched, found)
@@ -0,0 +1,265 @@
+import os
+import re
+import sqlite3
+from itertools import groupby
+from array import array
+try:
+    from re import _parser as sre_parse
+except ImportError:  # before Python 3.11
+    import sre_parse
+from PyQt6.QtCore import QObject
+from .file_io import start_worker
+from .folder_index import FolderIndexer, index_path
+from .text_search import MAX_SEARCH_FILE_SIZE, BINARY_SNIFF_BYTES
+
+# Bumped when the layout of the database changes; older databases are rebuilt
+INDEX_VERSION = 1
+# Trigram/file pairs collected in memory before they are written out as a segment
+SEGMENT_PAIRS = 4 * 1024 * 1024
+# Segments of one level merged into a single segment of the next level
+MERGE_SEGMENTS = 4
+# Trigrams of a query looked up; more only narrow a list that is already short
+MAX_QUERY_TRIGRAMS = 12
+# File ids looked up per statement, under SQLite's limit on parameters
+SQL_BATCH = 500
+
+# Each segment holds, per trigram, the ids of the files containing it packed into a blob.
+# Files get a new id whenever they are reindexed, so ids of changed and deleted files
+# simply stop resolving and are dropped when their segment is merged.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT UNIQUE NOT NULL,
+    dir TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    level INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    trigram INTEGER NOT NULL,
+    segment INTEGER NOT NULL,
+    ids BLOB NOT NULL,
+    PRIMARY KEY (trigram, segment)
+) WITHOUT ROWID;
+'''
+
+def text_trigrams(data):
+    """Distinct trigrams of ASCII-lowercased bytes, packed into ints"""
+    data = data.lower()
+    return {(a << 16) | (b << 8) | c for a, b, c in set(zip(data, data[1:], data[2:]))}
+
+def file_trigrams(file_paths):
+    """Task run in a worker process: (path, mtime_ns, size, trigrams) per file.
+
+    Binary, oversized and unreadable files get no trigrams, so they are never candidates,
+    just as the plain search skips them.
+    """
+    results = []
+    for file_path in file_paths:
+        try:
+            st = os.stat(file_path)
+            grams = []
+            if st.st_size <= MAX_SEARCH_FILE_SIZE:
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+                if b'\0' not in data[:BINARY_SNIFF_BYTES]:
+                    grams = array('I', text_trigrams(data)).tobytes()
+            results.append((file_path, st.st_mtime_ns, st.st_size, grams))
+        except OSError:
+            results.append((file_path, None, None, None))
+    return results
+
+def literal_runs(items, runs, current):
+    """Collect the runs of literal characters every match of a parsed regex must contain"""
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            current.append(chr(av))
+        elif op is sre_parse.SUBPATTERN:
+            literal_runs(av[-1], runs, current)
+        elif op is sre_parse.AT:
+            pass  # anchors take no characters
+        else:
+            runs.append(''.join(current))
+            current.clear()
+            if op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+                literal_runs(av[2], runs, current)
+                runs.append(''.join(current))
+                current.clear()
+
+def query_trigrams(pattern):
+    """Trigrams every file matching pattern contains; empty if the pattern gives nothing to go on"""
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except (re.error, TypeError):
+        return set()
+    runs = []
+    current = []
+    literal_runs(list(parsed), runs, current)
+    runs.append(''.join(current))
+    grams = set()
+    for run in runs:
+        if len(run) >= 3:
+            grams |= text_trigrams(run.encode('utf-8'))
+    if pattern.flags & re.IGNORECASE:
+        # Only ASCII is lowercased in the index; other letters may match in another case
+        grams = {g for g in grams if not g & 0x808080}
+    return grams
+
+def posting_ids(db, trigram):
+    ids = array('I')
+    for blob, in db.execute('SELECT ids FROM postings WHERE trigram = ?', (trigram,)):
+        ids.frombytes(blob)
+    return ids
+
+def query_candidates(db_path, pattern):
+    """{relative path: (mtime_ns, size) as indexed} of the files that may match pattern,
+    or None if the index cannot narrow it"""
+    grams = sorted(query_trigrams(pattern))
+    if not grams:
+        return None
+    if len(grams) > MAX_QUERY_TRIGRAMS:
+        step = len(grams) / MAX_QUERY_TRIGRAMS
+        grams = [grams[int(i * step)] for i in range(MAX_QUERY_TRIGRAMS)]
+    try:
+        db = sqlite3.connect(db_path)
+        try:
+            ids = None
+            for trigram in grams:
+                found = posting_ids(db, trigram)
+                ids = set(found) if ids is None else ids.intersection(found)
+                if not ids:
+                    return {}
+            ids = list(ids)
+            matching = {}
+            for start in range(0, len(ids), SQL_BATCH):
+                batch = ids[start:start + SQL_BATCH]
+                marks = ','.join('?' * len(batch))
+                for path, mtime_ns, size in db.execute(f'SELECT path, mtime_ns, size FROM files WHERE id IN ({marks})', batch):
+                    matching[path] = (mtime_ns, size)
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return None
+    return matching
+
+class TrigramIndexer(FolderIndexer):
+    """Keeps the trigram database of a workspace in line with the files on disk.
+
+    Changed files are read and split into trigrams on the shared process pool; each
+    batch of them is written as a new segment.
+    """
+    SCHEMA = SCHEMA
+    TABLES = ('files', 'segments', 'postings')
+    INDEX_VERSION = INDEX_VERSION
+    WRITE_COST = SEGMENT_PAIRS
+
+    def __init__(self, parent=None):
+        super().__init__(file_trigrams, self.write_segment, parent)
+
+    def result_cost(self, grams):
+        return len(grams or b'') // 4
+
+    def write_segment(self, indexed):
+        """Store the collected files and their trigrams as a new segment, in one transaction"""
+        postings = {}
+        db = self._db
+        for rel, (mtime_ns, size, grams) in indexed.items():
+            db.execute('DELETE FROM files WHERE path = ?', (rel,))
+            if grams is None:
+                continue  # gone or unreadable
+            file_id = db.execute('INSERT INTO files (path, dir, mtime_ns, size) VALUES (?, ?, ?, ?)',
+                                 (rel, rel.rpartition('/')[0], mtime_ns, size)).lastrowid
+            for g in array('I', grams):
+                ids = postings.get(g)
+                if ids is None:
+                    postings[g] = ids = array('I')
+                ids.append(file_id)
+        if postings:
+            segment = db.execute('INSERT INTO segments (level) VALUES (0)').lastrowid
+            db.executemany('INSERT INTO postings (trigram, segment, ids) VALUES (?, ?, ?)',
+                           ((g, segment, ids.tobytes()) for g, ids in sorted(postings.items())))
+        db.commit()
+        self.merge_segments()
+
+    def merge_segments(self):
+        """Merge MERGE_SEGMENTS segments of a level into one of the next, dropping dead file ids"""
+        db = self._db
+        while True:
+            row = db.execute('SELECT level FROM segments GROUP BY level HAVING COUNT(*) >= ? ORDER BY level LIMIT 1',
+                             (MERGE_SEGMENTS,)).fetchone()
+            if row is None:
+                return
+            level = row[0]
+            merged = [i for i, in db.execute('SELECT id FROM segments WHERE level = ? ORDER BY id LIMIT ?', (level, MERGE_SEGMENTS))]
+            marks = ','.join('?' * len(merged))
+            live = set(i for i, in db.execute('SELECT id FROM files'))
+            segment = db.execute('INSERT INTO segments (level) VALUES (?)', (level + 1,)).lastrowid
+            rows = db.execute(f'SELECT trigram, ids FROM postings WHERE segment IN ({marks}) ORDER BY trigram', merged).fetchall()
+            out = []
+            for g, blobs in groupby(rows, key=lambda r: r[0]):
+                ids = array('I')
+                for _, blob in blobs:
+                    ids.frombytes(blob)
+                ids = array('I', (i for i in ids if i in live))
+                if ids:
+                    out.append((g, segment, ids.tobytes()))
+            db.executemany('INSERT INTO postings (trigram, segment, ids) VALUES (?, ?, ?)', out)
+            db.execute(f'DELETE FROM postings WHERE segment IN ({marks})', merged)
+            db.execute(f'DELETE FROM segments WHERE id IN ({marks})', merged)
+            db.commit()
+
+class TrigramIndex(QObject):
+    """GUI-side handle on the trigram indexer; searches ask it for candidate files"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = None
+        self.db_path = None
+        self._indexer = TrigramIndexer()
+        start_worker(self._indexer)
+
+    def set_root(self, root):
+        self.root = root
+        self.db_path = index_path(root) if root else None
+        self._indexer.set_root(root)
+
+    def rescan(self, directory):
+        self._indexer.rescan(directory)
+
+    def update_file(self, file_path):
+        self._indexer.update_file(file_path)
+
+    def candidates(self, root, pattern):
+        """Files under root that may match pattern, or None to search them all; safe on any thread.
+
+        Until the first comparison of the folder has finished every file is searched.
+        After that the index is trusted: only the files it names are stat'ed, plus the
+        files queued for indexing and not written yet, which are searched as they are.
+        Files edited behind the watchers' back are caught by the indexer's resync.
+        """
+        if root != self.root or self.db_path is None or self._indexer.synced_root != root:
+            return None
+        # Taken before the query, so a file written in between is still searched
+        unwritten = self._indexer.unwritten()
+        matching = query_candidates(self.db_path, pattern)
+        if matching is None:
+            return None
+        return self.iter_candidates(root, matching, unwritten)
+
+    def iter_candidates(self, root, matching, unwritten):
+        for rel in sorted(matching.keys() - unwritten):
+            file_path = os.path.join(root, rel.replace('/', os.sep))
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            if (st.st_mtime_ns, st.st_size) != matching[rel]:
+                self._indexer.update_file(file_path)
+            yield file_path
+        for rel in sorted(unwritten):
+            file_path = os.path.join(root, rel.replace('/', os.sep))
+            if os.path.isfile(file_path):
+                yield file_path
@@ -1,93 +1,249 @@
-from highlight_manager import get_highlight_rules, get_language_data, get_ext_lang_map
-from PyQt6.QtWidgets import QPlainTextEdit, QWidget, QVBoxLayout, QTextEdit, QLabel
-from PyQt6.QtGui import QFont, QColor, QSyntaxHighlighter, QTextCharFormat, QPainter
-from PyQt6.QtCore import QRegularExpression, QRect, QSize, Qt
-import os
+from highlight_manager import registry as language_registry, rules_digest
+from ..file_io import FileLoader, FileSaver, DocumentStreamer, STREAMING_SAVE_CHARS, remove_scratch, start_worker
+from ..completion import BufferWords, complete, get_pack_index, PREFIX_RE, MIN_COMPLETION_PREFIX
+from .completion_popup import CompletionPopup
+from .theme_style import set_role
+from PyQt6.QtWidgets import QPlainTextEdit, QWidget, QVBoxLayout, QTextEdit, QLabel, QProgressBar
+from PyQt6.QtGui import QFont, QColor, QSyntaxHighlighter, QTextCharFormat, QPainter, QTextCursor, QPixmap, QFontMetricsF
+from PyQt6.QtCore import QRegularExpression, QEvent, QPointF, QRect, QSize, Qt, QTimer, pyqtSignal
+import math
+import time
 
 def detect_language(file_path):
-    ext_lang_map = get_ext_lang_map()
-    ext = os.path.splitext(file_path or '')[1].lower()
-    return ext_lang_map.get(ext, 'python')
+    return language_registry.detect_language(file_path)
+
+# Words the highlighter always knows about, on top of the language data files
+BUILTIN_KEYWORDS = [
+    'and', 'as', 'assert', 'break', 'class', 'continue', 'def', 'del', 'elif', 'else', 'except',
+    'False', 'finally', 'for', 'from', 'global', 'if', 'import', 'in', 'is', 'lambda', 'None',
+    'nonlocal', 'not', 'or', 'pass', 'raise', 'return', 'True', 'try', 'while', 'with', 'yield'
+]
+BUILTIN_NAMES = ['print', 'len', 'range', 'str', 'int', 'float', 'list', 'dict', 'set', 'tuple', 'open']
+# Offered as completions on top of the language files
+COMPLETION_EXTRAS = [(word, 'keyword') for word in BUILTIN_KEYWORDS] + [(word, 'builtin') for word in BUILTIN_NAMES]
+
+# One scanner for every token kind. Identifiers are looked up in a dict instead of
+# having one pattern per word, so the cost per block only depends on the line length.
+TOKEN_PATTERN = (
+    r'(?<open>"""|\'\'\'|/\*)'
+    r'|(?<comment>#.*|//.*)'
+    r'|(?<string>"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`)'
+    r'|(?<number>\b[0-9]+\b)'
+    r'|(?<word>\b[^\W\d]\w*)(?:(?<call>(?=\s*\())|(?<assign>(?=\s*=(?!=))))?'
+)
+
+# Block states carried from one line to the next
+STATE_NORMAL = 0
+STATE_TRIPLE_DOUBLE = 1
+STATE_TRIPLE_SINGLE = 2
+STATE_BLOCK_COMMENT = 3
+
+# opening token -> state it leaves the lexer in
+MULTILINE_OPENERS = {'"""': STATE_TRIPLE_DOUBLE, "'''": STATE_TRIPLE_SINGLE, '/*': STATE_BLOCK_COMMENT}
+# state -> (closing pattern, format category)
+MULTILINE_CLOSERS = {
+    STATE_TRIPLE_DOUBLE: (r'"""', 'string'),
+    STATE_TRIPLE_SINGLE: (r"'''", 'string'),
+    STATE_BLOCK_COMMENT: (r'\*/', 'comment'),
+}
+
+# Documents with more blocks than this are highlighted viewport-first, with the
+# rest of the file filled in by time slices on the event loop
+LARGE_DOCUMENT_BLOCKS = 5000
+BACKGROUND_SLICE_MS = 10
+BACKGROUND_CHUNK_BLOCKS = 100
+# Rough per-block cost of layout, formats and block data on top of the text itself
+BLOCK_OVERHEAD_BYTES = 512
+
+class CompiledRules:
+    """Patterns, formats and word table for one language, shared by every highlighter using it"""
+    def __init__(self, rules, lang_data=None):
+        rules = rules or {}
+        lang_data = lang_data or {}
+        self.token_pattern = QRegularExpression(
+            TOKEN_PATTERN, QRegularExpression.PatternOption.UseUnicodePropertiesOption
+        )
+        self.closers = {state: (QRegularExpression(pattern), category) for state, (pattern, category) in MULTILINE_CLOSERS.items()}
+        self.formats = {}
+        for category in ('keyword', 'string', 'comment', 'number', 'function', 'import', 'variable', 'builtin'):
+            if category in rules:
+                fmt = QTextCharFormat()
+                fmt.setForeground(QColor(rules[category]))
+                if category == 'keyword':
+                    fmt.setFontWeight(QFont.Weight.Bold)
+                elif category == 'function':
+                    fmt.setFontItalic(True)
+                self.formats[category] = fmt
+        # word -> category, later categories win (builtin > import > keyword)
+        self.word_categories = {}
+        if 'keyword' in self.formats:
+            for word in BUILTIN_KEYWORDS + lang_data.get('keywords', []):
+                self.word_categories[word] = 'keyword'
+        if 'import' in self.formats:
+            for word in lang_data.get('imports', []):
+                self.word_categories[word] = 'import'
+        if 'builtin' in self.formats:
+            for word in BUILTIN_NAMES:
+                self.word_categories[word] = 'builtin'
+
+# lang -> (digest of rules + language data, CompiledRules)
+_compiled_rules_cache = {}
+
+def get_compiled_rules(lang, rules, lang_data=None, digest=None):
+    """Return the process-wide CompiledRules for lang, rebuilding them only when the rules or data change"""
+    if digest is None:
+        digest = rules_digest(rules, lang_data)
+    cached = _compiled_rules_cache.get(lang)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+    compiled = CompiledRules(rules, lang_data)
+    # Replaces the entry for an older version of the JSON files
+    _compiled_rules_cache[lang] = (digest, compiled)
+    return compiled
 
 class CustomHighlighter(QSyntaxHighlighter):
-    def __init__(self, document, rules, lang_data=None):
+    def __init__(self, document, rules, lang_data=None, lang=None, digest=None):
         super().__init__(document)
         self.rules = rules or {}
         self.lang_data = lang_data or {}
-        self.highlighting_rules = []
-        # Keywords
-        if 'keyword' in self.rules:
-            keyword_format = QTextCharFormat()
-            keyword_format.setForeground(QColor(self.rules['keyword']))
-            keyword_format.setFontWeight(QFont.Weight.Bold)
-            # Built-in + user keywords
-            keywords = [
-                'and', 'as', 'assert', 'break', 'class', 'continue', 'def', 'del', 'elif', 'else', 'except',
-                'False', 'finally', 'for', 'from', 'global', 'if', 'import', 'in', 'is', 'lambda', 'None',
-                'nonlocal', 'not', 'or', 'pass', 'raise', 'return', 'True', 'try', 'while', 'with', 'yield'
-            ]
-            keywords += self.lang_data.get('keywords', [])
-            for word in set(keywords):
-                pattern = QRegularExpression(rf'\\b{word}\\b')
-                self.highlighting_rules.append((pattern, keyword_format))
-        # Strings
-        if 'string' in self.rules:
-            string_format = QTextCharFormat()
-            string_format.setForeground(QColor(self.rules['string']))
-            self.highlighting_rules.append((QRegularExpression(r'".*?"'), string_format))
-            self.highlighting_rules.append((QRegularExpression(r"'.*?"), string_format))
-            self.highlighting_rules.append((QRegularExpression(r'`.*?`'), string_format))
-        # Comments
-        if 'comment' in self.rules:
-            comment_format = QTextCharFormat()
-            comment_format.setForeground(QColor(self.rules['comment']))
-            self.highlighting_rules.append((QRegularExpression(r'#.*'), comment_format))
-            self.highlighting_rules.append((QRegularExpression(r'//.*'), comment_format))
-        # Numbers
-        if 'number' in self.rules:
-            number_format = QTextCharFormat()
-            number_format.setForeground(QColor(self.rules['number']))
-            self.highlighting_rules.append((QRegularExpression(r'\b[0-9]+\b'), number_format))
-        # Functions (word followed by '(')
-        if 'function' in self.rules:
-            func_format = QTextCharFormat()
-            func_format.setForeground(QColor(self.rules['function']))
-            func_format.setFontItalic(True)
-            # Built-in + user functions
-            functions = self.lang_data.get('functions', [])
-            for word in set(functions):
-                pattern = QRegularExpression(rf'\\b{word}\\b(?=\s*\()')
-                self.highlighting_rules.append((pattern, func_format))
-            # fallback: any word before (
-            self.highlighting_rules.append((QRegularExpression(r'\b\w+(?=\s*\()'), func_format))
-        # Imports (for import/include/require)
-        if 'import' in self.rules:
-            import_format = QTextCharFormat()
-            import_format.setForeground(QColor(self.rules['import']))
-            imports = self.lang_data.get('imports', [])
-            for word in set(imports):
-                pattern = QRegularExpression(rf'\\b{word}\\b')
-                self.highlighting_rules.append((pattern, import_format))
-        # Variables (word before =)
-        if 'variable' in self.rules:
-            var_format = QTextCharFormat()
-            var_format.setForeground(QColor(self.rules['variable']))
-            self.highlighting_rules.append((QRegularExpression(r'\b\w+(?=\s*=)'), var_format))
-        # Builtins (for python)
-        if 'builtin' in self.rules:
-            builtin_format = QTextCharFormat()
-            builtin_format.setForeground(QColor(self.rules['builtin']))
-            builtins = ['print', 'len', 'range', 'str', 'int', 'float', 'list', 'dict', 'set', 'tuple', 'open']
-            for word in builtins:
-                pattern = QRegularExpression(rf'\\b{word}\\b')
-                self.highlighting_rules.append((pattern, builtin_format))
+        compiled = get_compiled_rules(lang, rules, lang_data, digest)
+        self.token_pattern = compiled.token_pattern
+        self.closers = compiled.closers
+        self.formats = compiled.formats
+        self.word_categories = compiled.word_categories
+        # Background pass: blocks from this number on are skipped unless visible
+        self._background_from = None
+        self._background_next = 0
+        self._last_block = -1
+        self._visible_blocks = (0, -1)
+        self._background_timer = QTimer(self)
+        self._background_timer.setInterval(0)
+        self._background_timer.timeout.connect(self.highlight_next_slice)
+
+    def word_category(self, match):
+        """Resolve the category of an identifier match (builtin > variable > import > function > keyword)"""
+        category = self.word_categories.get(match.captured('word'))
+        if category == 'builtin':
+            return category
+        if match.capturedStart('assign') != -1 and 'variable' in self.formats:
+            return 'variable'
+        if category == 'import':
+            return category
+        if match.capturedStart('call') != -1 and 'function' in self.formats:
+            return 'function'
+        return category
+
+    def defer_highlighting(self):
+        """Only highlight visible blocks until start_background_highlighting is called"""
+        self._background_from = 0
+        self._background_next = 0
+
+    def start_background_highlighting(self):
+        """Highlight only the visible blocks now and the rest of the document in time slices"""
+        self.defer_highlighting()
+        self._background_timer.start()
+
+    def stop_background_highlighting(self):
+        self._background_timer.stop()
+        self._background_from = None
+
+    def set_visible_blocks(self, first, last):
+        """Tell the highlighter which blocks are on screen so they are coloured first"""
+        self._visible_blocks = (first, last)
+        if self._background_from is None:
+            return
+        block = self.document().findBlockByNumber(max(first, self._background_from))
+        while block.isValid() and block.blockNumber() <= last:
+            # -1 means the block has never been highlighted
+            if block.userState() == -1:
+                self.rehighlightBlock(block)
+            block = block.next()
+
+    def is_deferred(self, block_number):
+        if self._background_from is None or block_number < self._background_from:
+            return False
+        first, last = self._visible_blocks
+        return not first <= block_number <= last
+
+    def highlight_next_slice(self):
+        if self.document() is None:
+            self.stop_background_highlighting()
+            return
+        deadline = time.perf_counter() + BACKGROUND_SLICE_MS / 1000
+        # One edit block per slice, so views get a single change notification for it
+        cursor = QTextCursor(self.document())
+        cursor.beginEditBlock()
+        block = self.document().findBlockByNumber(self._background_next)
+        while block.isValid():
+            # Move the frontier one chunk ahead. rehighlightBlock keeps going while the
+            # block states change, which they do for every block not highlighted yet,
+            # and stops at the first deferred block past the frontier.
+            self._background_from = block.blockNumber() + BACKGROUND_CHUNK_BLOCKS
+            self.rehighlightBlock(block)
+            self._background_next = max(self._last_block, block.blockNumber()) + 1
+            if time.perf_counter() >= deadline:
+                break
+            block = self.document().findBlockByNumber(self._background_next)
+        else:
+            self.stop_background_highlighting()
+        cursor.endEditBlock()
+
+    def highlight_multiline(self, state, start, search_from):
+        """Format a multi-line string/comment from start to its closer.
+
+        Returns the position after the closer, or None when the token runs past the
+        end of the block, in which case the block state is set to carry it over.
+        """
+        closer, category = self.closers[state]
+        fmt = self.formats.get(category)
+        match = closer.match(self.currentBlock().text(), search_from)
+        if match.hasMatch():
+            end = match.capturedEnd()
+            if fmt is not None:
+                self.setFormat(start, end - start, fmt)
+            return end
+        if fmt is not None:
+            self.setFormat(start, self.currentBlock().length() - start, fmt)
+        self.setCurrentBlockState(state)
+        return None
 
     def highlightBlock(self, text):
-        for pattern, fmt in self.highlighting_rules:
-            it = pattern.globalMatch(text)
-            while it.hasNext():
-                match = it.next()
-                self.setFormat(match.capturedStart(), match.capturedLength(), fmt)
+        block_number = self.currentBlock().blockNumber()
+        if self.is_deferred(block_number):
+            # Leave the block state untouched so the re-highlight stops here
+            return
+        self._last_block = block_number
+        # The block state is the lexer state at the end of the line. Qt only moves on
+        # to the next block when that state changes, so an edit stops re-highlighting
+        # as soon as the lexer is back in step with what was there before.
+        self.setCurrentBlockState(STATE_NORMAL)
+        pos = 0
+        previous = self.previousBlockState()
+        if previous in self.closers:
+            pos = self.highlight_multiline(previous, 0, 0)
+            if pos is None:
+                return
+        match = self.token_pattern.match(text, pos)
+        while match.hasMatch():
+            if match.capturedStart('open') != -1:
+                state = MULTILINE_OPENERS[match.captured('open')]
+                pos = self.highlight_multiline(state, match.capturedStart(), match.capturedEnd())
+                if pos is None:
+                    return
+            else:
+                if match.capturedStart('word') != -1:
+                    category = self.word_category(match)
+                elif match.capturedStart('comment') != -1:
+                    category = 'comment'
+                elif match.capturedStart('string') != -1:
+                    category = 'string'
+                else:
+                    category = 'number'
+                fmt = self.formats.get(category)
+                if fmt is not None:
+                    self.setFormat(match.capturedStart(), match.capturedLength(), fmt)
+                pos = match.capturedEnd()
+            match = self.token_pattern.match(text, pos)
 
 class LineNumberArea(QWidget):
     def __init__(self, editor):
@@ -101,47 +257,194 @@ class LineNumberArea(QWidget):
         self.code_editor.line_number_area_paint_event(event)
 
 class CodeEditor(QWidget):
+    modificationChanged = pyqtSignal(bool)
+    saveStateChanged = pyqtSignal(bool)
+    # Saved under a new path
+    filePathChanged = pyqtSignal(str)
+    # load_file has read the whole file
+    fileLoaded = pyqtSignal()
+    # A save has reached the disk
+    fileSaved = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
+        set_role(self, 'codeEditor')
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.layout.setSpacing(0)
         self.empty_state = QLabel("<div style='text-align:center; color:#676e95; font-size:22px; margin-top:60px;'>🗒️<br><b>No file open</b><br><span style='font-size:15px;'>Open a file to start editing!</span></div>")
         self.empty_state.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        set_role(self.empty_state, 'emptyState')
         self.editor = _CodeEditorWidget()
         self.editor.hide()
+        # Thin bar shown while a file is streamed in by load_file
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFixedHeight(3)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setStyleSheet('QProgressBar { border: none; background: transparent; } QProgressBar::chunk { background: #82aaff; }')
+        self.progress_bar.hide()
         self.layout.addWidget(self.empty_state)
+        self.layout.addWidget(self.progress_bar)
         self.layout.addWidget(self.editor)
+        self._loader = None
+        self._saver = None
+        self._streamer = None
+        self._pending_save_path = None
+        self._pending_view_state = None
+        self._pending_line = None
+        self._scratch_path = None
+        # Flush saved files to disk before reporting them as saved
+        self.fsync_on_save = False
         self.file_path = None
-        self.original_content = None
         self.modified = False
         self.show_empty_state()
         self._base_font_size = 13
         self._font_family = 'Fira Mono'
         self._zoom = 0
         
-        # Connect text changes to track modifications
-        self.editor.textChanged.connect(self.on_text_changed)
+        # The document tracks modifications itself, including undoing back to the saved state
+        self.editor.modificationChanged.connect(self.on_modification_changed)
 
     def set_file_content(self, content, file_path=None):
+        self.cancel_loading()
         self.file_path = file_path
         if file_path is not None:
             self.editor.setPlainText(content if content is not None else '')
-            self.original_content = content if content is not None else ''
-            self.modified = False
+            self.mark_clean()
             self.editor.show()
             self.empty_state.hide()
-            # Set highlighter based on file extension
-            lang = detect_language(file_path)
-            rules = get_highlight_rules(lang)
-            lang_data = get_language_data(lang)
-            self.editor.set_highlighter(rules, lang_data)
+            self.apply_highlighter()
         else:
             self.editor.clear()
             self.editor.hide()
             self.empty_state.show()
-            self.original_content = None
-            self.modified = False
+            self.mark_clean()
+
+    def apply_highlighter(self, deferred=False):
+        """Set highlighter based on file extension"""
+        lang = language_registry.detect_language(self.file_path)
+        rules = language_registry.get_rules(lang)
+        lang_data = language_registry.get_language_data(lang)
+        self.editor.set_highlighter(rules, lang_data, lang, language_registry.get_digest(lang), deferred)
+
+    def load_file(self, file_path, view_state=None, scratch_path=None):
+        """Stream file_path into the editor from a worker thread.
+
+        The editor is shown straight away and stays read-only until the whole file is in.
+        Only visible blocks are highlighted while chunks arrive; the rest is filled in by
+        the background pass once loading finishes. view_state is restored after that.
+        With scratch_path the unsaved text spilled there is read instead, and the
+        editor comes back dirty.
+        """
+        self.cancel_loading()
+        self.file_path = file_path
+        self._pending_view_state = view_state
+        self._pending_line = None
+        self._scratch_path = scratch_path
+        self.editor.clear_highlighter()
+        self.editor.clear()
+        # Attached while the document is empty, so there is no full pass to wait for
+        self.apply_highlighter(deferred=True)
+        # No undo history for the chunks being appended
+        self.editor.setUndoRedoEnabled(False)
+        self.editor.setReadOnly(True)
+        self.mark_clean()
+        self.show_editor()
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self._loader = FileLoader(scratch_path or file_path, compressed=scratch_path is not None)
+        self._loader.chunkLoaded.connect(self.on_chunk_loaded)
+        self._loader.progressChanged.connect(self.progress_bar.setValue)
+        self._loader.loadFinished.connect(self.on_load_finished)
+        self._loader.loadFailed.connect(self.on_load_failed)
+        start_worker(self._loader)
+
+    def is_loading(self):
+        return self._loader is not None
+
+    def cancel_loading(self):
+        """Stop an in-progress load_file, keeping whatever was read so far"""
+        if self._loader is None:
+            return
+        loader = self._loader
+        self._loader = None
+        loader.cancel()
+        self.editor.setUndoRedoEnabled(True)
+        self.editor.setReadOnly(False)
+        self.progress_bar.hide()
+
+    def on_chunk_loaded(self, chunk):
+        loader = self.sender()
+        if loader is not self._loader:
+            return  # queued chunk from a cancelled load
+        cursor = QTextCursor(self.editor.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(chunk)
+        loader.chunk_consumed()
+
+    def on_load_finished(self):
+        if self.sender() is not self._loader:
+            return
+        self.cancel_loading()
+        if self._scratch_path:
+            remove_scratch(self._scratch_path)
+            self._scratch_path = None
+            # Already flagged by the appended chunks, so no modificationChanged from Qt
+            self.editor.document().setModified(True)
+            self.modified = True
+            self.modificationChanged.emit(True)
+        else:
+            self.mark_clean()
+        # Appending pushed the cursor along to the end of the text
+        self.editor.moveCursor(QTextCursor.MoveOperation.Start)
+        if self._pending_view_state:
+            self.restore_view_state(self._pending_view_state)
+        self._pending_view_state = None
+        if self._pending_line:
+            self.go_to_line(*self._pending_line)
+        if self.editor.highlighter:
+            self.editor.highlighter.start_background_highlighting()
+        self.fileLoaded.emit()
+
+    def memory_estimate(self):
+        """Approximate bytes held by the document, its layout and highlight formats"""
+        document = self.editor.document()
+        return document.characterCount() * 2 + document.blockCount() * BLOCK_OVERHEAD_BYTES
+
+    def view_state(self):
+        """Cursor and scroll position, to put the view back when the file is reopened"""
+        if self._pending_view_state:
+            return self._pending_view_state
+        return {
+            'cursor': self.editor.textCursor().position(),
+            'scroll': self.editor.verticalScrollBar().value(),
+        }
+
+    def restore_view_state(self, state):
+        cursor = self.editor.textCursor()
+        cursor.setPosition(max(0, min(state.get('cursor', 0), self.editor.document().characterCount() - 1)))
+        self.editor.setTextCursor(cursor)
+        self.editor.verticalScrollBar().setValue(state.get('scroll', 0))
+
+    def go_to_line(self, line, column=0):
+        """Put the cursor on a 1-based line; while the file is still loading, once it is read"""
+        if self.is_loading():
+            self._pending_line = (line, column)
+            return
+        self._pending_line = None
+        block = self.editor.document().findBlockByNumber(max(0, line - 1))
+        if not block.isValid():
+            return
+        cursor = self.editor.textCursor()
+        cursor.setPosition(block.position() + min(column, block.length() - 1))
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+        self.editor.setFocus()
+
+    def on_load_failed(self, error):
+        if self.sender() is not self._loader:
+            return
+        self.set_file_content(f'Error opening file: {error}', self.file_path)
 
     def wheelEvent(self, event):
         if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
@@ -205,11 +508,17 @@ class CodeEditor(QWidget):
     def setPlainText(self, text):
         self.set_file_content(text)
 
-    def on_text_changed(self):
+    def on_modification_changed(self, changed):
         """Track when text has been modified"""
-        if self.file_path is not None:
-            current_content = self.editor.toPlainText()
-            self.modified = (current_content != self.original_content)
+        if self._loader is not None:
+            return  # appending chunks is not an edit
+        self.modified = changed
+        self.modificationChanged.emit(changed)
+
+    def mark_clean(self):
+        """Make the current text the saved state; undoing back to it clears the flag again"""
+        self.editor.document().setModified(False)
+        self.modified = False
 
     def is_modified(self):
         """Check if the file has been modified"""
@@ -223,48 +532,94 @@ class CodeEditor(QWidget):
         if force_save_as:
             return self.save_file_as()
         
-        try:
-            content = self.editor.toPlainText()
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            self.original_content = content
-            self.modified = False
-            return True
-        except Exception as e:
-            print(f"Error saving file: {e}")
-            return False
+        return self.start_save(self.file_path)
 
     def save_file_as(self):
         """Save file with a new path"""
         from PyQt6.QtWidgets import QFileDialog
         file_path, _ = QFileDialog.getSaveFileName(self, 'Save File As', '', 'All Files (*)')
         if file_path:
-            try:
-                content = self.editor.toPlainText()
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                self.file_path = file_path
-                self.original_content = content
-                self.modified = False
-                return True
-            except Exception as e:
-                print(f"Error saving file: {e}")
-                return False
+            return self.start_save(file_path)
         return False
 
+    def is_saving(self):
+        return self._saver is not None
+
+    def start_save(self, file_path):
+        """Save a snapshot of the document to file_path on a worker thread.
+
+        Large documents are not copied but streamed block by block, and stay
+        read-only until the last block has been handed to the saver. Saving again
+        while a save is running does not queue another full write; it only asks for
+        one more save of the latest text once the current one is done.
+        """
+        if self._loader is not None:
+            return False
+        if self._saver is not None:
+            self._pending_save_path = file_path
+            return True
+        document = self.editor.document()
+        if document.characterCount() > STREAMING_SAVE_CHARS:
+            self._streamer = DocumentStreamer(document, self)
+            self._streamer.streamFinished.connect(self.on_stream_finished)
+            self.editor.setReadOnly(True)
+            text = self._streamer
+        else:
+            text = self.editor.toPlainText()
+        self._saver = FileSaver(file_path, text, self.fsync_on_save)
+        # The snapshot is the new saved state: edits made while it is written make the
+        # tab dirty again, and undoing back to it clears the flag
+        self.mark_clean()
+        self._saver.saveFinished.connect(self.on_save_finished)
+        self._saver.saveFailed.connect(self.on_save_failed)
+        start_worker(self._saver)
+        if self._streamer is not None:
+            self._streamer.start()
+        self.saveStateChanged.emit(True)
+        return True
+
+    def on_stream_finished(self):
+        self._streamer = None
+        self.editor.setReadOnly(False)
+
+    def flush_save(self):
+        """Hand the rest of a streaming save over now, before the document goes away"""
+        if self._streamer is not None:
+            self._streamer.flush()
+
+    def on_save_finished(self, file_path):
+        self._saver = None
+        if file_path != self.file_path:
+            self.file_path = file_path
+            self.filePathChanged.emit(file_path)
+        self.fileSaved.emit(file_path)
+        self.finish_save()
+
+    def on_save_failed(self, error):
+        print(f"Error saving file: {error}")
+        if self._streamer is not None:
+            self._streamer.stop()
+            self.on_stream_finished()
+        self._saver = None
+        self.editor.document().setModified(True)
+        self.finish_save()
+
+    def finish_save(self):
+        file_path = self._pending_save_path
+        self._pending_save_path = None
+        if file_path is not None and self.start_save(file_path):
+            return
+        self.saveStateChanged.emit(False)
+
     def apply_theme(self, colors, font, ui=None):
         ui = ui or {}
-        bg = ui.get('editor_bg', colors.get('background', '#181c20'))
-        text = ui.get('editor_text', colors.get('text', '#e0e0e0'))
         panel = ui.get('line_number_bg', colors.get('panel', '#20242a'))
         selected = ui.get('current_line_bg', colors.get('selected', '#2d313a'))
         line_number_text = ui.get('line_number_text', '#676e95')
-        font_family = font.get('family', 'Fira Mono')
-        font_size = font.get('size', 13)
-        self.setStyleSheet(f'background: {bg}; color: {text};')
-        self.empty_state.setStyleSheet(f'color: #676e95; background: {bg}; font-size:22px;')
+        # Colours of widgets come from the theme stylesheet; the gutter and the
+        # current line are painted by the editor itself
         if hasattr(self, 'editor') and hasattr(self.editor, 'apply_theme'):
-            self.editor.apply_theme(colors, font, panel, selected, line_number_text, bg, text)
+            self.editor.apply_theme(colors, font, panel, selected, line_number_text)
 
 class _CodeEditorWidget(QPlainTextEdit):
     def __init__(self):
@@ -272,64 +627,196 @@ class _CodeEditorWidget(QPlainTextEdit):
         self._panel_color = '#20242a'
         self._selected_color = '#23272e'
         self._line_number_color = '#676e95'
+        self._panel_qcolor = QColor(self._panel_color)
+        # Pre-rendered digits the gutter builds line numbers from, redone when the font, color or screen changes
+        self._digit_pixmaps = []
+        self._digit_advances = []
+        self._digit_pixmaps_key = None
+        self._line_number_area_width = 0
         self.setFont(QFont('Fira Mono', 13))
-        self.setStyleSheet('''
-            QPlainTextEdit {
-                background: #181c20;
-                color: #e0e0e0;
-                border: none;
-                padding: 12px 0 12px 0;
-                font-family: 'Fira Mono', 'Consolas', 'Monaco', monospace;
-            }
-        ''')
         self.highlighter = None
+        self.language = None
+        # Identifiers of this buffer, offered as completions in every editor
+        self.words = BufferWords(self.document())
+        self.completion_popup = CompletionPopup(self.viewport())
+        self.completion_popup.wordChosen.connect(self.insert_completion)
         self.line_number_area = LineNumberArea(self)
+        set_role(self.line_number_area, 'lineNumbers')
         self.blockCountChanged.connect(self.update_line_number_area_width)
         self.updateRequest.connect(self.update_line_number_area)
         self.cursorPositionChanged.connect(self.highlight_current_line)
+        self.verticalScrollBar().valueChanged.connect(self.update_visible_highlight)
+        self.verticalScrollBar().valueChanged.connect(self.completion_popup.hide)
         self.update_line_number_area_width(0)
         self.highlight_current_line()
 
-    def set_highlighter(self, rules, lang_data=None):
+    def clear_highlighter(self):
         if self.highlighter:
+            self.highlighter.stop_background_highlighting()
             self.highlighter.setDocument(None)
-        self.highlighter = CustomHighlighter(self.document(), rules, lang_data)
+            self.highlighter = None
+
+    def set_highlighter(self, rules, lang_data=None, lang=None, digest=None, deferred=False):
+        self.clear_highlighter()
+        self.language = lang
+        self.highlighter = CustomHighlighter(self.document(), rules, lang_data, lang, digest)
+        if deferred:
+            self.highlighter.defer_highlighting()
+            self.update_visible_highlight()
+        elif self.blockCount() > LARGE_DOCUMENT_BLOCKS:
+            self.highlighter.start_background_highlighting()
+            self.update_visible_highlight()
+
+    def update_visible_highlight(self, *_):
+        if self.highlighter is None:
+            return
+        first = self.firstVisibleBlock().blockNumber()
+        rows = self.viewport().height() // max(1, self.fontMetrics().height())
+        self.highlighter.set_visible_blocks(first, first + rows + 1)
+
+    def keyPressEvent(self, event):
+        popup = self.completion_popup
+        key = event.key()
+        if popup.isVisible():
+            if key in (Qt.Key.Key_Down, Qt.Key.Key_Up):
+                popup.move_selection(1 if key == Qt.Key.Key_Down else -1)
+                return
+            if key in (Qt.Key.Key_Return, Qt.Key.Key_Enter, Qt.Key.Key_Tab):
+                self.insert_completion(popup.current_word())
+                return
+            if key == Qt.Key.Key_Escape:
+                popup.hide()
+                return
+        if key == Qt.Key.Key_Space and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.update_completions(explicit=True)
+            return
+        super().keyPressEvent(event)
+        text = event.text()
+        if text and (text[-1].isalnum() or text[-1] == '_') and not event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.update_completions()
+        elif popup.isVisible() and key == Qt.Key.Key_Backspace:
+            self.update_completions()
+        elif key not in (Qt.Key.Key_Shift, Qt.Key.Key_Control, Qt.Key.Key_Alt, Qt.Key.Key_Meta):
+            popup.hide()
+
+    def completion_prefix(self):
+        cursor = self.textCursor()
+        if cursor.hasSelection():
+            return ''
+        match = PREFIX_RE.search(cursor.block().text()[:cursor.positionInBlock()])
+        return match.group() if match else ''
+
+    def update_completions(self, explicit=False):
+        """Show the completions of the identifier before the cursor, or hide the popup if there are none"""
+        prefix = self.completion_prefix()
+        if self.isReadOnly() or len(prefix) < (1 if explicit else MIN_COMPLETION_PREFIX):
+            self.completion_popup.hide()
+            return
+        pack = get_pack_index(self.language, COMPLETION_EXTRAS) if self.language else None
+        completions = complete(prefix, pack)
+        if not completions:
+            self.completion_popup.hide()
+            return
+        self.completion_popup.show_completions(completions, self.cursorRect())
+
+    def insert_completion(self, word):
+        self.completion_popup.hide()
+        prefix = self.completion_prefix()
+        if not word or not prefix:
+            return
+        cursor = self.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.Left, QTextCursor.MoveMode.KeepAnchor, len(prefix))
+        cursor.insertText(word)
+        self.setTextCursor(cursor)
+
+    def focusOutEvent(self, event):
+        self.completion_popup.hide()
+        super().focusOutEvent(event)
+
+    def mousePressEvent(self, event):
+        self.completion_popup.hide()
+        super().mousePressEvent(event)
 
     def line_number_area_width(self):
-        digits = len(str(max(1, self.blockCount())))
-        return 18 + self.fontMetrics().horizontalAdvance('9') * digits
+        if not self._line_number_area_width:
+            digits = len(str(max(1, self.blockCount())))
+            self._line_number_area_width = 18 + self.fontMetrics().horizontalAdvance('9') * digits
+        return self._line_number_area_width
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.FontChange and hasattr(self, 'line_number_area'):
+            self._digit_pixmaps_key = None
+            self.update_line_number_area_width(0)
+            self.line_number_area.update()
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
         cr = self.contentsRect()
         self.line_number_area.setGeometry(QRect(cr.left(), cr.top(), self.line_number_area_width(), cr.height()))
+        self.update_visible_highlight()
 
     def update_line_number_area_width(self, _):
-        self.setViewportMargins(self.line_number_area_width(), 0, 0, 0)
+        old_width = self._line_number_area_width
+        self._line_number_area_width = 0
+        width = self.line_number_area_width()
+        if width != old_width:
+            self.setViewportMargins(width, 0, 0, 0)
 
     def update_line_number_area(self, rect, dy):
         if dy:
             self.line_number_area.scroll(0, dy)
         else:
             self.line_number_area.update(0, rect.y(), self.line_number_area.width(), rect.height())
-        if rect.contains(self.viewport().rect()):
-            self.update_line_number_area_width(0)
+
+    def digit_pixmaps(self):
+        """Pixmaps of the digits 0-9 and their advances, rendered once per font, color and screen"""
+        ratio = self.line_number_area.devicePixelRatioF()
+        font = self.font()
+        key = (font.key(), self._line_number_color, ratio)
+        if key != self._digit_pixmaps_key:
+            metrics = QFontMetricsF(font)
+            height = math.ceil(metrics.height() * ratio)
+            self._digit_pixmaps = []
+            self._digit_advances = []
+            painter = QPainter()
+            for digit in '0123456789':
+                advance = metrics.horizontalAdvance(digit)
+                pixmap = QPixmap(math.ceil(advance * ratio), height)
+                pixmap.setDevicePixelRatio(ratio)
+                pixmap.fill(Qt.GlobalColor.transparent)
+                painter.begin(pixmap)
+                painter.setFont(font)
+                painter.setPen(QColor(self._line_number_color))
+                painter.drawText(QPointF(0, metrics.ascent()), digit)
+                painter.end()
+                self._digit_pixmaps.append(pixmap)
+                self._digit_advances.append(advance)
+            self._digit_pixmaps_key = key
+        return self._digit_pixmaps, self._digit_advances
 
     def line_number_area_paint_event(self, event):
         painter = QPainter(self.line_number_area)
-        painter.fillRect(event.rect(), QColor(self._panel_color))
+        exposed = event.rect()
+        painter.fillRect(exposed, self._panel_qcolor)
+        right = self.line_number_area.width() - 4
+        pixmaps, advances = self.digit_pixmaps()
         block = self.firstVisibleBlock()
         block_number = block.blockNumber()
-        top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
-        bottom = top + int(self.blockBoundingRect(block).height())
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(block_number + 1)
-                painter.setPen(QColor(self._line_number_color))
-                painter.drawText(0, top, self.line_number_area.width() - 4, self.fontMetrics().height(), Qt.AlignmentFlag.AlignRight, number)
+        top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
+        # Only the lines overlapping the exposed strip are drawn, right-aligned digit by digit
+        while block.isValid() and top <= exposed.bottom():
+            height = self.blockBoundingRect(block).height()
+            if block.isVisible() and top + height >= exposed.top():
+                x = right
+                y = int(top)
+                number = block_number + 1
+                while number:
+                    number, digit = divmod(number, 10)
+                    x -= advances[digit]
+                    painter.drawPixmap(QPointF(x, y), pixmaps[digit])
             block = block.next()
-            top = bottom
-            bottom = top + int(self.blockBoundingRect(block).height())
+            top += height
             block_number += 1
 
     def highlight_current_line(self):
@@ -342,27 +829,17 @@ class _CodeEditorWidget(QPlainTextEdit):
             extra_selections.append(selection)
         self.setExtraSelections(extra_selections)
 
-    def apply_theme(self, colors, font, panel=None, selected=None, line_number_text=None, editor_bg=None, editor_text=None):
-        bg = editor_bg or colors.get('background', '#181c20')
-        text = editor_text or colors.get('text', '#e0e0e0')
+    def apply_theme(self, colors, font, panel=None, selected=None, line_number_text=None):
         panel = panel or colors.get('panel', '#20242a')
         selected = selected or colors.get('selected', '#2d313a')
         line_number_text = line_number_text or '#676e95'
         font_family = font.get('family', 'Fira Mono')
         font_size = font.get('size', 13)
         self.setFont(QFont(font_family, font_size))
-        self.setStyleSheet(f'''
-            QPlainTextEdit {{
-                background: {bg};
-                color: {text};
-                border: none;
-                padding: 12px 0 12px 0;
-                font-family: '{font_family}', 'Consolas', 'Monaco', monospace;
-            }}
-        ''')
         self._panel_color = panel
+        self._panel_qcolor = QColor(panel)
         self._selected_color = selected
         self._line_number_color = line_number_text
         if hasattr(self, 'line_number_area'):
-            self.line_number_area.setStyleSheet(f'background: {panel};')
+            self.line_number_area.update()
         self.highlight_current_line() 
\ No newline at end of file
@@ -0,0 +1,70 @@
+from PyQt6.QtWidgets import QApplication, QFrame, QVBoxLayout, QListWidget, QListWidgetItem, QLabel
+from PyQt6.QtCore import Qt, pyqtSignal
+from .theme_style import set_role
+
+# Rows shown before the list scrolls
+VISIBLE_ROWS = 8
+POPUP_WIDTH = 360
+
+class CompletionPopup(QFrame):
+    """Suggestion list floating over the editor viewport; the editor keeps the focus throughout"""
+    # word chosen with the mouse
+    wordChosen = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setFixedWidth(POPUP_WIDTH)
+        # The interface font, not the editor's it would otherwise inherit
+        self.setFont(QApplication.font())
+        set_role(self, 'completionPopup')
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(2, 2, 2, 2)
+        layout.setSpacing(0)
+        self.list = QListWidget()
+        self.list.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.list.setUniformItemSizes(True)
+        self.list.currentRowChanged.connect(self.update_detail)
+        self.list.itemClicked.connect(lambda item: self.wordChosen.emit(item.data(Qt.ItemDataRole.UserRole)))
+        layout.addWidget(self.list)
+        self.detail = QLabel()
+        self.detail.setWordWrap(True)
+        layout.addWidget(self.detail)
+        self._details = []
+        self.hide()
+
+    def show_completions(self, completions, cursor_rect):
+        """Fill in (word, detail, category) and place the popup under cursor_rect, or above if no room"""
+        self.list.setUpdatesEnabled(False)
+        self.list.clear()
+        self._details = []
+        for word, detail, category in completions:
+            item = QListWidgetItem(word)
+            item.setData(Qt.ItemDataRole.UserRole, word)
+            self.list.addItem(item)
+            self._details.append(f'{detail}  ({category})' if detail else category)
+        self.list.setCurrentRow(0)
+        self.list.setUpdatesEnabled(True)
+        rows = min(len(completions), VISIBLE_ROWS)
+        self.list.setFixedHeight(self.list.sizeHintForRow(0) * rows + 4)
+        self.adjustSize()
+        parent = self.parentWidget()
+        x = min(cursor_rect.left(), max(0, parent.width() - self.width()))
+        y = cursor_rect.bottom() + 2
+        if y + self.height() > parent.height():
+            y = max(0, cursor_rect.top() - self.height() - 2)
+        self.move(x, y)
+        self.show()
+        self.raise_()
+
+    def update_detail(self, row):
+        self.detail.setText(self._details[row] if 0 <= row < len(self._details) else '')
+
+    def current_word(self):
+        item = self.list.currentItem()
+        return item.data(Qt.ItemDataRole.UserRole) if item is not None else None
+
+    def move_selection(self, step):
+        count = self.list.count()
+        if count:
+            self.list.setCurrentRow((self.list.currentRow() + step) % count)
@@ -1,27 +1,83 @@
 import os
-from PyQt6.QtWidgets import QTreeView, QVBoxLayout, QWidget, QLabel, QPushButton, QFileDialog, QMenu, QInputDialog, QApplication
-from PyQt6.QtGui import QFileSystemModel, QIcon, QAction, QFont
-from PyQt6.QtCore import pyqtSignal, Qt, QPoint, QFileSystemWatcher
-import shutil
+from PyQt6.QtWidgets import QTreeView, QVBoxLayout, QHBoxLayout, QWidget, QLabel, QPushButton, QFileDialog, QMenu, QInputDialog, QApplication, QProgressBar, QMessageBox, QAbstractItemView
+from PyQt6.QtGui import QFileSystemModel, QIcon, QAction
+from PyQt6.QtCore import pyqtSignal, Qt, QPoint, QFileSystemWatcher, QTimer
+import time
+from ..file_ops import FileOperationQueue, backup_path
+from ..ignore_rules import IgnoreRules, IgnoreFilterModel
+from .theme_style import set_role
+
+# Quiet time after a directory change before the tree re-reads it
+REFRESH_DELAY_MS = 200
+# Longest a burst of changes (e.g. a checkout) can hold a refresh back
+MAX_REFRESH_DELAY = 1.0
+# Failed items listed by name in the error summary
+MAX_LISTED_ERRORS = 10
 
 class FileTree(QWidget):
     fileOpened = pyqtSignal(str)
     folderOpened = pyqtSignal(str)
+    # A folder was expanded or collapsed
+    expansionChanged = pyqtSignal()
+    # A file or folder was renamed or moved: old path, new path
+    itemRenamed = pyqtSignal(str, str)
+    # A file or folder was deleted, or brought back by undoing that
+    itemDeleted = pyqtSignal(str)
+    itemRestored = pyqtSignal(str)
 
     def __init__(self, root_path=None, parent=None):
         super().__init__(parent)
-        self.layout = QVBoxLayout(self)
+        set_role(self, 'fileTree')
+        outer_layout = QVBoxLayout(self)
+        outer_layout.setContentsMargins(0, 0, 0, 0)
+        outer_layout.setSpacing(0)
+        # Tree or empty panel; swapped by show_tree and show_empty_panel
+        self.layout = QVBoxLayout()
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.layout.setSpacing(0)
+        outer_layout.addLayout(self.layout)
+        # Copies, moves and deletes run on a worker thread; progress shows below the tree
+        self.file_ops = FileOperationQueue(self)
+        self.file_ops.jobStarted.connect(self.on_file_job_started)
+        self.file_ops.progressChanged.connect(self.on_file_job_progress)
+        self.file_ops.jobFinished.connect(self.on_file_job_finished)
+        self.ops_bar = QWidget()
+        ops_layout = QHBoxLayout(self.ops_bar)
+        ops_layout.setContentsMargins(8, 4, 8, 4)
+        self.ops_label = QLabel('')
+        ops_layout.addWidget(self.ops_label)
+        self.ops_progress = QProgressBar()
+        self.ops_progress.setTextVisible(False)
+        self.ops_progress.setFixedHeight(6)
+        ops_layout.addWidget(self.ops_progress, stretch=1)
+        self.ops_cancel_btn = QPushButton('Cancel')
+        self.ops_cancel_btn.clicked.connect(self.file_ops.cancel)
+        ops_layout.addWidget(self.ops_cancel_btn)
+        self.ops_bar.hide()
+        outer_layout.addWidget(self.ops_bar)
         self.model = None
+        # Filters ignored entries out of model; the view only ever sees proxy indexes
+        self.proxy = None
+        self.ignore_rules = None
         self.tree = None
         self.empty_panel = None
         self.current_folder = root_path
-        self.clipboard_path = None
+        self.clipboard_paths = []
         self.clipboard_cut = False
-        self.undo_stack = []  # (op, details)
+        self.undo_stack = []  # (op, [(path, other path), ...])
+        self._expanded = set()
+        # The model does not watch the disk itself; fs_watcher covers the root and the
+        # expanded folders, and changed folders are re-read in batches
         self.fs_watcher = QFileSystemWatcher()
         self.fs_watcher.directoryChanged.connect(self.on_dir_changed)
+        self._changed_dirs = set()
+        self._first_change = None
+        # Collapsed folders may have gone stale while nobody watched them
+        self._stale_dirs = set()
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(REFRESH_DELAY_MS)
+        self._refresh_timer.timeout.connect(self.refresh_changed_dirs)
         if root_path:
             self.show_tree(root_path)
         else:
@@ -37,37 +93,33 @@ class FileTree(QWidget):
     def undo_last_action(self):
         if not self.undo_stack:
             return
-        op, details = self.undo_stack.pop()
-        try:
-            if op == 'delete':
-                # Restore file/folder from backup
-                src, backup = details['path'], details['backup']
-                if os.path.isdir(backup):
-                    shutil.move(backup, src)
-                else:
-                    shutil.move(backup, src)
-            elif op == 'rename':
-                os.rename(details['new'], details['old'])
-            elif op == 'create':
-                # Remove the created file/folder
-                if os.path.isdir(details['path']):
-                    shutil.rmtree(details['path'])
-                else:
-                    os.remove(details['path'])
-            elif op == 'move':
-                shutil.move(details['dst'], details['src'])
-        except Exception:
-            pass
-        if self.model and self.current_folder:
-            self.model.setRootPath(self.current_folder)
+        op, items = self.undo_stack.pop()
+        ops = self.undo_ops(op, items)
+        if ops:
+            self.file_ops.submit(f'Undoing {op}', ops, ('undo', (op, items)))
+
+    def undo_ops(self, op, items):
+        """The ops undoing an undo_stack entry, one per item"""
+        if op == 'delete':
+            # Back from the backups; a backup folder is only dropped once its item is out
+            return [('restore', backup, path) for path, backup in items]
+        if op in ('rename', 'move'):
+            return [('move', new, old) for old, new in items]
+        if op == 'create':
+            return [('remove', path, None) for path, _ in items]
+        return []
 
     def show_tree(self, folder_path):
         self.clear_layout()
         self.model = QFileSystemModel()
+        self.model.setOption(QFileSystemModel.Option.DontWatchForChanges, True)
         self.model.setRootPath(folder_path)
+        self.ignore_rules = IgnoreRules(folder_path)
+        self.proxy = IgnoreFilterModel(self.ignore_rules, self)
+        self.proxy.setSourceModel(self.model)
         self.tree = QTreeView()
-        self.tree.setModel(self.model)
-        self.tree.setRootIndex(self.model.index(folder_path))
+        self.tree.setModel(self.proxy)
+        self.tree.setRootIndex(self.view_index(folder_path))
         self.tree.setColumnHidden(1, True)  # Hide size
         self.tree.setColumnHidden(2, True)  # Hide type
         self.tree.setColumnHidden(3, True)  # Hide date
@@ -75,37 +127,62 @@ class FileTree(QWidget):
         self.tree.setIndentation(18)
         self.tree.setAnimated(True)
         self.tree.setExpandsOnDoubleClick(True)
-        self.tree.setStyleSheet('''
-            QTreeView {
-                background: #20242a;
-                color: #e0e0e0;
-                border: none;
-                font-size: 15px;
-                padding: 8px 0 8px 0;
-            }
-            QTreeView::item {
-                padding: 6px 8px;
-                margin: 2px 0;
-            }
-            QTreeView::item:selected {
-                background: #2d313a;
-                color: #fff;
-                border-radius: 6px;
-            }
-        ''')
+        self.tree.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.tree.setColumnWidth(0, 220)
         self.tree.clicked.connect(self.on_item_clicked)
+        self.tree.expanded.connect(self.on_item_expanded)
+        self.tree.collapsed.connect(self.on_item_collapsed)
         self.tree.setToolTipDuration(3000)
         self.tree.setMouseTracking(True)
         self.tree.entered.connect(self.on_item_hovered)
         self.tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.tree.customContextMenuRequested.connect(self.show_context_menu)
         self.layout.addWidget(self.tree)
-        self.fs_watcher.removePaths(self.fs_watcher.directories())
+        if self.fs_watcher.directories():
+            self.fs_watcher.removePaths(self.fs_watcher.directories())
         self.fs_watcher.addPath(folder_path)
         self.current_folder = folder_path
+        self._expanded = set()
+        self._stale_dirs = set()
+        self._changed_dirs = set()
         self.folderOpened.emit(folder_path)
 
+    def path_of(self, index):
+        """File path of an index of the tree view"""
+        return self.model.filePath(self.proxy.mapToSource(index))
+
+    def view_index(self, path):
+        """Index of path in the tree view; invalid if it is not loaded or is ignored"""
+        return self.proxy.mapFromSource(self.model.index(path))
+
+    def on_item_expanded(self, index):
+        path = self.path_of(index)
+        self._expanded.add(path)
+        self.fs_watcher.addPath(path)
+        if path in self._stale_dirs:
+            self._stale_dirs.discard(path)
+            self.refresh_dirs([path])
+        self.expansionChanged.emit()
+
+    def on_item_collapsed(self, index):
+        path = self.path_of(index)
+        self._expanded.discard(path)
+        if path != self.current_folder:
+            self.fs_watcher.removePath(path)
+            self._stale_dirs.add(path)
+        self.expansionChanged.emit()
+
+    def expanded_folders(self):
+        return sorted(self._expanded)
+
+    def expand_folders(self, folder_paths):
+        """Expand the given folders, skipping any that no longer exist"""
+        if not self.tree:
+            return
+        for path in folder_paths:
+            if os.path.isdir(path):
+                self.tree.expand(self.view_index(path))
+
     def show_empty_panel(self):
         self.clear_layout()
         self.empty_panel = QWidget()
@@ -123,6 +200,11 @@ class FileTree(QWidget):
         self.layout.addWidget(self.empty_panel)
         self.layout.addStretch()
         self.current_folder = None
+        self._expanded = set()
+        self._stale_dirs = set()
+        self._changed_dirs = set()
+        if self.fs_watcher.directories():
+            self.fs_watcher.removePaths(self.fs_watcher.directories())
 
     def open_folder_dialog(self):
         folder_path = QFileDialog.getExistingDirectory(self, 'Open Folder', '')
@@ -137,7 +219,7 @@ class FileTree(QWidget):
                 widget.deleteLater()
 
     def on_item_clicked(self, index):
-        file_path = self.model.filePath(index)
+        file_path = self.path_of(index)
         if os.path.isfile(file_path):
             self.fileOpened.emit(file_path)
 
@@ -145,18 +227,33 @@ class FileTree(QWidget):
         if not index.isValid():
             self.tree.setToolTip("")
             return
-        info = self.model.fileInfo(index)
+        info = self.model.fileInfo(self.proxy.mapToSource(index))
         size = info.size()
         date = info.lastModified().toString('yyyy-MM-dd hh:mm')
         type_ = "Folder" if info.isDir() else info.suffix() or "File"
         tooltip = f"<b>{info.fileName()}</b><br>Type: {type_}<br>Size: {size} bytes<br>Modified: {date}"
         self.tree.setToolTip(tooltip)
 
+    def selected_paths(self, index):
+        """Paths the context menu acts on: the selection if index is part of it, else index alone"""
+        if not index.isValid():
+            return []
+        if not self.tree.selectionModel().isSelected(index):
+            return [self.path_of(index)]
+        paths = sorted({self.path_of(i) for i in self.tree.selectionModel().selectedRows(0)})
+        # A selected folder already brings everything selected inside it
+        top = []
+        for path in paths:
+            if not top or not path.startswith(top[-1].rstrip(os.sep) + os.sep):
+                top.append(path)
+        return top
+
     def show_context_menu(self, pos: QPoint):
         index = self.tree.indexAt(pos)
         menu = QMenu(self)
         menu.setStyleSheet('QMenu { background: #23272e; color: #e0e0e0; font-size: 14px; } QMenu::item:selected { background: #2d313a; }')
-        file_path = self.model.filePath(index) if index.isValid() else None
+        file_path = self.path_of(index) if index.isValid() else None
+        paths = self.selected_paths(index)
         is_dir = os.path.isdir(file_path) if file_path else False
         has_selection = index.isValid()
         # Determine target dir for new file/folder
@@ -167,33 +264,33 @@ class FileTree(QWidget):
         # Copy
         copy_action = QAction('Copy', self)
         copy_action.setEnabled(has_selection)
-        copy_action.triggered.connect(lambda: self.copy_path(file_path, cut=False))
+        copy_action.triggered.connect(lambda: self.copy_paths(paths, cut=False))
         menu.addAction(copy_action)
         # Cut
         cut_action = QAction('Cut', self)
         cut_action.setEnabled(has_selection)
-        cut_action.triggered.connect(lambda: self.copy_path(file_path, cut=True))
+        cut_action.triggered.connect(lambda: self.copy_paths(paths, cut=True))
         menu.addAction(cut_action)
         # Paste
         paste_action = QAction('Paste', self)
-        paste_action.setEnabled(self.clipboard_path is not None and (is_dir or not has_selection))
-        paste_action.triggered.connect(lambda: self.paste_path(file_path if is_dir else os.path.dirname(file_path) if file_path else self.current_folder))
+        paste_action.setEnabled(bool(self.clipboard_paths) and (is_dir or not has_selection))
+        paste_action.triggered.connect(lambda: self.paste_paths(file_path if is_dir else os.path.dirname(file_path) if file_path else self.current_folder))
         menu.addAction(paste_action)
         menu.addSeparator()
         # Move
         move_action = QAction('Move...', self)
         move_action.setEnabled(has_selection)
-        move_action.triggered.connect(lambda: self.move_item(file_path))
+        move_action.triggered.connect(lambda: self.move_items(paths))
         menu.addAction(move_action)
         # Delete
         delete_action = QAction('Delete', self)
         delete_action.setEnabled(has_selection)
-        delete_action.triggered.connect(lambda: self.delete_item(file_path, index))
+        delete_action.triggered.connect(lambda: self.delete_items(paths))
         menu.addAction(delete_action)
         # Rename
         rename_action = QAction('Rename', self)
-        rename_action.setEnabled(has_selection)
-        rename_action.triggered.connect(lambda: self.rename_item(file_path, index))
+        rename_action.setEnabled(has_selection and len(paths) == 1)
+        rename_action.triggered.connect(lambda: self.rename_item(file_path))
         menu.addAction(rename_action)
         menu.addSeparator()
         # New File
@@ -208,51 +305,30 @@ class FileTree(QWidget):
         menu.addAction(new_folder_action)
         menu.exec(self.tree.viewport().mapToGlobal(pos))
 
-    def copy_path(self, file_path, cut=False):
-        self.clipboard_path = file_path
+    def copy_paths(self, file_paths, cut=False):
+        self.clipboard_paths = list(file_paths)
         self.clipboard_cut = cut
-        QApplication.clipboard().setText(file_path)
+        QApplication.clipboard().setText('\n'.join(file_paths))
 
-    def paste_path(self, dest_dir):
-        if not self.clipboard_path or not dest_dir:
+    def paste_paths(self, dest_dir):
+        if not self.clipboard_paths or not dest_dir:
             return
-        base_name = os.path.basename(self.clipboard_path)
-        dest_path = os.path.join(dest_dir, base_name)
-        if os.path.exists(dest_path):
-            return  # Don't overwrite
-        try:
-            if os.path.isdir(self.clipboard_path):
-                if self.clipboard_cut:
-                    shutil.move(self.clipboard_path, dest_path)
-                else:
-                    shutil.copytree(self.clipboard_path, dest_path)
-            else:
-                if self.clipboard_cut:
-                    shutil.move(self.clipboard_path, dest_path)
-                else:
-                    shutil.copy2(self.clipboard_path, dest_path)
-            if self.clipboard_cut:
-                self.clipboard_path = None
-                self.clipboard_cut = False
-        except Exception:
-            pass
-        if self.model and self.current_folder:
-            self.model.setRootPath(self.current_folder)
+        kind = 'move' if self.clipboard_cut else 'copy'
+        ops = [(kind, path, os.path.join(dest_dir, os.path.basename(path))) for path in self.clipboard_paths]
+        if self.clipboard_cut:
+            # Cut items can only be pasted once
+            self.clipboard_paths = []
+            self.clipboard_cut = False
+        verb = 'Moving' if kind == 'move' else 'Copying'
+        self.file_ops.submit(f'{verb} {len(ops)} item(s)', ops, ('paste', kind))
 
-    def move_item(self, file_path):
-        if not file_path:
+    def move_items(self, file_paths):
+        if not file_paths:
             return
-        dest_dir = QFileDialog.getExistingDirectory(self, 'Move to Folder', os.path.dirname(file_path))
+        dest_dir = QFileDialog.getExistingDirectory(self, 'Move to Folder', os.path.dirname(file_paths[0]))
         if dest_dir:
-            base_name = os.path.basename(file_path)
-            dest_path = os.path.join(dest_dir, base_name)
-            try:
-                shutil.move(file_path, dest_path)
-                self.undo_stack.append(('move', {'src': file_path, 'dst': dest_path}))
-            except Exception:
-                pass
-            if self.model and self.current_folder:
-                self.model.setRootPath(self.current_folder)
+            ops = [('move', path, os.path.join(dest_dir, os.path.basename(path))) for path in file_paths]
+            self.file_ops.submit(f'Moving {len(ops)} item(s)', ops, ('move', None))
 
     def create_new_file(self, dir_path):
         # Always use self.current_folder if dir_path is None
@@ -267,11 +343,10 @@ class FileTree(QWidget):
                 try:
                     with open(file_path, 'w', encoding='utf-8') as f:
                         f.write('')
-                    self.undo_stack.append(('create', {'path': file_path}))
-                except Exception:
-                    pass
-            if self.model and self.current_folder:
-                self.model.setRootPath(self.current_folder)
+                    self.undo_stack.append(('create', [(file_path, None)]))
+                except OSError as e:
+                    self.show_errors('New File', [(file_path, e.strerror or str(e))])
+            self.refresh_dirs([dir_path])
 
     def create_new_folder(self, dir_path):
         # Always use self.current_folder if dir_path is None
@@ -285,27 +360,17 @@ class FileTree(QWidget):
             if not os.path.exists(folder_path):
                 try:
                     os.makedirs(folder_path)
-                    self.undo_stack.append(('create', {'path': folder_path}))
-                except Exception:
-                    pass
-            if self.model and self.current_folder:
-                self.model.setRootPath(self.current_folder)
-
-    def delete_item(self, file_path, index):
-        # Move to temp backup for undo
-        import tempfile
-        backup = tempfile.mktemp(prefix='deleted_', dir=tempfile.gettempdir())
-        try:
-            if os.path.isdir(file_path):
-                shutil.move(file_path, backup)
-            else:
-                shutil.move(file_path, backup)
-            self.undo_stack.append(('delete', {'path': file_path, 'backup': backup}))
-        except Exception:
-            pass
-        self.model.remove(index)
+                    self.undo_stack.append(('create', [(folder_path, None)]))
+                except OSError as e:
+                    self.show_errors('New Folder', [(folder_path, e.strerror or str(e))])
+            self.refresh_dirs([dir_path])
 
-    def rename_item(self, file_path, index):
+    def delete_items(self, file_paths):
+        # Moved to a temp backup, so the delete can be undone
+        ops = [('move', path, backup_path(path)) for path in file_paths]
+        self.file_ops.submit(f'Deleting {len(ops)} item(s)', ops, ('delete', None))
+
+    def rename_item(self, file_path):
         base_dir = os.path.dirname(file_path)
         old_name = os.path.basename(file_path)
         new_name, ok = QInputDialog.getText(self, 'Rename', 'Enter new name:', text=old_name)
@@ -313,44 +378,98 @@ class FileTree(QWidget):
             new_path = os.path.join(base_dir, new_name)
             try:
                 os.rename(file_path, new_path)
-                self.model.setData(index, new_name)
-                self.undo_stack.append(('rename', {'old': file_path, 'new': new_path}))
-            except Exception as e:
-                pass
-
-    def apply_theme(self, colors, font, ui=None):
-        ui = ui or {}
-        bg = ui.get('sidebar_bg', colors.get('panel', '#20242a'))
-        text = ui.get('sidebar_text', colors.get('text', '#e0e0e0'))
-        selected = ui.get('sidebar_selected_bg', colors.get('selected', '#2d313a'))
-        border = ui.get('sidebar_border', colors.get('border', '#23272e'))
-        self.setStyleSheet(f'background: {bg}; color: {text};')
-        font_family = font.get('family', 'Fira Mono')
-        font_size = font.get('size', 13)
-        font_obj = QFont(font_family, font_size)
-        if self.tree:
-            self.tree.setStyleSheet(f'''
-                QTreeView {{
-                    background: {bg};
-                    color: {text};
-                    border: none;
-                    font-size: 15px;
-                    padding: 8px 0 8px 0;
-                }}
-                QTreeView::item {{
-                    padding: 6px 8px;
-                    margin: 2px 0;
-                }}
-                QTreeView::item:selected {{
-                    background: {selected};
-                    color: #fff;
-                    border-radius: 6px;
-                }}
-            ''')
-            self.tree.setFont(font_obj)
-        if self.empty_panel:
-            self.empty_panel.setStyleSheet(f'background: {bg}; color: {text};')
+                self.undo_stack.append(('rename', [(file_path, new_path)]))
+                self.itemRenamed.emit(file_path, new_path)
+            except OSError as e:
+                self.show_errors('Rename', [(file_path, e.strerror or str(e))])
+            self.refresh_dirs([base_dir])
+
+    def on_file_job_started(self, description):
+        self.ops_label.setText(description)
+        self.ops_progress.setRange(0, 0)
+        self.ops_bar.show()
+
+    def on_file_job_progress(self, done, total, _path):
+        self.ops_progress.setRange(0, max(total, 1))
+        self.ops_progress.setValue(done)
+
+    def on_file_job_finished(self, description, completed, errors, cancelled, context):
+        action, detail = context
+        moved = [(src, dst) for kind, src, dst in completed if kind == 'move']
+        for src, dst in moved:
+            # Deleted items only moved to a backup; tabs must not follow them there
+            if action == 'delete':
+                self.itemDeleted.emit(src)
+            else:
+                self.itemRenamed.emit(src, dst)
+        for kind, _, path in completed:
+            if kind == 'restore':
+                self.itemRestored.emit(path)
+        if action in ('move', 'delete') and moved:
+            self.undo_stack.append((action, moved))
+        if action == 'undo' and (errors or cancelled):
+            # What could not be undone stays undoable
+            op, items = detail
+            done = set(completed)
+            left = [item for item, item_op in zip(items, self.undo_ops(op, items)) if item_op not in done]
+            if left:
+                self.undo_stack.append((op, left))
+        self.refresh_dirs(os.path.dirname(p) for _, src, dst in completed for p in (src, dst) if p)
+        if not self.file_ops.is_busy():
+            self.ops_bar.hide()
+        if errors:
+            self.show_errors(description, errors, cancelled)
+
+    def show_errors(self, title, errors, cancelled=False):
+        """One message box summing up the items that failed"""
+        lines = [f'{os.path.basename(path) or path}: {message}' for path, message in errors[:MAX_LISTED_ERRORS]]
+        if len(errors) > MAX_LISTED_ERRORS:
+            lines.append(f'...and {len(errors) - MAX_LISTED_ERRORS} more')
+        if cancelled:
+            lines.append('The rest was cancelled.')
+        QMessageBox.warning(self, title, f'{len(errors)} item(s) failed:\n\n' + '\n'.join(lines))
 
     def on_dir_changed(self, path):
-        if self.model and self.current_folder:
-            self.model.setRootPath(self.current_folder) 
\ No newline at end of file
+        self.refresh_dirs([path])
+
+    def refresh_dirs(self, dir_paths):
+        """Re-read these folders soon; changes arriving in a burst are handled together"""
+        if not self.model or not self.current_folder:
+            return
+        self._changed_dirs.update(os.path.normpath(p) for p in dir_paths if p)
+        now = time.monotonic()
+        if self._first_change is None:
+            self._first_change = now
+        # Each change pushes the refresh back, but a long burst cannot hold it off forever
+        if now - self._first_change < MAX_REFRESH_DELAY or not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def refresh_changed_dirs(self):
+        """Have the model re-list each changed folder it has loaded, and nothing else"""
+        changed = self._changed_dirs
+        self._changed_dirs = set()
+        self._first_change = None
+        if not self.model or not self.current_folder:
+            return
+        root = os.path.normpath(self.current_folder)
+        # An edited .gitignore changes what is shown below its folder
+        rules_changed = [path for path in changed if self.ignore_rules.invalidate(path)]
+        listed = False
+        for path in sorted(changed):
+            if path == root or not os.path.isdir(path):
+                continue  # root is re-read below; a removed folder shows up in its parent
+            if not path.startswith(root + os.sep):
+                continue
+            if not self.model.index(path).isValid() or path in self._stale_dirs:
+                continue  # never loaded or collapsed: read when next expanded
+            # setRootPath re-lists the folder it is given, which is the only
+            # per-folder refresh QFileSystemModel offers
+            self.model.setRootPath(path)
+            listed = True
+        if root in changed and not listed:
+            self.model.setRootPath(os.path.dirname(root))
+            listed = True
+        if listed:
+            self.model.setRootPath(self.current_folder)
+        if rules_changed:
+            self.proxy.invalidateFilter() 
\ No newline at end of file
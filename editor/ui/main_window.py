@@ -4,14 +4,31 @@ from PyQt6.QtWidgets import (
     QFileDialog, QFrame, QSizePolicy, QHBoxLayout, QPushButton, QStackedWidget,
     QLabel, QVBoxLayout, QLineEdit, QCheckBox, QSpinBox, QDoubleSpinBox, QHBoxLayout, QPushButton, QScrollArea, QWidget, QComboBox, QMessageBox
 )
-from PyQt6.QtCore import Qt, QRect, QRectF
+from PyQt6.QtCore import Qt, QRect, QRectF, QTimer
 from PyQt6.QtGui import QPainterPath, QRegion, QIcon
 from .title_bar import TitleBar
 from .toolbar import EditorToolBar
-from .tabs import EditorTabs
+from .tabs import EditorTabs, PendingEditorTab
 from .file_tree import FileTree
 from .code_editor import CodeEditor
+from .quick_open import QuickOpen, SymbolSearch
+from .search_panel import SearchPanel
+from .outline_panel import OutlinePanel
+from .theme_style import compile_stylesheet, set_role
+from ..file_io import write_atomic, iter_document_chunks
+from ..workspace_index import WorkspaceIndex
+from ..trigram_index import TrigramIndex
+from ..symbol_index import SymbolIndex
 from config_manager import save_settings, load_settings, DEFAULT_SETTINGS
+from session_manager import load_session, save_session
+
+# Quiet time after the last layout change before the session is written
+SESSION_SAVE_DELAY_MS = 2000
+# (minimum, maximum) of int settings whose spin box needs other limits than 0-99
+SETTING_RANGES = {
+    'font_size': (6, 72),
+    'memory_budget_mb': (64, 256 * 1024),
+}
 
 class SettingsPanel(QWidget):
     def __init__(self, settings, themes, main_window, parent=None):
@@ -20,9 +37,11 @@ class SettingsPanel(QWidget):
         self.themes = themes
         self.main_window = main_window
         self.widgets = {}
+        set_role(self, 'settingsPanel')
         self.layout = QVBoxLayout(self)
         self.layout.setAlignment(Qt.AlignmentFlag.AlignTop)
         self.search_box = QLineEdit()
+        set_role(self.search_box, 'settingsSearch')
         self.search_box.setPlaceholderText('Search settings...')
         self.search_box.textChanged.connect(self.update_filter)
         self.layout.addWidget(self.search_box)
@@ -82,6 +101,8 @@ class SettingsPanel(QWidget):
                 widget.stateChanged.connect(lambda state, k=key: self.update_setting(k, bool(state)))
             elif isinstance(value, int):
                 widget = QSpinBox()
+                if key in SETTING_RANGES:
+                    widget.setRange(*SETTING_RANGES[key])
                 widget.setValue(value)
                 widget.valueChanged.connect(lambda v, k=key: self.update_setting(k, v))
             elif isinstance(value, float):
@@ -103,15 +124,12 @@ class SettingsPanel(QWidget):
         for t in self.themes:
             if t['id'] == theme_id:
                 self.main_window.apply_theme(t)
-                self.main_window.file_tree.apply_theme(t.get('colors', {}), t.get('font', {}))
-                self.main_window.tabs.apply_theme(t.get('colors', {}), t.get('font', {}))
-                if self.main_window.centralWidget():
-                    bg = t.get('colors', {}).get('background', '#181c20')
-                    self.main_window.centralWidget().setStyleSheet(f'background: {bg}; border-radius: {self.main_window.RADIUS if self.settings.get("rounded_borders", True) else 0}px;')
                 break
 
     def update_setting(self, key, value):
         self.settings[key] = value
+        if key == 'memory_budget_mb':
+            self.main_window.tabs.memory_budget = value * 1024 * 1024
 
     def save_settings(self):
         save_settings(self.settings)
@@ -135,16 +153,6 @@ class SettingsPanel(QWidget):
                 if item.widget():
                     item.widget().setVisible(visible)
 
-    def apply_theme(self, colors, font, ui=None):
-        ui = ui or {}
-        bg = ui.get('background', colors.get('background', '#181c20'))
-        text = ui.get('text', colors.get('text', '#e0e0e0'))
-        self.setStyleSheet(f'background: {bg}; color: {text};')
-        for key, (label, widget, _) in self.widgets.items():
-            label.setStyleSheet(f'color: {text};')
-            widget.setStyleSheet(f'color: {text}; background: {bg};')
-        self.search_box.setStyleSheet(f"background: {bg}; color: {text}; border: 1px solid {ui.get('border', '#23272e')}; border-radius: 6px; padding: 4px;")
-
 class MainWindow(QMainWindow):
     RESIZE_MARGIN = 12  # Increased for easier corner grabbing
     RADIUS = 16
@@ -158,16 +166,19 @@ class MainWindow(QMainWindow):
         self.resize(1200, 800)
         self.setMinimumSize(900, 600)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground, True)
-        self.setStyleSheet('border-radius: 16px; background: transparent;')
+        # Styled by the theme stylesheet, see apply_theme
+        set_role(self, 'window')
 
         # ─── Central + main layout ────────────────────────────────────────────────
         central = QWidget()
+        set_role(central, 'central')
         main_layout = QVBoxLayout(central)
         main_layout.setContentsMargins(0, 0, 0, 0)
         main_layout.setSpacing(0)
 
         # ─── Header: TitleBar + Toolbar ──────────────────────────────────────────
         self.header = QWidget()
+        set_role(self.header, 'header')
         self.header.setSizePolicy(
             QSizePolicy.Policy.Expanding,
             QSizePolicy.Policy.Fixed
@@ -187,11 +198,6 @@ class MainWindow(QMainWindow):
         self.toolbar.saveClicked.connect(self.save_current_file)
         self.toolbar.saveFileClicked.connect(self.save_current_file_as)  # Connect new signal
         header_layout.addWidget(self.toolbar)
-        self.header.setStyleSheet(
-            'background: #181c20; '
-            'border-top-left-radius: 16px; border-top-right-radius: 16px;'
-            'border-bottom: 2px solid #23272e;'
-        )
         main_layout.addWidget(self.header, stretch=0)
 
         # ─── Main area: sidebar + file‐tree/tabs/settings ────────────────────────
@@ -207,6 +213,7 @@ class MainWindow(QMainWindow):
 
         # Sidebar (vertical)
         self.sidebar = QWidget()
+        set_role(self.sidebar, 'sidebar')
         sidebar_layout = QVBoxLayout(self.sidebar)
         sidebar_layout.setContentsMargins(0, 0, 0, 0)
         sidebar_layout.setSpacing(0)
@@ -216,16 +223,34 @@ class MainWindow(QMainWindow):
         self.files_btn.setCheckable(True)
         self.files_btn.setChecked(True)
         self.files_btn.setFixedSize(40, 40)
-        self.files_btn.setStyleSheet('QPushButton { border: none; background: #23272e; } QPushButton:checked { background: #181c20; }')
+        set_role(self.files_btn, 'sidebarButton')
         self.files_btn.clicked.connect(lambda: self.switch_panel(0))
         sidebar_layout.addWidget(self.files_btn)
+        self.search_btn = QPushButton()
+        self.search_btn.setIcon(QIcon.fromTheme('edit-find'))
+        self.search_btn.setToolTip('Search (Ctrl+Shift+F)')
+        self.search_btn.setCheckable(True)
+        self.search_btn.setChecked(False)
+        self.search_btn.setFixedSize(40, 40)
+        set_role(self.search_btn, 'sidebarButton')
+        self.search_btn.clicked.connect(self.show_search_panel)
+        sidebar_layout.addWidget(self.search_btn)
+        self.outline_btn = QPushButton()
+        self.outline_btn.setIcon(QIcon.fromTheme('view-list-tree'))
+        self.outline_btn.setToolTip('Outline (Ctrl+Shift+O)')
+        self.outline_btn.setCheckable(True)
+        self.outline_btn.setChecked(False)
+        self.outline_btn.setFixedSize(40, 40)
+        set_role(self.outline_btn, 'sidebarButton')
+        self.outline_btn.clicked.connect(lambda: self.switch_panel(0, 2))
+        sidebar_layout.addWidget(self.outline_btn)
         self.settings_btn = QPushButton()
         self.settings_btn.setIcon(QIcon.fromTheme('settings'))
         self.settings_btn.setToolTip('Settings')
         self.settings_btn.setCheckable(True)
         self.settings_btn.setChecked(False)
         self.settings_btn.setFixedSize(40, 40)
-        self.settings_btn.setStyleSheet('QPushButton { border: none; background: #23272e; } QPushButton:checked { background: #181c20; }')
+        set_role(self.settings_btn, 'sidebarButton')
         self.settings_btn.clicked.connect(lambda: self.switch_panel(1))
         sidebar_layout.addWidget(self.settings_btn)
         sidebar_layout.addStretch()
@@ -233,10 +258,9 @@ class MainWindow(QMainWindow):
         self.theme_switch_btn = QPushButton('🌙')
         self.theme_switch_btn.setToolTip('Switch Light/Dark Theme')
         self.theme_switch_btn.setFixedSize(40, 40)
-        self.theme_switch_btn.setStyleSheet('QPushButton { background: #181c20; color: #ffcc80; border: none; border-radius: 8px; font-size: 20px; } QPushButton:hover { background: #23272e; }')
+        set_role(self.theme_switch_btn, 'themeSwitch')
         self.theme_switch_btn.clicked.connect(self.switch_theme)
         sidebar_layout.addWidget(self.theme_switch_btn)
-        self.sidebar.setStyleSheet('background: #23272e; border-right: 1px solid #23272e;')
         main_area_layout.addWidget(self.sidebar, stretch=0)
 
         # Stacked panel: 0 = file tree/tabs, 1 = settings
@@ -250,10 +274,30 @@ class MainWindow(QMainWindow):
         root_path = os.path.abspath(
             os.path.join(os.path.dirname(__file__), '../../..')
         )
+        # Reopen the folder of the last session
+        self.session = load_session()
+        if self.session['folder'] and os.path.isdir(self.session['folder']):
+            root_path = self.session['folder']
         self.file_tree = FileTree(root_path)
         self.file_tree.fileOpened.connect(self.open_file_in_tab)
-        splitter.addWidget(self.file_tree)
+        # Left of the editor: file tree or search results, the editor stays in view
+        self.side_panel = QStackedWidget()
+        self.side_panel.addWidget(self.file_tree)
+        self.search_panel = SearchPanel(self.file_tree.current_folder)
+        self.search_panel.matchActivated.connect(self.open_file_at)
+        self.file_tree.folderOpened.connect(self.search_panel.set_root)
+        self.side_panel.addWidget(self.search_panel)
+        self.outline_panel = OutlinePanel()
+        self.outline_panel.symbolActivated.connect(self.go_to_symbol)
+        self.side_panel.addWidget(self.outline_panel)
+        splitter.addWidget(self.side_panel)
         self.tabs = EditorTabs()
+        self.tabs.currentChanged.connect(self.update_outline_editor)
+        self.tabs.editor_factory = self.create_editor
+        self.tabs.memory_budget = self.settings.get('memory_budget_mb', DEFAULT_SETTINGS['memory_budget_mb']) * 1024 * 1024
+        self.file_tree.itemRenamed.connect(self.tabs.rename_path)
+        self.file_tree.itemDeleted.connect(self.tabs.update_path_tabs)
+        self.file_tree.itemRestored.connect(self.tabs.update_path_tabs)
         splitter.addWidget(self.tabs)
         splitter.setSizes([260, 940])
         file_tabs_layout.addWidget(splitter)
@@ -265,15 +309,8 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(main_area, stretch=1)
         self.setCentralWidget(central)
 
-        # After UI setup, apply theme
-        theme = self.get_current_theme()
-        if theme:
-            self.apply_theme(theme)
-            self.file_tree.apply_theme(theme.get('colors', {}), theme.get('font', {}))
-            self.tabs.apply_theme(theme.get('colors', {}), theme.get('font', {}))
-            # Set central widget background from theme
-            bg = theme.get('colors', {}).get('background', '#181c20')
-            central.setStyleSheet(f'background: {bg}; border-radius: {self.RADIUS if self.settings.get("rounded_borders", True) else 0}px;')
+        # After UI setup, apply theme; without themes the stylesheet falls back to the dark colours
+        self.apply_theme(self.get_current_theme() or {})
 
         # ─── Window resizing & title‐bar signals ─────────────────────────────────
         self._is_maximized = False
@@ -294,6 +331,93 @@ class MainWindow(QMainWindow):
         self.ctrl_s_shortcut = QShortcut(QKeySequence("Ctrl+S"), self)
         self.ctrl_s_shortcut.activated.connect(self.save_current_file)
 
+        # Ctrl+P: fuzzy-find files of the open folder, indexed in the background
+        self.workspace_index = WorkspaceIndex(self)
+        self.workspace_index.set_root(self.file_tree.current_folder)
+        self.file_tree.folderOpened.connect(self.workspace_index.set_root)
+        self.quick_open = QuickOpen(self.workspace_index, central)
+        self.quick_open.fileChosen.connect(self.open_file_in_tab)
+        self.ctrl_p_shortcut = QShortcut(QKeySequence("Ctrl+P"), self)
+        self.ctrl_p_shortcut.activated.connect(self.quick_open.open_box)
+        # Find in files reads only the files the trigram index names as candidates
+        self.trigram_index = TrigramIndex(self)
+        self.trigram_index.set_root(self.file_tree.current_folder)
+        self.file_tree.folderOpened.connect(self.trigram_index.set_root)
+        self.workspace_index.directoryChanged.connect(self.trigram_index.rescan)
+        self.search_panel.index = self.trigram_index
+        self.ctrl_shift_f_shortcut = QShortcut(QKeySequence("Ctrl+Shift+F"), self)
+        self.ctrl_shift_f_shortcut.activated.connect(self.show_search_panel)
+        self.ctrl_shift_o_shortcut = QShortcut(QKeySequence("Ctrl+Shift+O"), self)
+        self.ctrl_shift_o_shortcut.activated.connect(lambda: self.switch_panel(0, 2))
+        # Ctrl+T: go to a class or function anywhere in the folder
+        self.symbol_index = SymbolIndex(self)
+        self.symbol_index.set_root(self.file_tree.current_folder)
+        self.file_tree.folderOpened.connect(self.symbol_index.set_root)
+        self.workspace_index.directoryChanged.connect(self.symbol_index.rescan)
+        self.symbol_search = SymbolSearch(self.symbol_index, central)
+        self.symbol_search.symbolChosen.connect(self.open_file_at)
+        self.ctrl_t_shortcut = QShortcut(QKeySequence("Ctrl+T"), self)
+        self.ctrl_t_shortcut.activated.connect(self.symbol_search.open_box)
+
+        # The session is written a moment after the layout stops changing, and on exit
+        self._session_timer = QTimer(self)
+        self._session_timer.setSingleShot(True)
+        self._session_timer.setInterval(SESSION_SAVE_DELAY_MS)
+        self._session_timer.timeout.connect(self.save_session)
+        self.restore_session()
+        self.tabs.tabsChanged.connect(self.schedule_session_save)
+        self.tabs.currentChanged.connect(self.schedule_session_save)
+        self.tabs.tabBar().tabMoved.connect(self.schedule_session_save)
+        self.file_tree.folderOpened.connect(self.schedule_session_save)
+        self.file_tree.expansionChanged.connect(self.schedule_session_save)
+
+    def restore_session(self):
+        """Reopen the tabs of the last session; files are only read once their tab is shown"""
+        session = self.session
+        if session['folder'] and session['folder'] == self.file_tree.current_folder:
+            self.file_tree.expand_folders(session['expanded'])
+        current = -1
+        for i, (file_path, cursor, scroll) in enumerate(session['tabs']):
+            if not os.path.isfile(file_path):
+                continue
+            if i == session['current']:
+                current = self.tabs.count()
+            self.add_file_tab(file_path, activate=False, view_state={'cursor': cursor, 'scroll': scroll})
+        if self.tabs.count():
+            self.tabs.setCurrentIndex(max(current, 0))
+
+    def session_snapshot(self):
+        tabs = []
+        current = -1
+        for i in range(self.tabs.count()):
+            widget = self.tabs.widget(i)
+            if not getattr(widget, 'file_path', None):
+                continue
+            if isinstance(widget, PendingEditorTab):
+                state = widget.view_state or {}
+            else:
+                state = widget.view_state()
+            if i == self.tabs.currentIndex():
+                current = len(tabs)
+            tabs.append((widget.file_path, state.get('cursor', 0), state.get('scroll', 0)))
+        return {
+            'folder': self.file_tree.current_folder,
+            'expanded': self.file_tree.expanded_folders(),
+            'tabs': tabs,
+            'current': current,
+        }
+
+    def schedule_session_save(self, *_):
+        self._session_timer.start()
+
+    def save_session(self):
+        save_session(self.session_snapshot())
+
+    def closeEvent(self, event):
+        self._session_timer.stop()
+        self.save_session()
+        super().closeEvent(event)
+
     def get_current_theme(self):
         theme_id = self.settings.get('current_theme')
         for t in self.themes:
@@ -302,90 +426,26 @@ class MainWindow(QMainWindow):
         return self.themes[0] if self.themes else None
 
     def apply_theme(self, theme):
+        """Restyle every widget in one go from the theme's compiled stylesheet.
+
+        Painting is held off until everything has been restyled, so a switch shows as a
+        single repaint instead of one per widget.
+        """
         colors = theme.get('colors', {})
         font = theme.get('font', {})
         ui = theme.get('ui', {})
-        bg = ui.get('background', colors.get('background', '#181c20'))
-        sidebar_bg = ui.get('sidebar_bg', colors.get('panel', '#20242a'))
-        border = ui.get('sidebar_border', colors.get('border', '#23272e'))
-        header_bg = ui.get('toolbar_bg', colors.get('header', '#23272e'))
-        text_color = ui.get('sidebar_text', colors.get('text', '#e0e0e0'))
-        accent = colors.get('accent', '#82aaff')
-        selected_bg = ui.get('sidebar_selected_bg', colors.get('selected', '#2d313a'))
         radius = self.RADIUS if self.settings.get('rounded_borders', True) else 0
-
-        # Main window background and border radius
-        self.setStyleSheet(f'border-radius: {self.RADIUS if self.settings.get("rounded_borders", True) else 0}px; background: transparent;')
-        if self.centralWidget():
-            self.centralWidget().setStyleSheet(f'background: {bg}; border-radius: {self.RADIUS if self.settings.get("rounded_borders", True) else 0}px;')
-
-        # Sidebar
-        if hasattr(self, 'sidebar'):
-            self.sidebar.setStyleSheet(f'background: {sidebar_bg}; border-right: 1px solid {border};')
-            btn_style = f'''
-                QPushButton {{
-                    background: {sidebar_bg};
-                    color: {text_color};
-                    border: none;
-                    border-radius: 10px;
-                    font-size: 18px;
-                    margin: 4px 0;
-                }}
-                QPushButton:checked {{
-                    background: {selected_bg};
-                }}
-                QPushButton:hover {{
-                    background: {selected_bg};
-                }}
-            '''
-            self.files_btn.setStyleSheet(btn_style)
-            self.settings_btn.setStyleSheet(btn_style)
-            # Theme switch button
-            theme_btn_style = f'''
-                QPushButton {{
-                    background: {sidebar_bg};
-                    color: #ffcc80;
-                    border: none;
-                    border-radius: 10px;
-                    font-size: 20px;
-                    margin: 4px 0;
-                }}
-                QPushButton:hover {{
-                    background: {selected_bg};
-                }}
-            '''
-            self.theme_switch_btn.setStyleSheet(theme_btn_style)
-
-        # Header (title bar + toolbar)
-        if hasattr(self, 'header'):
-            self.header.setStyleSheet(
-                f'background: {header_bg}; '
-                f'border-top-left-radius: {radius}px; border-top-right-radius: {radius}px;'
-                f'border-bottom: 2px solid {border};'
-            )
-        if hasattr(self, 'title_bar') and hasattr(self.title_bar, 'apply_theme'):
+        stylesheet = compile_stylesheet(theme, radius)
+        self.setUpdatesEnabled(False)
+        try:
+            if self.styleSheet() != stylesheet:
+                self.setStyleSheet(stylesheet)
+            # Fonts and the colours widgets paint themselves are not in the stylesheet
             self.title_bar.apply_theme(colors, font, ui)
-        if hasattr(self, 'toolbar') and hasattr(self.toolbar, 'apply_theme'):
             self.toolbar.apply_theme(colors, font, ui)
-
-        # File tree
-        if hasattr(self, 'file_tree') and hasattr(self.file_tree, 'apply_theme'):
-            self.file_tree.apply_theme(colors, font, ui)
-
-        # Tabs
-        if hasattr(self, 'tabs') and hasattr(self.tabs, 'apply_theme'):
             self.tabs.apply_theme(colors, font, ui)
-
-        # Code editor (all tabs)
-        if hasattr(self, 'tabs'):
-            for i in range(self.tabs.count()):
-                editor = self.tabs.widget(i)
-                if hasattr(editor, 'apply_theme'):
-                    editor.apply_theme(colors, font, ui)
-
-        # Settings panel
-        if hasattr(self, 'settings_panel') and hasattr(self.settings_panel, 'apply_theme'):
-            self.settings_panel.apply_theme(colors, font, ui)
+        finally:
+            self.setUpdatesEnabled(True)
 
     def get_theme_font(self):
         # Prefer font from settings, else from theme
@@ -393,11 +453,29 @@ class MainWindow(QMainWindow):
         font_size = self.settings.get('font_size') or self.get_current_theme().get('font', {}).get('size', 13)
         return font_family, font_size
 
-    def switch_panel(self, idx):
+    def switch_panel(self, idx, side=0):
+        """idx: 0 = file tree/tabs, 1 = settings; side picks the file tree (0), search (1) or outline (2) next to the tabs"""
         self.stacked_panel.setCurrentIndex(idx)
-        self.files_btn.setChecked(idx == 0)
+        if idx == 0:
+            self.side_panel.setCurrentIndex(side)
+        self.files_btn.setChecked(idx == 0 and side == 0)
+        self.search_btn.setChecked(idx == 0 and side == 1)
+        self.outline_btn.setChecked(idx == 0 and side == 2)
         self.settings_btn.setChecked(idx == 1)
 
+    def show_search_panel(self):
+        self.switch_panel(0, 1)
+        self.search_panel.focus_query()
+
+    def update_outline_editor(self, *_):
+        widget = self.tabs.currentWidget()
+        self.outline_panel.set_editor(widget if isinstance(widget, CodeEditor) else None)
+
+    def go_to_symbol(self, line):
+        widget = self.tabs.currentWidget()
+        if isinstance(widget, CodeEditor):
+            widget.go_to_line(line)
+
     def resizeEvent(self, event):
         self.update_rounded_corners()
         super().resizeEvent(event)
@@ -512,37 +590,54 @@ class MainWindow(QMainWindow):
         if d in ('topright','bottomleft'):  return Qt.CursorShape.SizeBDiagCursor
         return Qt.CursorShape.ArrowCursor
 
-    def open_file_in_tab(self, file_path):
-        for i in range(self.tabs.count()):
-            if self.tabs.tabText(i) == os.path.basename(file_path):
-                self.tabs.setCurrentIndex(i)
-                return
+    def open_file_in_tab(self, file_path, activate=True):
+        self.add_file_tab(file_path, activate)
 
-        editor = CodeEditor()
-        # Apply current theme to the new editor before showing
-        theme = self.get_current_theme()
-        if theme:
-            colors = theme.get('colors', {})
-            font = theme.get('font', {})
-            editor.apply_theme(colors, font)
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            editor.set_file_content(content, file_path)
-        except Exception as e:
-            editor.set_file_content(f'Error opening file: {e}', file_path)
+    def open_files_in_tabs(self, file_paths):
+        """Open several files at once; only the last one is shown and loaded right away"""
+        for i, file_path in enumerate(file_paths):
+            self.add_file_tab(file_path, activate=i == len(file_paths) - 1)
+
+    def add_file_tab(self, file_path, activate=True, view_state=None):
+        self.workspace_index.note_opened(file_path)
+        widget = self.tabs.find_tab(file_path)
+        if widget is not None:
+            if activate:
+                self.tabs.setCurrentWidget(widget)
+            return
 
-        self.tabs.add_editor_tab(editor, os.path.basename(file_path))
+        # The editor itself is only built once the tab is shown
+        placeholder = self.tabs.add_pending_tab(file_path, view_state, activate)
         # Update tab title to show initial state
-        self.tabs.update_tab_title(editor)
-        # Apply theme to tabs (in case of theme switch)
+        self.tabs.update_tab_title(placeholder)
+
+    def open_file_at(self, file_path, line, column=0):
+        """Open file_path and put the cursor at line and column, e.g. for a search match"""
+        self.open_file_in_tab(file_path)
+        widget = self.tabs.find_tab(file_path)
+        if isinstance(widget, PendingEditorTab):
+            widget = self.tabs.materialize_tab(self.tabs.indexOf(widget))
+        if isinstance(widget, CodeEditor):
+            widget.go_to_line(line, column)
+
+    def create_editor(self, file_path, view_state=None, scratch_path=None):
+        """Build the editor for a tab that is being shown for the first time"""
+        editor = CodeEditor()
+        # Fonts and gutter colours of the current theme; the stylesheet covers the rest
+        theme = self.get_current_theme()
         if theme:
-            self.tabs.apply_theme(colors, font)
+            editor.apply_theme(theme.get('colors', {}), theme.get('font', {}), theme.get('ui', {}))
+        # Read in the background; errors end up in the editor like before
+        editor.load_file(file_path, view_state, scratch_path)
+        editor.editor.cursorPositionChanged.connect(self.schedule_session_save)
+        editor.editor.verticalScrollBar().valueChanged.connect(self.schedule_session_save)
+        editor.fileSaved.connect(self.trigram_index.update_file)
+        editor.fileSaved.connect(self.symbol_index.update_file)
+        return editor
 
     def open_file_dialog(self):
-        fp, _ = QFileDialog.getOpenFileName(self, 'Open File', '', 'All Files (*)')
-        if fp:
-            self.open_file_in_tab(fp)
+        file_paths, _ = QFileDialog.getOpenFileNames(self, 'Open File', '', 'All Files (*)')
+        self.open_files_in_tabs(file_paths)
 
     def open_folder_dialog(self):
         folder = QFileDialog.getExistingDirectory(self, 'Open Folder', '')
@@ -553,6 +648,7 @@ class MainWindow(QMainWindow):
         """Save current file (Ctrl+S behavior)"""
         current = self.tabs.currentWidget()
         if current and isinstance(current, CodeEditor):
+            current.fsync_on_save = self.settings.get('fsync_on_save', False)
             if hasattr(current, 'save_file'):
                 success = current.save_file()
                 if success:
@@ -561,8 +657,7 @@ class MainWindow(QMainWindow):
                 # Fallback for older editor instances
                 if current.file_path:
                     try:
-                        with open(current.file_path, 'w', encoding='utf-8') as f:
-                            f.write(current.toPlainText())
+                        write_atomic(current.file_path, iter_document_chunks(current.editor.document()))
                     except Exception:
                         pass
 
@@ -570,6 +665,7 @@ class MainWindow(QMainWindow):
         """Save current file as (toolbar button behavior)"""
         current = self.tabs.currentWidget()
         if current and isinstance(current, CodeEditor):
+            current.fsync_on_save = self.settings.get('fsync_on_save', False)
             if hasattr(current, 'save_file_as'):
                 success = current.save_file_as()
                 if success:
@@ -579,8 +675,7 @@ class MainWindow(QMainWindow):
                 fp, _ = QFileDialog.getSaveFileName(self, 'Save File As', '', 'All Files (*)')
                 if fp:
                     try:
-                        with open(fp, 'w', encoding='utf-8') as f:
-                            f.write(current.toPlainText())
+                        write_atomic(fp, iter_document_chunks(current.editor.document()))
                     except Exception:
                         pass
 
@@ -589,31 +684,11 @@ class MainWindow(QMainWindow):
         if not current_theme or not self.themes:
             return
         current_type = current_theme.get('styleType', 'dark')
-        # Find next theme of opposite styleType
+        # Next theme of opposite styleType; if there is none, cycle to the first theme
         next_type = 'light' if current_type == 'dark' else 'dark'
-        for t in self.themes:
-            if t.get('styleType') == next_type:
-                self.settings['current_theme'] = t['id']
-                save_settings(self.settings)
-                self.apply_theme(t)
-                # Update file tree/tabs for new theme
-                self.file_tree.apply_theme(t.get('colors', {}), t.get('font', {}))
-                self.tabs.apply_theme(t.get('colors', {}), t.get('font', {}))
-                # Update theme switch icon
-                self.theme_switch_btn.setText('🌙' if next_type == 'dark' else '☀️')
-                # Update central widget bg
-                if self.centralWidget():
-                    bg = t.get('colors', {}).get('background', '#181c20')
-                    self.centralWidget().setStyleSheet(f'background: {bg}; border-radius: {self.RADIUS if self.settings.get("rounded_borders", True) else 0}px;')
-                return
-        # If no opposite type found, cycle to first theme
-        t = self.themes[0]
+        t = next((t for t in self.themes if t.get('styleType') == next_type), self.themes[0])
         self.settings['current_theme'] = t['id']
         save_settings(self.settings)
         self.apply_theme(t)
-        self.file_tree.apply_theme(t.get('colors', {}), t.get('font', {}))
-        self.tabs.apply_theme(t.get('colors', {}), t.get('font', {}))
+        # Update theme switch icon
         self.theme_switch_btn.setText('🌙' if t.get('styleType', 'dark') == 'dark' else '☀️')
-        if self.centralWidget():
-            bg = t.get('colors', {}).get('background', '#181c20')
-            self.centralWidget().setStyleSheet(f'background: {bg}; border-radius: {self.RADIUS if self.settings.get("rounded_borders", True) else 0}px;')
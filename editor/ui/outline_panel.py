@@ -0,0 +1,126 @@
+import os
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTreeWidget, QTreeWidgetItem
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from ..outline import OutlineParser, PYTHON_EXTENSIONS
+from .theme_style import set_role
+
+# Typing pause before the buffer is parsed again
+OUTLINE_DELAY_MS = 50
+KIND_ICONS = {'class': 'C', 'function': 'ƒ', 'method': 'm'}
+
+class OutlinePanel(QWidget):
+    """Classes and functions of the current editor, parsed in the background after a typing pause"""
+    # 1-based line
+    symbolActivated = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        set_role(self, 'sidePanel')
+        self.editor = None
+        self.parser = OutlineParser(self)
+        self.parser.outlineReady.connect(self.on_outline_ready)
+        self._outline = []
+        self._dirty = False
+        self.layout = QVBoxLayout(self)
+        self.layout.setContentsMargins(8, 8, 8, 8)
+        self.layout.setSpacing(6)
+        self.status = QLabel('')
+        self.layout.addWidget(self.status)
+        self.symbols = QTreeWidget()
+        self.symbols.setHeaderHidden(True)
+        self.symbols.setUniformRowHeights(True)
+        self.symbols.itemActivated.connect(self.on_item_activated)
+        self.layout.addWidget(self.symbols)
+        self._parse_timer = QTimer(self)
+        self._parse_timer.setSingleShot(True)
+        self._parse_timer.setInterval(OUTLINE_DELAY_MS)
+        self._parse_timer.timeout.connect(self.start_parse)
+
+    def set_editor(self, editor):
+        """Follow another CodeEditor, or none"""
+        if editor is self.editor:
+            return
+        if self.editor is not None:
+            self.editor.editor.textChanged.disconnect(self.schedule_parse)
+            self.editor.fileLoaded.disconnect(self.schedule_parse)
+            self.editor.filePathChanged.disconnect(self.schedule_parse)
+        self.editor = editor
+        if editor is not None:
+            editor.editor.textChanged.connect(self.schedule_parse)
+            editor.fileLoaded.connect(self.schedule_parse)
+            editor.filePathChanged.connect(self.schedule_parse)
+        self.schedule_parse()
+
+    def schedule_parse(self, *_):
+        # Typing again drops the parse in flight; its answer would be stale anyway
+        self._dirty = True
+        self.parser.cancel()
+        self._parse_timer.start()
+
+    def start_parse(self):
+        if not self.isVisible():
+            return  # picked up by showEvent
+        self._dirty = False
+        editor = self.editor
+        if editor is None:
+            self.show_outline([], 'No file open')
+            return
+        if os.path.splitext(editor.file_path or '')[1].lower() not in PYTHON_EXTENSIONS:
+            self.show_outline([], 'No outline for this file type')
+            return
+        if editor.is_loading():
+            self.status.setText('Loading...')
+            return  # fileLoaded schedules the parse
+        self.parser.parse(editor.toPlainText())
+
+    def on_outline_ready(self, _request_id, outline):
+        # The parser only answers the newest request, and schedule_parse cancels it
+        self.show_outline(outline, f'{len(outline)} symbols' if outline else 'No symbols')
+
+    def show_outline(self, outline, status):
+        self.status.setText(status)
+        if outline == self._outline:
+            return
+        old = self._outline
+        self._outline = outline
+        items = self.item_list()
+        if len(old) == len(outline) and len(items) == len(outline) \
+                and all(a[:2] == b[:2] and a[3] == b[3] for a, b in zip(old, outline)):
+            # Same symbols, only lines moved: keep the items, their expansion and selection
+            for item, (_, _, line, _) in zip(items, outline):
+                item.setData(0, Qt.ItemDataRole.UserRole, line)
+                item.setToolTip(0, f'Line {line}')
+            return
+        self.symbols.setUpdatesEnabled(False)
+        self.symbols.clear()
+        parents = []
+        for kind, name, line, depth in outline:
+            del parents[depth:]
+            parent = parents[-1] if parents else None
+            label = f"{KIND_ICONS.get(kind, '')}  {name}"
+            item = QTreeWidgetItem(parent, [label]) if parent is not None else QTreeWidgetItem([label])
+            item.setData(0, Qt.ItemDataRole.UserRole, line)
+            item.setToolTip(0, f'Line {line}')
+            if parent is None:
+                self.symbols.addTopLevelItem(item)
+            parents.append(item)
+        self.symbols.expandAll()
+        self.symbols.setUpdatesEnabled(True)
+
+    def item_list(self):
+        """Tree items in outline order"""
+        items = []
+        stack = [self.symbols.topLevelItem(i) for i in reversed(range(self.symbols.topLevelItemCount()))]
+        while stack:
+            item = stack.pop()
+            items.append(item)
+            stack.extend(item.child(i) for i in reversed(range(item.childCount())))
+        return items
+
+    def on_item_activated(self, item, _column):
+        self.symbolActivated.emit(item.data(0, Qt.ItemDataRole.UserRole))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._dirty:
+            self._parse_timer.start()
@@ -0,0 +1,132 @@
+import os
+from PyQt6.QtWidgets import QFrame, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem
+from PyQt6.QtCore import Qt, QEvent, QTimer, pyqtSignal
+from .theme_style import set_role
+
+class QuickOpen(QFrame):
+    """Ctrl+P box floating over the main window: fuzzy-find a workspace file by name"""
+    fileChosen = pyqtSignal(str)
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self._query_id = 0
+        self.setFixedWidth(560)
+        set_role(self, 'quickOpen')
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        layout.setSpacing(6)
+        self.input = QLineEdit()
+        self.input.setPlaceholderText('Go to file...')
+        self.input.textChanged.connect(self.run_query)
+        self.input.installEventFilter(self)
+        layout.addWidget(self.input)
+        self.results = QListWidget()
+        self.results.setFixedHeight(320)
+        self.results.itemActivated.connect(self.choose)
+        layout.addWidget(self.results)
+        # While the crawl is still filling the index, the open query is re-run now and then
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(250)
+        self._refresh_timer.timeout.connect(self.run_query)
+        self.connect_index()
+        self.hide()
+
+    def connect_index(self):
+        self.index.resultsReady.connect(self.show_results)
+        self.index.indexChanged.connect(self.on_index_changed)
+
+    def open_box(self):
+        parent = self.parentWidget()
+        if parent:
+            self.move((parent.width() - self.width()) // 2, 48)
+        self.input.clear()
+        self.run_query()
+        self.show()
+        self.raise_()
+        self.input.setFocus()
+
+    def run_query(self, *_):
+        self._query_id = self.index.query(self.input.text())
+
+    def on_index_changed(self):
+        if self.isVisible() and not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def show_results(self, query_id, paths):
+        if query_id != self._query_id:
+            return  # answer to a query that has been typed over
+        root = self.index.root
+        self.results.clear()
+        for path in paths:
+            folder = os.path.dirname(os.path.relpath(path, root)) if root else os.path.dirname(path)
+            item = QListWidgetItem(f'{os.path.basename(path)}    {folder}')
+            item.setData(Qt.ItemDataRole.UserRole, path)
+            item.setToolTip(path)
+            self.results.addItem(item)
+        if self.results.count():
+            self.results.setCurrentRow(0)
+
+    def choose(self, item=None):
+        item = item or self.results.currentItem()
+        if item is None:
+            return
+        self.hide()
+        self.fileChosen.emit(item.data(Qt.ItemDataRole.UserRole))
+
+    def eventFilter(self, obj, event):
+        if obj is self.input and event.type() == QEvent.Type.KeyPress:
+            key = event.key()
+            if key == Qt.Key.Key_Escape:
+                self.hide()
+                return True
+            if key in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+                self.choose()
+                return True
+            if key in (Qt.Key.Key_Down, Qt.Key.Key_Up) and self.results.count():
+                step = 1 if key == Qt.Key.Key_Down else -1
+                self.results.setCurrentRow(max(0, min(self.results.count() - 1, self.results.currentRow() + step)))
+                return True
+        elif obj is self.input and event.type() == QEvent.Type.FocusOut:
+            if not self.results.hasFocus():
+                self.hide()
+        return super().eventFilter(obj, event)
+
+class SymbolSearch(QuickOpen):
+    """Ctrl+T box: jump to a class or function defined anywhere in the workspace"""
+    # file path, 1-based line
+    symbolChosen = pyqtSignal(str, int)
+
+    def __init__(self, index, parent=None):
+        super().__init__(index, parent)
+        self.input.setPlaceholderText('Go to symbol in workspace...')
+
+    def connect_index(self):
+        self.index.indexChanged.connect(self.on_index_changed)
+
+    def open_box(self):
+        # Files edited by other tools are picked up while the box is open
+        self.index.refresh()
+        super().open_box()
+
+    def run_query(self, *_):
+        # A prefix lookup in the symbol database is quick enough to answer while typing
+        root = self.index.root
+        self.results.clear()
+        for name, kind, path, line, container in self.index.lookup(self.input.text()):
+            rel = os.path.relpath(path, root) if root else path
+            label = f'{container}.{name}' if container else name
+            item = QListWidgetItem(f'{label}    {rel}:{line}')
+            item.setData(Qt.ItemDataRole.UserRole, (path, line))
+            item.setToolTip(f'{kind} {label}')
+            self.results.addItem(item)
+        if self.results.count():
+            self.results.setCurrentRow(0)
+
+    def choose(self, item=None):
+        item = item or self.results.currentItem()
+        if item is None:
+            return
+        self.hide()
+        self.symbolChosen.emit(*item.data(Qt.ItemDataRole.UserRole))
@@ -0,0 +1,134 @@
+import os
+import re
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QCheckBox, QLabel, QPushButton, QTreeWidget, QTreeWidgetItem
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from ..file_io import start_worker
+from ..text_search import TextSearch, compile_query, MAX_MATCHES_PER_FILE
+from .theme_style import set_role
+
+# Typing pause before a search starts
+SEARCH_DELAY_MS = 250
+
+class SearchPanel(QWidget):
+    """Find in files: greps the open folder in the background and lists matches as they come in"""
+    # file path, 1-based line, column
+    matchActivated = pyqtSignal(str, int, int)
+
+    def __init__(self, root_path=None, index=None, parent=None):
+        super().__init__(parent)
+        set_role(self, 'sidePanel')
+        self.root_path = root_path
+        # Trigram index used to pick the files worth reading
+        self.index = index
+        self._search = None
+        self._file_items = 0
+        self._match_count = 0
+        self.layout = QVBoxLayout(self)
+        self.layout.setContentsMargins(8, 8, 8, 8)
+        self.layout.setSpacing(6)
+        self.query_box = QLineEdit()
+        self.query_box.setPlaceholderText('Search in folder...')
+        self.query_box.textChanged.connect(self.schedule_search)
+        self.query_box.returnPressed.connect(self.start_search)
+        self.layout.addWidget(self.query_box)
+        options = QHBoxLayout()
+        self.regex_box = QCheckBox('Regex')
+        self.regex_box.stateChanged.connect(self.schedule_search)
+        options.addWidget(self.regex_box)
+        self.case_box = QCheckBox('Match case')
+        self.case_box.stateChanged.connect(self.schedule_search)
+        options.addWidget(self.case_box)
+        options.addStretch()
+        self.stop_btn = QPushButton('Stop')
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop_search)
+        options.addWidget(self.stop_btn)
+        self.layout.addLayout(options)
+        self.status = QLabel('')
+        self.layout.addWidget(self.status)
+        self.results = QTreeWidget()
+        self.results.setHeaderHidden(True)
+        self.results.setUniformRowHeights(True)
+        self.results.itemActivated.connect(self.on_item_activated)
+        self.layout.addWidget(self.results)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(self.start_search)
+
+    def set_root(self, root_path):
+        self.root_path = root_path
+        self.schedule_search()
+
+    def focus_query(self):
+        self.query_box.setFocus()
+        self.query_box.selectAll()
+
+    def schedule_search(self, *_):
+        self._search_timer.start()
+
+    def start_search(self):
+        """Search for the current query, dropping any search still running"""
+        self._search_timer.stop()
+        self.stop_search()
+        self.results.clear()
+        self._file_items = 0
+        self._match_count = 0
+        text = self.query_box.text()
+        if not text or not self.root_path:
+            self.status.setText('')
+            return
+        try:
+            pattern = compile_query(text, self.regex_box.isChecked(), self.case_box.isChecked())
+        except re.error as e:
+            self.status.setText(f'Invalid regex: {e}')
+            return
+        self.status.setText('Searching...')
+        self._search = TextSearch(self.root_path, pattern, self.index)
+        self._search.resultsFound.connect(self.on_results_found)
+        self._search.searchFinished.connect(self.on_search_finished)
+        self.stop_btn.setEnabled(True)
+        start_worker(self._search)
+
+    def stop_search(self):
+        if self._search is None:
+            return
+        search = self._search
+        self._search = None
+        search.cancel()
+        self.stop_btn.setEnabled(False)
+        if self._match_count:
+            self.status.setText(f'{self._match_count} matches in {self._file_items} files (stopped)')
+        else:
+            self.status.setText('')
+
+    def on_results_found(self, results):
+        if self.sender() is not self._search:
+            return  # a superseded search
+        self.results.setUpdatesEnabled(False)
+        for file_path, matches in results:
+            rel = os.path.relpath(file_path, self.root_path)
+            more = '+' if len(matches) >= MAX_MATCHES_PER_FILE else ''
+            file_item = QTreeWidgetItem([f'{rel}  ({len(matches)}{more})'])
+            file_item.setToolTip(0, file_path)
+            file_item.setData(0, Qt.ItemDataRole.UserRole, (file_path, 1, 0))
+            for line, column, preview in matches:
+                item = QTreeWidgetItem(file_item, [f'{line}: {preview.strip()}'])
+                item.setData(0, Qt.ItemDataRole.UserRole, (file_path, line, column))
+            self.results.addTopLevelItem(file_item)
+            file_item.setExpanded(True)
+            self._file_items += 1
+            self._match_count += len(matches)
+        self.results.setUpdatesEnabled(True)
+        self.status.setText(f'Searching... {self._match_count} matches in {self._file_items} files')
+
+    def on_search_finished(self, searched, found):
+        if self.sender() is not self._search:
+            return
+        self._search = None
+        self.stop_btn.setEnabled(False)
+        self.status.setText(f'{self._match_count} matches in {self._file_items} files ({searched} searched)')
+
+    def on_item_activated(self, item, _column):
+        file_path, line, column = item.data(0, Qt.ItemDataRole.UserRole)
+        self.matchActivated.emit(file_path, line, column)
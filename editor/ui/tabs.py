@@ -1,6 +1,9 @@
 from PyQt6.QtWidgets import QTabWidget, QWidget, QVBoxLayout, QMenu, QFileDialog, QApplication, QTabBar
 from PyQt6.QtGui import QAction, QFont, QPainter, QColor, QMouseEvent
-from PyQt6.QtCore import Qt, QPoint, QRect
+from PyQt6.QtCore import Qt, QPoint, QRect, QTimer, pyqtSignal
+from collections import OrderedDict
+from ..file_io import DocumentStreamer, ScratchWriter, remove_scratch, start_worker
+from .theme_style import set_role
 import os
 import subprocess
 
@@ -35,58 +38,311 @@ class CustomTabBar(QTabBar):
                 return
         super().mouseReleaseEvent(event)
 
+def path_keys(file_path):
+    """Keys an open file is indexed under: its canonical path and, if it exists, its (device, inode)"""
+    real_path = os.path.normcase(os.path.realpath(file_path))
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return real_path, None
+    return real_path, (st.st_dev, st.st_ino)
+
+class PendingEditorTab(QWidget):
+    """Stand-in for an editor that is not shown: just a path, where the view was and,
+    for an evicted editor with unsaved changes, the scratch file holding its text"""
+    def __init__(self, file_path, view_state=None, scratch_path=None, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.view_state = view_state
+        self.scratch_path = scratch_path
+        self.modified = scratch_path is not None
+
+    def is_modified(self):
+        return self.modified
+
+    def is_saving(self):
+        return False
+
 class EditorTabs(QTabWidget):
+    # A tab was added or removed
+    tabsChanged = pyqtSignal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        set_role(self, 'editorTabs')
         self.setTabBar(CustomTabBar(self))
         self.setTabsClosable(False)  # We'll handle close button manually
         self.tabCloseRequested.connect(self.close_tab)
         self.setMovable(True)
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.customContextMenuRequested.connect(self.show_context_menu)
-        # Remove setStyleSheet here; theming is handled in apply_theme only
+        # Builds the real editor for a PendingEditorTab: editor_factory(file_path, view_state, scratch_path)
+        self.editor_factory = None
+        # Bytes the documents of open editors may take before inactive ones are evicted; 0 for no limit
+        self.memory_budget = 0
+        # Editors from least to most recently shown
+        self._recent = OrderedDict()
+        self._memory_timer = QTimer(self)
+        self._memory_timer.setSingleShot(True)
+        self._memory_timer.setInterval(500)
+        self._memory_timer.timeout.connect(self.enforce_memory_budget)
+        # Evicted editors whose unsaved text is still being written out -> their ScratchWriter
+        self._spilling = {}
+        # Open files by canonical path and by (device, inode), for hard links and case-insensitive disks
+        self._tabs_by_path = {}
+        self._tabs_by_file_id = {}
+        self._materializing = False
+        # Deferred a turn, so opening many tabs at once only builds the one left current
+        self._materialize_timer = QTimer(self)
+        self._materialize_timer.setSingleShot(True)
+        self._materialize_timer.setInterval(0)
+        self._materialize_timer.timeout.connect(self.materialize_current_tab)
+        self.currentChanged.connect(lambda _: self._materialize_timer.start())
+        self.currentChanged.connect(self.on_current_changed)
+        # Colours come from the theme stylesheet; apply_theme sets what it cannot carry
+        # Title updates are collected and applied at most once per frame
+        self._pending_titles = set()
+        self._title_timer = QTimer(self)
+        self._title_timer.setSingleShot(True)
+        self._title_timer.setInterval(16)
+        self._title_timer.timeout.connect(self.flush_tab_titles)
 
-    def add_editor_tab(self, widget: QWidget, title: str):
+    def add_editor_tab(self, widget: QWidget, title: str, activate=True):
         idx = self.addTab(widget, title)
-        self.setCurrentWidget(widget)
-        # Connect to text changes to track modifications
-        if hasattr(widget, 'editor') and hasattr(widget.editor, 'textChanged'):
-            widget.editor.textChanged.connect(lambda w=widget: self.update_tab_title(w))
+        if activate:
+            self.setCurrentWidget(widget)
+        self.connect_editor(widget)
+        self.index_tab(widget)
         widget._tab_index = idx
-        # Apply current theme to tabs after adding
-        if hasattr(self, 'apply_theme') and hasattr(self.parent(), 'get_current_theme'):
-            theme = self.parent().get_current_theme()
-            if theme:
-                colors = theme.get('colors', {})
-                font = theme.get('font', {})
-                self.apply_theme(colors, font)
+
+    def tabInserted(self, index):
+        super().tabInserted(index)
+        self.tabsChanged.emit()
+
+    def tabRemoved(self, index):
+        super().tabRemoved(index)
+        self.tabsChanged.emit()
+
+    def add_pending_tab(self, file_path, view_state=None, activate=True):
+        """Add a tab for file_path whose editor is only built once the tab is shown"""
+        placeholder = PendingEditorTab(file_path, view_state)
+        self.add_editor_tab(placeholder, os.path.basename(file_path), activate)
+        return placeholder
+
+    def connect_editor(self, widget):
+        # Only the dirty flag flipping changes the title, not every keystroke
+        if hasattr(widget, 'modificationChanged'):
+            widget.modificationChanged.connect(lambda _, w=widget: self.update_tab_title(w))
+        if hasattr(widget, 'saveStateChanged'):
+            widget.saveStateChanged.connect(lambda _, w=widget: self.update_tab_title(w))
+        if hasattr(widget, 'filePathChanged'):
+            widget.filePathChanged.connect(lambda _, w=widget: self.reindex_tab(w))
+        if hasattr(widget, 'fileSaved'):
+            # An atomic save replaces the file, and with it the inode
+            widget.fileSaved.connect(lambda _, w=widget: self.reindex_tab(w))
+        if hasattr(widget, 'fileLoaded'):
+            widget.fileLoaded.connect(self._memory_timer.start)
+
+    def index_tab(self, widget):
+        if not getattr(widget, 'file_path', None):
+            return
+        real_path, file_id = path_keys(widget.file_path)
+        widget._path_keys = (real_path, file_id)
+        self._tabs_by_path[real_path] = widget
+        if file_id is not None:
+            self._tabs_by_file_id[file_id] = widget
+
+    def unindex_tab(self, widget):
+        real_path, file_id = getattr(widget, '_path_keys', (None, None))
+        if self._tabs_by_path.get(real_path) is widget:
+            del self._tabs_by_path[real_path]
+        if self._tabs_by_file_id.get(file_id) is widget:
+            del self._tabs_by_file_id[file_id]
+        widget._path_keys = (None, None)
+
+    def reindex_tab(self, widget):
+        self.unindex_tab(widget)
+        self.index_tab(widget)
+        self.update_tab_title(widget)
+
+    def find_tab(self, file_path):
+        """The tab widget showing file_path, whatever path it was opened under, or None"""
+        real_path, file_id = path_keys(file_path)
+        widget = self._tabs_by_path.get(real_path)
+        if widget is None and file_id is not None:
+            widget = self._tabs_by_file_id.get(file_id)
+            # The inode may have been freed by a save and reused for another file since
+            if widget is not None and path_keys(widget.file_path)[1] != file_id:
+                widget = None
+        return widget
+
+    def rename_path(self, old_path, new_path):
+        """Point tabs at a file or folder that was renamed or moved from old_path to new_path"""
+        old_real = os.path.normcase(os.path.realpath(old_path))
+        prefix = old_real.rstrip(os.sep) + os.sep
+        for real_path, widget in list(self._tabs_by_path.items()):
+            if real_path == old_real:
+                widget.file_path = new_path
+            elif real_path.startswith(prefix):
+                # Same length as real_path, but with the case it was written in
+                widget.file_path = os.path.join(new_path, os.path.realpath(widget.file_path)[len(prefix):])
+            else:
+                continue
+            self.reindex_tab(widget)
+
+    def update_path_tabs(self, path):
+        """Re-read the tabs of a file or folder that was deleted or brought back"""
+        real = os.path.normcase(os.path.realpath(path))
+        prefix = real.rstrip(os.sep) + os.sep
+        for real_path, widget in list(self._tabs_by_path.items()):
+            if real_path == real or real_path.startswith(prefix):
+                self.reindex_tab(widget)
+
+    def materialize_current_tab(self):
+        if self.currentIndex() != -1:
+            self.materialize_tab(self.currentIndex())
+
+    def materialize_tab(self, index):
+        """Swap the placeholder at index for a real editor"""
+        placeholder = self.widget(index)
+        if self._materializing or not isinstance(placeholder, PendingEditorTab) or self.editor_factory is None:
+            return None
+        editor = self.editor_factory(placeholder.file_path, placeholder.view_state, placeholder.scratch_path)
+        # The scratch file now belongs to the editor, which removes it once read
+        placeholder.scratch_path = None
+        self.replace_tab(index, editor)
+        self.setCurrentIndex(index)
+        self.on_current_changed(index)
+        self.update_tab_title(editor)
+        return editor
+
+    def replace_tab(self, index, widget):
+        """Put widget in place of the tab at index, keeping its title and position"""
+        old = self.widget(index)
+        self._materializing = True
+        try:
+            title = self.tabText(index)
+            current = self.currentWidget()
+            self.removeTab(index)
+            self.insertTab(index, widget, title)
+            if current is not old:
+                self.setCurrentWidget(current)
+        finally:
+            self._materializing = False
+        self.connect_editor(widget)
+        self.unindex_tab(old)
+        self.index_tab(widget)
+        widget._tab_index = index
+        self._pending_titles.discard(old)
+        self._recent.pop(old, None)
+        old.deleteLater()
+
+    def on_current_changed(self, index):
+        if self._materializing:
+            return
+        widget = self.widget(index)
+        if widget in self._spilling:
+            self.cancel_spill(widget)
+        if widget is not None and not isinstance(widget, PendingEditorTab):
+            self._recent[widget] = None
+            self._recent.move_to_end(widget)
+        self._memory_timer.start()
+
+    def enforce_memory_budget(self):
+        """Evict the least recently shown editors until the open documents fit the budget"""
+        if not self.memory_budget:
+            return
+        self._recent = OrderedDict((w, None) for w in self._recent if self.indexOf(w) != -1)
+        # Editors being spilled count as gone already
+        candidates = [w for w in self._recent if w not in self._spilling and hasattr(w, 'memory_estimate')]
+        total = sum(w.memory_estimate() for w in candidates)
+        for widget in candidates:
+            if total <= self.memory_budget:
+                break
+            if widget is self.currentWidget():
+                continue
+            size = widget.memory_estimate()
+            if self.evict_tab(widget):
+                total -= size
+
+    def evict_tab(self, widget):
+        """Swap an inactive editor for a placeholder.
+
+        Unsaved text is first spilled to a compressed scratch file on a worker thread;
+        the editor stays read-only meanwhile and is only swapped out once the file is
+        written. Showing the tab again before that calls the eviction off.
+        """
+        if not widget.file_path or widget.is_loading() or widget.is_saving():
+            return False
+        if not widget.is_modified():
+            self.replace_tab(self.indexOf(widget), PendingEditorTab(widget.file_path, widget.view_state()))
+            return True
+        streamer = DocumentStreamer(widget.editor.document(), widget)
+        writer = ScratchWriter(streamer)
+        writer.spillFinished.connect(lambda path, w=widget, sw=writer: self.on_spill_finished(w, sw, path))
+        writer.spillFailed.connect(lambda error, w=widget, sw=writer: self.on_spill_failed(w, sw, error))
+        self._spilling[widget] = writer
+        widget.editor.setReadOnly(True)
+        start_worker(writer)
+        streamer.start()
+        return True
+
+    def cancel_spill(self, widget):
+        """Call off the eviction of an editor whose text is being spilled; the scratch file is dropped"""
+        writer = self._spilling.pop(widget)
+        writer.cancel()
+        widget.editor.setReadOnly(False)
+
+    def on_spill_finished(self, widget, writer, scratch_path):
+        if self._spilling.get(widget) is not writer:
+            remove_scratch(scratch_path)  # called off or closed meanwhile
+            return
+        del self._spilling[widget]
+        placeholder = PendingEditorTab(widget.file_path, widget.view_state(), scratch_path)
+        self.replace_tab(self.indexOf(widget), placeholder)
+
+    def on_spill_failed(self, widget, writer, error):
+        if self._spilling.get(widget) is not writer:
+            return
+        print(f"Error writing scratch file: {error}")
+        del self._spilling[widget]
+        widget.editor.setReadOnly(False)
+
+    def tab_title(self, widget):
+        base_title = os.path.basename(widget.file_path) if widget.file_path else "Untitled"
+        if widget.file_path and not os.path.exists(widget.file_path):
+            base_title = f"{base_title} [deleted]"
+        if widget.is_modified():
+            base_title = f"{base_title} [*]"
+        if hasattr(widget, 'is_saving') and widget.is_saving():
+            base_title = f"{base_title} [saving]"
+        return base_title
 
     def update_tab_title(self, editor_widget):
         """Update tab title to show modified indicator"""
         if not hasattr(editor_widget, 'is_modified'):
             return
-        
-        for i in range(self.count()):
-            if self.widget(i) == editor_widget:
-                base_title = os.path.basename(editor_widget.file_path) if editor_widget.file_path else "Untitled"
-                if editor_widget.is_modified():
-                    title = f"{base_title} [*]"
-                else:
-                    title = base_title
+        self._pending_titles.add(editor_widget)
+        if not self._title_timer.isActive():
+            self._title_timer.start()
+
+    def flush_tab_titles(self):
+        pending = self._pending_titles
+        self._pending_titles = set()
+        for widget in pending:
+            i = self.indexOf(widget)
+            if i == -1:
+                continue  # closed in the meantime
+            title = self.tab_title(widget)
+            if self.tabText(i) != title:
                 self.setTabText(i, title)
-                break
 
     def update_all_tab_titles(self):
         """Update all tab titles based on modification state"""
         for i in range(self.count()):
             widget = self.widget(i)
             if hasattr(widget, 'is_modified') and hasattr(widget, 'file_path'):
-                base_title = os.path.basename(widget.file_path) if widget.file_path else "Untitled"
-                if widget.is_modified():
-                    title = f"{base_title} [*]"
-                else:
-                    title = base_title
-                self.setTabText(i, title)
+                self.update_tab_title(widget)
 
     def _close_icon(self):
         # Unicode X icon
@@ -102,6 +358,17 @@ class EditorTabs(QTabWidget):
 
     def close_tab(self, index):
         widget = self.widget(index)
+        self._pending_titles.discard(widget)
+        self._recent.pop(widget, None)
+        self.unindex_tab(widget)
+        if widget in self._spilling:
+            self.cancel_spill(widget)
+        if getattr(widget, 'scratch_path', None):
+            remove_scratch(widget.scratch_path)
+        if hasattr(widget, 'cancel_loading'):
+            widget.cancel_loading()
+        if hasattr(widget, 'flush_save'):
+            widget.flush_save()
         self.removeTab(index)
         widget.deleteLater()
 
@@ -154,36 +421,7 @@ class EditorTabs(QTabWidget):
 
     def apply_theme(self, colors, font, ui=None):
         ui = ui or {}
-        bg = ui.get('tab_bg', colors.get('header', '#23272e'))
-        text = ui.get('tab_text', colors.get('text', '#23272e'))
-        selected = ui.get('tab_selected_bg', colors.get('background', '#181c20'))
-        selected_text = ui.get('tab_selected_text', '#fff')
-        hover = ui.get('tab_hover_bg', colors.get('selected', '#2d313a'))
-        border = ui.get('tab_border', colors.get('border', '#23272e'))
         close_icon = ui.get('tab_close_icon', '#ff5c5c')
-        self.setStyleSheet(f'''
-            QTabWidget::pane {{
-                border: none;
-                background: {bg};
-            }}
-            QTabBar::tab {{
-                background: {bg};
-                color: {text};
-                border-radius: 8px 8px 0 0;
-                padding: 8px 22px 8px 18px;
-                margin-right: 2px;
-                font-size: 15px;
-                min-width: 80px;
-                transition: background 0.2s;
-            }}
-            QTabBar::tab:selected {{
-                background: {selected};
-                color: {selected_text};
-            }}
-            QTabBar::tab:hover {{
-                background: {hover};
-            }}
-        ''')
         font_family = font.get('family', 'Fira Mono')
         font_size = font.get('size', 13)
         font_obj = QFont(font_family, font_size)
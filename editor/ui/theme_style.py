@@ -0,0 +1,126 @@
+import json
+
+# Dynamic property the theme stylesheet selects widgets by
+THEME_ROLE = 'themeRole'
+
+# (theme as JSON, radius) -> stylesheet
+_compiled = {}
+
+def set_role(widget, role):
+    """Tag a widget for the rules of the theme stylesheet"""
+    widget.setProperty(THEME_ROLE, role)
+
+def compile_stylesheet(theme, radius):
+    """Stylesheet for the main window and everything in it, built once per theme and radius.
+
+    Each block stands for what used to be one widget's own stylesheet: '*[themeRole=x], *[themeRole=x] *'
+    reaches the widget and everything inside it, like an unscoped setStyleSheet did. Blocks go
+    from the window inwards, so with equal specificity the innermost widget's block wins.
+    """
+    key = (json.dumps(theme, sort_keys=True), radius)
+    stylesheet = _compiled.get(key)
+    if stylesheet is None:
+        stylesheet = _compiled[key] = build_stylesheet(theme, radius)
+    return stylesheet
+
+def role(name):
+    return f'[{THEME_ROLE}="{name}"]'
+
+def scope(name, body, inside='*'):
+    """Rule for a widget and what is inside it"""
+    return f'*{role(name)}, *{role(name)} {inside} {{ {body} }}\n'
+
+def build_stylesheet(theme, radius):
+    colors = theme.get('colors', {})
+    font = theme.get('font', {})
+    ui = theme.get('ui', {})
+    bg = ui.get('background', colors.get('background', '#181c20'))
+    text = ui.get('text', colors.get('text', '#e0e0e0'))
+    border = ui.get('border', '#23272e')
+    header_bg = ui.get('toolbar_bg', colors.get('header', '#23272e'))
+    header_text = ui.get('toolbar_text', colors.get('text', '#e0e0e0'))
+    header_border = ui.get('toolbar_border', colors.get('border', '#23272e'))
+    sidebar_bg = ui.get('sidebar_bg', colors.get('panel', '#20242a'))
+    sidebar_text = ui.get('sidebar_text', colors.get('text', '#e0e0e0'))
+    sidebar_selected = ui.get('sidebar_selected_bg', colors.get('selected', '#2d313a'))
+    sidebar_border = ui.get('sidebar_border', colors.get('border', '#23272e'))
+    tab_bg = ui.get('tab_bg', colors.get('header', '#23272e'))
+    tab_text = ui.get('tab_text', colors.get('text', '#23272e'))
+    tab_hover = ui.get('tab_hover_bg', colors.get('selected', '#2d313a'))
+    close_icon = ui.get('tab_close_icon', '#ff5c5c')
+    editor_bg = ui.get('editor_bg', colors.get('background', '#181c20'))
+    editor_text = ui.get('editor_text', colors.get('text', '#e0e0e0'))
+    line_number_bg = ui.get('line_number_bg', colors.get('panel', '#20242a'))
+    line_number_text = ui.get('line_number_text', '#676e95')
+    selected_text = ui.get('tab_selected_text', '#fff')
+    font_family = font.get('family', 'Fira Mono')
+    return ''.join([
+        # Window and its central widget
+        scope('window', f'border-radius: {radius}px; background: transparent;'),
+        scope('central', f'background: {bg}; border-radius: {radius}px;'),
+        # Header: title bar + toolbar
+        scope('header', f'background: {header_bg}; border-top-left-radius: {radius}px; '
+                        f'border-top-right-radius: {radius}px; border-bottom: 2px solid {sidebar_border};'),
+        scope('titleBar', f'background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 {bg}, stop:1 {header_bg}); '
+                          f'color: {header_text}; border-bottom: 1px solid {header_border};'),
+        scope('windowTitle', f'font-weight: bold; font-size: 14px; margin-left: 6px; color: {header_text};'),
+        f'QPushButton{role("titleButton")}, QPushButton{role("closeButton")} {{ background: none; color: {header_text}; '
+        f'font-size: 14px; border: none; min-width: 22px; min-height: 22px; border-radius: 4px; }}\n',
+        f'QPushButton{role("titleButton")}:hover {{ background: {tab_hover}; }}\n',
+        f'QPushButton{role("closeButton")} {{ color: {close_icon}; }}\n',
+        f'QPushButton{role("closeButton")}:hover {{ background: #3a2323; }}\n',
+        scope('toolBar', f'background: {header_bg};'),
+        f'QPushButton{role("toolButton")} {{ background: {header_bg}; color: {header_text}; font-size: 13px; border: none; '
+        f'border-radius: 4px; padding: 4px 10px; min-width: 28px; }}\n',
+        f'QPushButton{role("toolButton")}:hover {{ background: {tab_hover}; color: #fff; }}\n',
+        f'QPushButton{role("toolButton")}:pressed {{ background: {ui.get("toolbar_bg", colors.get("background", "#181c20"))}; }}\n',
+        # Sidebar
+        scope('sidebar', f'background: {sidebar_bg}; border-right: 1px solid {sidebar_border};'),
+        f'QPushButton{role("sidebarButton")} {{ background: {sidebar_bg}; color: {sidebar_text}; border: none; '
+        f'border-radius: 10px; font-size: 18px; margin: 4px 0; }}\n',
+        f'QPushButton{role("sidebarButton")}:checked {{ background: {sidebar_selected}; }}\n',
+        f'QPushButton{role("sidebarButton")}:hover {{ background: {sidebar_selected}; }}\n',
+        f'QPushButton{role("themeSwitch")} {{ background: {sidebar_bg}; color: #ffcc80; border: none; '
+        f'border-radius: 10px; font-size: 20px; margin: 4px 0; }}\n',
+        f'QPushButton{role("themeSwitch")}:hover {{ background: {sidebar_selected}; }}\n',
+        # File tree, search and outline
+        scope('fileTree', f'background: {sidebar_bg}; color: {sidebar_text};'),
+        f'*{role("fileTree")} QTreeView {{ background: {sidebar_bg}; color: {sidebar_text}; border: none; '
+        f"font-family: '{font_family}'; font-size: 15px; padding: 8px 0 8px 0; }}\n",
+        f'*{role("fileTree")} QTreeView::item {{ padding: 6px 8px; margin: 2px 0; }}\n',
+        f'*{role("fileTree")} QTreeView::item:selected {{ background: {sidebar_selected}; color: #fff; border-radius: 6px; }}\n',
+        scope('sidePanel', f'background: {sidebar_bg}; color: {sidebar_text};', inside='QWidget'),
+        f'*{role("sidePanel")} QLineEdit {{ border: 1px solid {sidebar_border}; border-radius: 6px; padding: 4px; }}\n',
+        f'*{role("sidePanel")} QTreeWidget {{ border: none; }}\n',
+        f'*{role("sidePanel")} QTreeWidget::item:selected {{ background: {sidebar_selected}; color: #fff; }}\n',
+        # Tabs and editors
+        f'QTabWidget{role("editorTabs")}::pane {{ border: none; background: {tab_bg}; }}\n',
+        f'*{role("editorTabs")} QTabBar::tab {{ background: {tab_bg}; color: {tab_text}; border-radius: 8px 8px 0 0; '
+        f'padding: 8px 22px 8px 18px; margin-right: 2px; font-size: 15px; min-width: 80px; }}\n',
+        f'*{role("editorTabs")} QTabBar::tab:selected {{ background: {ui.get("tab_selected_bg", colors.get("background", "#181c20"))}; '
+        f'color: {selected_text}; }}\n',
+        f'*{role("editorTabs")} QTabBar::tab:hover {{ background: {tab_hover}; }}\n',
+        scope('codeEditor', f'background: {editor_bg}; color: {editor_text};'),
+        f'*{role("codeEditor")} QPlainTextEdit {{ background: {editor_bg}; color: {editor_text}; border: none; '
+        f"padding: 12px 0 12px 0; font-family: '{font_family}', 'Consolas', 'Monaco', monospace; }}\n",
+        scope('lineNumbers', f'background: {line_number_bg};'),
+        scope('emptyState', f'color: #676e95; background: {editor_bg}; font-size:22px;'),
+        # Completion popup and the Ctrl+P / Ctrl+T boxes, floating over the editor and the window
+        scope('completionPopup', f'background: {header_bg}; color: {editor_text};'),
+        f'QFrame{role("completionPopup")} {{ border: 1px solid {sidebar_selected}; border-radius: 6px; }}\n',
+        f'*{role("completionPopup")} QListWidget {{ border: none; }}\n',
+        f'*{role("completionPopup")} QListWidget::item {{ padding: 2px 6px; }}\n',
+        f'*{role("completionPopup")} QListWidget::item:selected {{ background: {sidebar_selected}; color: {selected_text}; }}\n',
+        f'*{role("completionPopup")} QLabel {{ color: {line_number_text}; border: none; '
+        f'border-top: 1px solid {sidebar_selected}; padding: 4px 6px; }}\n',
+        scope('quickOpen', f'background: {header_bg}; color: {editor_text};'),
+        f'QFrame{role("quickOpen")} {{ border: 1px solid {sidebar_selected}; border-radius: 8px; }}\n',
+        f'*{role("quickOpen")} QLineEdit {{ background: {editor_bg}; border: none; border-radius: 6px; padding: 8px; font-size: 15px; }}\n',
+        f'*{role("quickOpen")} QListWidget {{ border: none; font-size: 14px; }}\n',
+        f'*{role("quickOpen")} QListWidget::item {{ padding: 4px 8px; }}\n',
+        f'*{role("quickOpen")} QListWidget::item:selected {{ background: {sidebar_selected}; color: {selected_text}; border-radius: 4px; }}\n',
+        # Settings
+        scope('settingsPanel', f'background: {bg}; color: {text};'),
+        f'QLineEdit{role("settingsSearch")} {{ background: {bg}; color: {text}; border: 1px solid {border}; '
+        f'border-radius: 6px; padding: 4px; }}\n',
+    ])
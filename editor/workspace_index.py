@@ -0,0 +1,417 @@
+import os
+import queue
+import heapq
+import re
+from itertools import islice
+from PyQt6.QtCore import QObject, QThread, QFileSystemWatcher, pyqtSignal
+from .file_io import start_worker
+
+# Directories never worth indexing
+SKIPPED_DIRS = {'.git', '.hg', '.svn', '__pycache__', 'node_modules', '.venv', 'venv', '.tox', '.mypy_cache', '.pytest_cache'}
+# Directories scanned between checks for new commands
+CRAWL_SLICE_DIRS = 64
+# Directories handed to QFileSystemWatcher; beyond this, changes are picked up on the next crawl
+MAX_WATCHED_DIRS = 4096
+# Results returned per query
+QUICK_OPEN_RESULTS = 50
+# Above this many matches only the shortest ones are scored
+SCORE_ALL_LIMIT = 5000
+# Recently opened files remembered for ranking
+RECENT_FILES = 200
+# Shortest matching file names taken by the quick first answer to a query
+FIRST_PASS_NAMES = 100
+# File names the quick first answer looks at, at most
+FIRST_PASS_SCAN = 8192
+# Entries matched, and scored, between checks for a newer query
+QUERY_SLICE = 8192
+SCORE_SLICE = 1024
+
+def fuzzy_pattern(query):
+    """Compiled matcher for query as a subsequence; query must be lowercase"""
+    # Negated classes instead of .*? so a failing candidate never backtracks
+    return re.compile(''.join('[^%s]*%s' % (re.escape(c), re.escape(c)) for c in query)).match
+
+def fuzzy_score(query, text):
+    """How well query matches text as a subsequence, higher is better; None if it does not"""
+    score = 0
+    pos = 0
+    last = -2
+    for c in query:
+        i = text.find(c, pos)
+        if i < 0:
+            return None
+        score += 1
+        if i == last + 1:
+            score += 5  # consecutive characters
+        if i == 0 or text[i - 1] in '/\\_-. ':
+            score += 3  # start of a word
+        last = i
+        pos = i + 1
+    return score * 100 - len(text)
+
+class WorkspaceCrawler(QThread):
+    """Owns the path index of a workspace: crawls it, applies directory rescans and answers queries.
+
+    All state lives on this thread; the GUI talks to it through a command queue, so a
+    crawl of a huge tree never blocks typing in the Quick Open box.
+    """
+    resultsReady = pyqtSignal(int, list)
+    directoriesFound = pyqtSignal(list)
+    indexChanged = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._commands = queue.Queue()
+        # Id of the newest query; older ones stop scoring as soon as they notice
+        self.latest_query = 0
+        self._root = None
+        self._pending_dirs = []
+        self._dir_files = {}  # relative dir -> set of relative file paths
+        self._dir_subdirs = {}  # relative dir -> set of relative dir paths
+        self._names = {}  # lowercase basename -> set of relative file paths
+        self._paths = {}  # lowercase relative path -> set of relative file paths
+        self._initials = {}  # first two characters -> name length -> set of lowercase basenames
+        self._recent = {}  # absolute path -> open counter
+        self._recent_counter = 0
+        self._version = 0
+        self._snapshot_version = -1
+        self._name_list = []
+        self._path_list = []
+        self._last_match = None  # (query, version, mode, matches) for narrowing
+
+    def set_root(self, root):
+        self._commands.put(('root', root))
+
+    def rescan(self, directory):
+        self._commands.put(('rescan', directory))
+
+    def note_opened(self, file_path):
+        self._commands.put(('opened', file_path))
+
+    def query(self, query_id, text):
+        self.latest_query = query_id
+        self._commands.put(('query', query_id, text))
+
+    def cancel(self):
+        self._commands.put(None)
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            try:
+                command = self._commands.get(timeout=0 if self._pending_dirs else 0.1)
+            except queue.Empty:
+                if self._pending_dirs:
+                    self.crawl_slice()
+                continue
+            if command is None:
+                return
+            kind = command[0]
+            if kind == 'root':
+                self.reset(command[1])
+            elif kind == 'rescan' and self._root:
+                rel_dir = self.relative(command[1])
+                if rel_dir != '..' and not rel_dir.startswith('../'):
+                    self.scan_dir(rel_dir)
+                    self.indexChanged.emit()
+            elif kind == 'opened':
+                self._recent_counter += 1
+                self._recent[os.path.normpath(command[1])] = self._recent_counter
+                if len(self._recent) > RECENT_FILES:
+                    del self._recent[min(self._recent, key=self._recent.get)]
+            elif kind == 'query' and command[1] == self.latest_query:
+                results = self.search(command[1], command[2])
+                if results is not None:
+                    self.resultsReady.emit(command[1], results)
+
+    def reset(self, root):
+        self._root = root
+        self._pending_dirs = [''] if root else []
+        self._dir_files = {}
+        self._dir_subdirs = {}
+        self._names = {}
+        self._paths = {}
+        self._initials = {}
+        self._last_match = None
+        self._version += 1
+        self.indexChanged.emit()
+
+    def relative(self, directory):
+        rel = os.path.relpath(directory, self._root)
+        return '' if rel == '.' else rel.replace(os.sep, '/')
+
+    def crawl_slice(self):
+        found = []
+        for _ in range(CRAWL_SLICE_DIRS):
+            if not self._pending_dirs:
+                break
+            rel_dir = self._pending_dirs.pop()
+            found.append(os.path.join(self._root, rel_dir) if rel_dir else self._root)
+            self.scan_dir(rel_dir)
+        self.directoriesFound.emit(found)
+        self.indexChanged.emit()
+
+    def scan_dir(self, rel_dir):
+        """Bring the index in line with one directory; new subdirectories are queued for crawling"""
+        path = os.path.join(self._root, rel_dir) if rel_dir else self._root
+        files = set()
+        dirs = set()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    rel = rel_dir + '/' + entry.name if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIPPED_DIRS:
+                                dirs.add(rel)
+                        elif entry.is_file():
+                            files.add(rel)
+                    except OSError:
+                        pass
+        except OSError:
+            if rel_dir:
+                self.remove_dir(rel_dir)
+            return
+        old_files = self._dir_files.get(rel_dir, set())
+        for rel in old_files - files:
+            self.remove_file(rel)
+        for rel in files - old_files:
+            self.add_file(rel)
+        self._dir_files[rel_dir] = files
+        old_dirs = self._dir_subdirs.get(rel_dir, set())
+        for rel in old_dirs - dirs:
+            self.remove_dir(rel)
+        self._pending_dirs.extend(dirs - old_dirs)
+        self._dir_subdirs[rel_dir] = dirs
+
+    def add_file(self, rel):
+        lower = rel.lower()
+        name = lower.rsplit('/', 1)[-1]
+        if name not in self._names:
+            self._names[name] = set()
+            self._initials.setdefault(name[:2], {}).setdefault(len(name), set()).add(name)
+        self._names[name].add(rel)
+        self._paths.setdefault(lower, set()).add(rel)
+        self._version += 1
+
+    def remove_file(self, rel):
+        lower = rel.lower()
+        for table, key in ((self._names, lower.rsplit('/', 1)[-1]), (self._paths, lower)):
+            paths = table.get(key)
+            if paths is not None:
+                paths.discard(rel)
+                if not paths:
+                    del table[key]
+                    if table is self._names:
+                        self.remove_initial(key)
+        self._version += 1
+
+    def remove_initial(self, name):
+        by_length = self._initials[name[:2]]
+        by_length[len(name)].discard(name)
+        if not by_length[len(name)]:
+            del by_length[len(name)]
+            if not by_length:
+                del self._initials[name[:2]]
+
+    def remove_dir(self, rel_dir):
+        for rel in self._dir_files.pop(rel_dir, ()):
+            self.remove_file(rel)
+        for rel in self._dir_subdirs.pop(rel_dir, ()):
+            self.remove_dir(rel)
+
+    def snapshot(self):
+        if self._snapshot_version != self._version:
+            self._name_list = list(self._names)
+            self._path_list = list(self._paths)
+            self._snapshot_version = self._version
+        return self._name_list, self._path_list
+
+    def narrowed_pool(self, query, mode):
+        """The previous match when query only adds to it, else None"""
+        last = self._last_match
+        if last and last[2] == mode and last[1] == self._version and query.startswith(last[0]):
+            return last[3]
+        return None
+
+    def match(self, query, mode, pool, query_id):
+        """Entries of pool matching query, narrowed from the previous query when it was a prefix"""
+        narrowed = self.narrowed_pool(query, mode)
+        if narrowed is not None:
+            pool = narrowed
+        matcher = fuzzy_pattern(query)
+        matches = []
+        # Checked in slices so a newer query does not wait for this one
+        for start in range(0, len(pool), QUERY_SLICE):
+            if query_id != self.latest_query:
+                return None
+            matches.extend(p for p in pool[start:start + QUERY_SLICE] if matcher(p))
+        self._last_match = (query, self._version, mode, matches)
+        return matches
+
+    def rank(self, query, candidates, query_id=None):
+        """(score, candidate) pairs, or None if a newer query superseded it.
+
+        With very many candidates only the shortest are scored.
+        """
+        if len(candidates) > SCORE_ALL_LIMIT:
+            candidates = heapq.nsmallest(SCORE_ALL_LIMIT, candidates, key=len)
+        scored = []
+        for start in range(0, len(candidates), SCORE_SLICE):
+            if query_id is not None and query_id != self.latest_query:
+                return None
+            scored.extend((fuzzy_score(query, c), c) for c in candidates[start:start + SCORE_SLICE])
+        return scored
+
+    def names_starting(self, prefix, skip=None):
+        """File names starting with prefix, one or two characters long, shortest first;
+        the names starting with skip are left out"""
+        buckets = [b for key, b in self._initials.items() if key.startswith(prefix) and key != skip]
+        for length in sorted(set().union(*buckets)):
+            for by_length in buckets:
+                yield from by_length.get(length, ())
+
+    def first_pass(self, query):
+        """{relative path: score} from the shortest file names starting like the query's last part.
+
+        A quick stand-in for the full match: names sharing its first two characters are
+        tried first, then those sharing the first, at most FIRST_PASS_SCAN of each.
+        """
+        name_query = query.rpartition('/')[2]
+        if not name_query:
+            return {}
+        matcher = fuzzy_pattern(name_query)
+        names = []
+        stages = [(name_query[:2], None), (name_query[:1], name_query[:2])] if len(name_query) > 1 else [(name_query, None)]
+        for prefix, skip in stages:
+            for name in islice(self.names_starting(prefix, skip), FIRST_PASS_SCAN):
+                if len(names) == FIRST_PASS_NAMES:
+                    break
+                if matcher(name):
+                    names.append(name)
+        if name_query == query:
+            return self.name_results(query, names)
+        matcher = fuzzy_pattern(query)
+        rels = [rel for name in names for rel in self._names[name] if matcher(rel.lower())]
+        return {rel: score for score, rel in heapq.nlargest(QUICK_OPEN_RESULTS, self.rank(query, rels))}
+
+    def name_results(self, query, names, query_id=None):
+        """{relative path: score} of the files with the best of names, or None if superseded"""
+        scored = self.rank(query, names, query_id)
+        if scored is None:
+            return None
+        results = {}
+        for score, name in heapq.nlargest(QUICK_OPEN_RESULTS, scored):
+            for rel in self._names[name]:
+                results[rel] = score * 4 - rel.count('/')
+        return results
+
+    def search(self, query_id, text):
+        """Absolute paths best matching text, or None if a newer query superseded it or the
+        first answer already said it all.
+
+        Matching every name takes a while on a big tree, so unless the previous query
+        left few to check, a first answer from the names starting like the query is
+        sent through resultsReady before it.
+        """
+        if not self._root:
+            return []
+        recent = self.recent_in_root()
+        query = text.strip().lower().replace('\\', '/')
+        if not query:
+            return sorted(recent, key=recent.get, reverse=True)[:QUICK_OPEN_RESULTS]
+        first = None
+        narrowed = self.narrowed_pool(query, 'path' if '/' in query else 'name')
+        if narrowed is None or len(narrowed) > SCORE_ALL_LIMIT:
+            results = self.first_pass(query)
+            if results:
+                first = self.top_paths(query, results, recent)
+                self.resultsReady.emit(query_id, first)
+        names, paths = self.snapshot()
+        results = {}
+        if '/' not in query:
+            matches = self.match(query, 'name', names, query_id)
+            if matches is None:
+                return None
+            results = self.name_results(query, matches, query_id)
+            if results is None:
+                return None
+        # Whole paths are only searched when the query names folders or no file name matched
+        if not results:
+            matches = self.match(query, 'path', paths, query_id)
+            if matches is None:
+                return None
+            scored = self.rank(query, matches, query_id)
+            if scored is None:
+                return None
+            for score, lower in heapq.nlargest(QUICK_OPEN_RESULTS, scored):
+                for rel in self._paths[lower]:
+                    results.setdefault(rel, score)
+        top = self.top_paths(query, results, recent)
+        return None if top == first else top
+
+    def recent_in_root(self):
+        """Recently opened files of the open folder, with their open counters"""
+        prefix = os.path.join(os.path.normpath(self._root), '')
+        return {path: counter for path, counter in self._recent.items() if path.startswith(prefix)}
+
+    def top_paths(self, query, results, recent):
+        ranked = [(0, score, os.path.normpath(os.path.join(self._root, rel))) for rel, score in results.items()]
+        # Recently opened files that match go first, most recent on top
+        for abs_path, counter in recent.items():
+            score = fuzzy_score(query, os.path.basename(abs_path).lower())
+            if score is not None:
+                ranked.append((counter, score, abs_path))
+        seen = set()
+        top = []
+        for _, _, abs_path in sorted(ranked, reverse=True):
+            if abs_path not in seen:
+                seen.add(abs_path)
+                top.append(abs_path)
+        return top[:QUICK_OPEN_RESULTS]
+
+class WorkspaceIndex(QObject):
+    """GUI-side handle on the workspace crawler, plus the watcher that keeps it current"""
+    resultsReady = pyqtSignal(int, list)
+    indexChanged = pyqtSignal()
+    # A watched directory of the workspace changed on disk
+    directoryChanged = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = None
+        self._query_id = 0
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self.on_directory_changed)
+        self._crawler = WorkspaceCrawler()
+        self._crawler.resultsReady.connect(self.on_results_ready)
+        self._crawler.directoriesFound.connect(self.watch_directories)
+        self._crawler.indexChanged.connect(self.indexChanged)
+        start_worker(self._crawler)
+
+    def set_root(self, root):
+        self.root = root
+        if self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
+        self._crawler.set_root(root)
+
+    def query(self, text):
+        """Start a search; results arrive through resultsReady with the returned id"""
+        self._query_id += 1
+        self._crawler.query(self._query_id, text)
+        return self._query_id
+
+    def note_opened(self, file_path):
+        self._crawler.note_opened(file_path)
+
+    def watch_directories(self, directories):
+        room = MAX_WATCHED_DIRS - len(self._watcher.directories())
+        if room > 0:
+            self._watcher.addPaths(directories[:room])
+
+    def on_directory_changed(self, directory):
+        self._crawler.rescan(directory)
+        self.directoryChanged.emit(directory)
+
+    def on_results_ready(self, query_id, results):
+        if query_id == self._query_id:
+            self.resultsReady.emit(query_id, results)
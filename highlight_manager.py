@@ -1,5 +1,8 @@
 import os
 import json
+import time
+import hashlib
+from typing import Dict, List, Optional, Tuple
 
 HIGHLIGHT_DIR = os.path.join(os.getcwd(), 'configs', 'highlight')
 HIGHLIGHT_PATH = os.path.join(HIGHLIGHT_DIR, 'syntx_highlight.json')
@@ -59,36 +62,130 @@ def ensure_highlight_json():
             with open(fpath, 'w', encoding='utf-8') as f:
                 json.dump(content, f, indent=2)
 
-def get_highlight_rules(lang):
-    ensure_highlight_json()
-    with open(HIGHLIGHT_PATH, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    return data.get(lang, data.get('python'))
+# Seconds a cached file is trusted before its mtime is checked again
+REVALIDATE_INTERVAL = 1.0
 
-def get_language_data(lang):
-    ensure_highlight_json()
-    lang_dir = os.path.join(LANG_ROOT, lang)
-    data = {}
-    for fname in ["keywords.json", "functions.json", "imports.json"]:
-        fpath = os.path.join(lang_dir, fname)
-        if os.path.exists(fpath):
+LANGUAGE_FILES = ["keywords.json", "functions.json", "imports.json"]
+
+def _read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _read_words(path):
+    items = _read_json(path)
+    # Accept list of dicts or list of strings
+    return [item["word"] if isinstance(item, dict) and "word" in item else item for item in items]
+
+def _read_entries(path):
+    """(word, comment) pairs, for completions"""
+    entries = []
+    for item in _read_json(path):
+        if isinstance(item, dict) and "word" in item:
+            entries.append((item["word"], item.get("comment") or ""))
+        elif isinstance(item, str):
+            entries.append((item, ""))
+    return entries
+
+def rules_digest(rules, lang_data):
+    payload = json.dumps([rules or {}, lang_data or {}], sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+class LanguageRegistry:
+    """In-memory cache of the highlight rules, language data and manifest.
+
+    Each JSON file is parsed once and only re-read when its mtime changes; the mtime
+    itself is checked at most every REVALIDATE_INTERVAL seconds. Returned objects are
+    shared between callers and must not be mutated.
+    """
+    def __init__(self):
+        self._files = {}  # (path, parser) -> (checked_at, mtime, value)
+        self._language_data = {}  # lang -> (word lists, data dict)
+        self._language_entries = {}  # lang -> (entry lists, entries dict)
+        self._digests = {}  # lang -> (rules, data, digest)
+        self._ensured = False
+
+    def _ensure(self):
+        if not self._ensured:
+            ensure_highlight_json()
+            self._ensured = True
+
+    def _load(self, path, parse, default):
+        now = time.monotonic()
+        key = (path, parse)
+        cached = self._files.get(key)
+        if cached is not None and now - cached[0] < REVALIDATE_INTERVAL:
+            return cached[2]
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if cached is not None and cached[1] == mtime:
+            value = cached[2]
+        elif mtime is None:
+            value = default
+        else:
             try:
-                with open(fpath, 'r', encoding='utf-8') as f:
-                    items = json.load(f)
-                    # Accept list of dicts or list of strings
-                    data[fname[:-5]] = [item["word"] if isinstance(item, dict) and "word" in item else item for item in items]
+                value = parse(path)
             except Exception:
-                data[fname[:-5]] = []
-        else:
-            data[fname[:-5]] = []
-    return data  # keys: 'keywords', 'functions', 'imports'
+                value = default
+        self._files[key] = (now, mtime, value)
+        return value
+
+    def get_rules(self, lang: str) -> Dict[str, str]:
+        self._ensure()
+        data = self._load(HIGHLIGHT_PATH, _read_json, {})
+        return data.get(lang, data.get('python'))
+
+    def get_language_data(self, lang: str) -> Dict[str, List[str]]:
+        self._ensure()
+        lang_dir = os.path.join(LANG_ROOT, lang)
+        parts = [self._load(os.path.join(lang_dir, fname), _read_words, []) for fname in LANGUAGE_FILES]
+        cached = self._language_data.get(lang)
+        # Keep handing out the same dict while none of the files changed
+        if cached is None or any(a is not b for a, b in zip(cached[0], parts)):
+            cached = (parts, {fname[:-5]: words for fname, words in zip(LANGUAGE_FILES, parts)})
+            self._language_data[lang] = cached
+        return cached[1]  # keys: 'keywords', 'functions', 'imports'
+
+    def get_language_entries(self, lang: str) -> Dict[str, List[Tuple[str, str]]]:
+        """Like get_language_data, with each word's comment"""
+        self._ensure()
+        lang_dir = os.path.join(LANG_ROOT, lang)
+        parts = [self._load(os.path.join(lang_dir, fname), _read_entries, []) for fname in LANGUAGE_FILES]
+        cached = self._language_entries.get(lang)
+        if cached is None or any(a is not b for a, b in zip(cached[0], parts)):
+            cached = (parts, {fname[:-5]: entries for fname, entries in zip(LANGUAGE_FILES, parts)})
+            self._language_entries[lang] = cached
+        return cached[1]
+
+    def get_ext_lang_map(self) -> Dict[str, str]:
+        self._ensure()
+        return self._load(MANIFEST_PATH, _read_json, {})
+
+    def detect_language(self, file_path: Optional[str]) -> str:
+        ext = os.path.splitext(file_path or '')[1].lower()
+        return self.get_ext_lang_map().get(ext, 'python')
+
+    def get_digest(self, lang: str) -> str:
+        """Digest of the rules and language data for lang, recomputed only when they are reloaded"""
+        rules = self.get_rules(lang)
+        data = self.get_language_data(lang)
+        cached = self._digests.get(lang)
+        if cached is None or cached[0] is not rules or cached[1] is not data:
+            cached = (rules, data, rules_digest(rules, data))
+            self._digests[lang] = cached
+        return cached[2]
+
+registry = LanguageRegistry()
+
+def get_highlight_rules(lang):
+    return registry.get_rules(lang)
+
+def get_language_data(lang):
+    return registry.get_language_data(lang)
 
 def get_ext_lang_map():
-    ensure_highlight_json()
-    if os.path.exists(MANIFEST_PATH):
-        try:
-            with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {} 
\ No newline at end of file
+    return registry.get_ext_lang_map()
+
+def detect_language(file_path):
+    return registry.detect_language(file_path)
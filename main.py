@@ -1,15 +1,25 @@
 import sys
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from editor.ui.main_window import MainWindow
+from editor.file_io import stop_all_workers, remove_all_scratch
+from editor.text_search import shutdown_pool
+from editor.outline import shutdown_outline_pool
 import config_manager
 import highlight_manager
 
 if __name__ == '__main__':
+    # Search workers are spawned processes; needed when frozen into an executable
+    multiprocessing.freeze_support()
     highlight_manager.ensure_highlight_json()
     config_manager.ensure_configs()
     settings = config_manager.load_settings()
     themes = config_manager.load_themes()
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(stop_all_workers)
+    app.aboutToQuit.connect(remove_all_scratch)
+    app.aboutToQuit.connect(shutdown_pool)
+    app.aboutToQuit.connect(shutdown_outline_pool)
     window = MainWindow(settings=settings, themes=themes)
     window.show()
     sys.exit(app.exec()) 
\ No newline at end of file
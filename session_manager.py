@@ -0,0 +1,62 @@
+import os
+import marshal
+from config_manager import CONFIG_DIR
+
+SESSION_PATH = os.path.join(CONFIG_DIR, 'session.bin')
+# Header of a session file; marshal data is only readable by the version that wrote it
+SESSION_MAGIC = b'SYNSESS' + bytes([1, marshal.version])
+
+def empty_session():
+    return {
+        'folder': None,
+        'expanded': [],
+        'tabs': [],  # (file_path, cursor position, scroll value)
+        'current': -1,
+    }
+
+def is_valid_session(session):
+    """Whether a loaded session has the shape empty_session() describes"""
+    if not isinstance(session, dict):
+        return False
+    session = {**empty_session(), **session}
+    if session['folder'] is not None and not isinstance(session['folder'], str):
+        return False
+    if not isinstance(session['expanded'], list) or not all(isinstance(p, str) for p in session['expanded']):
+        return False
+    if not isinstance(session['tabs'], list):
+        return False
+    for tab in session['tabs']:
+        if not isinstance(tab, tuple) or len(tab) != 3:
+            return False
+        file_path, cursor, scroll = tab
+        if not isinstance(file_path, str) or type(cursor) is not int or type(scroll) is not int:
+            return False
+    return type(session['current']) is int
+
+def load_session(path=SESSION_PATH):
+    """Return the saved session, or an empty one if there is none or it cannot be read"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return empty_session()
+    if not data.startswith(SESSION_MAGIC):
+        return empty_session()
+    try:
+        session = marshal.loads(data[len(SESSION_MAGIC):])
+    except (EOFError, ValueError, TypeError):
+        return empty_session()
+    if not is_valid_session(session):
+        return empty_session()
+    return {**empty_session(), **session}
+
+def save_session(session, path=SESSION_PATH):
+    """Write the session next to the settings, replacing the old file in one step"""
+    tmp_path = path + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(SESSION_MAGIC + marshal.dumps(session))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error saving session: {e}")